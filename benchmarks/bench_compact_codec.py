@@ -0,0 +1,60 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compact_codec import decode_profile, encode_profile
+from synthetic_applicants import build_synthetic_profile
+
+
+def benchmark(profiles, compact):
+    """
+    Encode and decode every profile, returning total payload bytes, largest payload and timings.
+    """
+    started_at = time.perf_counter()
+    encoded = [encode_profile(profile, compact=compact) for profile in profiles]
+    encode_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    decoded = [decode_profile(text) for text in encoded]
+    decode_seconds = time.perf_counter() - started_at
+
+    if decoded != profiles:
+        raise AssertionError("Decoded profiles do not match the originals")
+
+    sizes = [len(text.encode("utf-8")) for text in encoded]
+    return sum(sizes), max(sizes), encode_seconds, decode_seconds
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Compare payload size and parse time of plain and compact Compressed JSON.")
+    parser.add_argument("--count", type=int, default=20000, help="Number of synthetic profiles.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic profiles.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Run the benchmark for both formats and print a comparison.
+    """
+    args = parse_args()
+    rng = random.Random(args.seed)
+    profiles = [build_synthetic_profile(rng, index) for index in range(args.count)]
+
+    print(f"{'format':<8} {'avg bytes':>10} {'max bytes':>10} {'encode us':>10} {'decode us':>10}")
+    for name, compact in [("plain", False), ("compact", True)]:
+        total_bytes, max_bytes, encode_seconds, decode_seconds = benchmark(profiles, compact)
+        print(
+            f"{name:<8} {total_bytes / args.count:>10.1f} {max_bytes:>10} "
+            f"{encode_seconds / args.count * 1e6:>10.1f} {decode_seconds / args.count * 1e6:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
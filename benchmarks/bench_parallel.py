@@ -0,0 +1,79 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compress_json import compress_applicants
+from shortlist_leads import shortlist_chunk
+from utils.parallel import DEFAULT_CHUNK_SIZE, map_chunks_in_processes
+from utils.streaming import iter_chunks
+from synthetic_applicants import build_synthetic_tables
+
+
+def run_compress(tables, workers):
+    """
+    Compress every synthetic applicant, returning the updates and the elapsed seconds.
+    """
+    started_at = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        updates = compress_applicants(tables["applicants"], tables["experience"], tables["personal"], tables["salary"], workers=workers)
+    return updates, time.perf_counter() - started_at
+
+
+def run_shortlist(applicants_records, workers):
+    """
+    Decode and verify every applicant the way shortlist_leads.py does, returning the results and the elapsed seconds.
+    """
+    started_at = time.perf_counter()
+    if workers > 1:
+        chunk_results = map_chunks_in_processes(shortlist_chunk, applicants_records, workers)
+    else:
+        chunk_results = ((chunk, shortlist_chunk(chunk)) for chunk in iter_chunks(applicants_records, DEFAULT_CHUNK_SIZE))
+    results = [result for _, chunk_shortlist_results in chunk_results for result in chunk_shortlist_results]
+    return results, time.perf_counter() - started_at
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Measure the speedup of --workers for compression and shortlisting.")
+    parser.add_argument("--count", type=int, default=20000, help="Number of synthetic applicants.")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts to compare.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic applicants.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Run compression and shortlisting with every worker count, check the results match a single process and print the speedups.
+    """
+    args = parse_args()
+    tables = build_synthetic_tables(args.count, args.seed)
+    worker_counts = [int(workers) for workers in args.workers.split(",")]
+    print(f"{args.count} applicants on {os.cpu_count()} CPUs")
+
+    baseline = None
+    print(f"{'workers':>7} {'compress s':>11} {'speedup':>8} {'shortlist s':>12} {'speedup':>8}")
+    for workers in worker_counts:
+        updates, compress_seconds = run_compress(tables, workers)
+        compressed_records = [{"id": update["id"], "fields": {"Applicant ID": update["id"], **update["fields"]}} for update in updates]
+        results, shortlist_seconds = run_shortlist(compressed_records, workers)
+
+        if baseline is None:
+            baseline = (updates, compress_seconds, results, shortlist_seconds)
+        elif updates != baseline[0] or results != baseline[2]:
+            raise AssertionError(f"Results with {workers} workers differ from the first run")
+
+        print(
+            f"{workers:>7} {compress_seconds:>11.2f} {baseline[1] / compress_seconds:>7.2f}x "
+            f"{shortlist_seconds:>12.2f} {baseline[3] / shortlist_seconds:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from standin_server import AirtableStandIn, build_environment, start_server
+from synthetic_applicants import build_synthetic_tables
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scripts in pipeline order, each run on the tables left by the previous one
+SCRIPTS = {
+    "compress": ["compress_json.py", "--no-resume"],
+    "shortlist": ["shortlist_leads.py", "--no-resume"],
+    "evaluate": ["evaluate_applicants.py", "--no-resume", "--no-cache"],
+    "decompress": ["decompress_json.py", "--no-resume"],
+}
+
+# Slowdown over the baseline reported as a regression
+REGRESSION_TOLERANCE = 0.2
+
+
+def percentile(values, fraction):
+    """
+    Get the value below which the given fraction of the sorted values fall.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def run_script(name, arguments, environment, work_dir):
+    """
+    Run a script in a child process and return its wall time, exit code and peak RSS in MB.
+    Output goes to a log file in the work directory.
+    """
+    log_path = os.path.join(work_dir, f"{name}.log")
+    started_at = time.perf_counter()
+    with open(log_path, "w") as log_file:
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, arguments[0]), *arguments[1:]],
+            cwd=work_dir,
+            env=environment,
+            stdout=log_file,
+            stderr=subprocess.STDOUT
+        )
+        # wait4 reports the resource usage of this child alone, ru_maxrss being in KB on Linux
+        _, status, usage = os.wait4(process.pid, 0)
+    return started_at, time.perf_counter() - started_at, os.waitstatus_to_exitcode(status), usage.ru_maxrss / 1024, log_path
+
+
+def benchmark_scale(count, args):
+    """
+    Run the selected scripts against a fresh stand-in holding count synthetic applicants.
+    """
+    standin = AirtableStandIn(
+        build_synthetic_tables(count, args.seed),
+        latency=args.latency,
+        rate_limit_rate=args.rate_limit_rate,
+        llm_latency=args.llm_latency,
+        seed=args.seed
+    )
+    server, url = start_server(standin)
+    environment = dict(os.environ, **build_environment(url, args.requests_per_second))
+    scripts = dict(SCRIPTS)
+    if args.concurrency:
+        scripts["evaluate"] = [*SCRIPTS["evaluate"], "--concurrency", str(args.concurrency)]
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in args.scripts:
+            counts_before, written_before = standin.snapshot_counts()
+            started_at, seconds, returncode, peak_rss_mb, log_path = run_script(name, scripts[name], environment, work_dir)
+            counts_after, written_after = standin.snapshot_counts()
+
+            if returncode != 0:
+                with open(log_path) as log_file:
+                    print("".join(log_file.readlines()[-20:]))
+                raise RuntimeError(f"{name} exited with code {returncode} at {count} applicants")
+
+            # Per-record latency is the time from the script start until the record was written
+            latencies = sorted(written - started_at for written in standin.written_at[written_before:written_after])
+            requests = {key: counts_after.get(key, 0) - counts_before.get(key, 0) for key in ["GET", "PATCH", "POST", "429", "chat"]}
+            results.append({
+                "scale": count,
+                "script": name,
+                "seconds": seconds,
+                "applicants_per_second": count / seconds,
+                "written_records": written_after - written_before,
+                "p50_ms": percentile(latencies, 0.5) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "peak_rss_mb": peak_rss_mb,
+                "requests": requests,
+            })
+
+    server.shutdown()
+    return results
+
+
+def print_results(results):
+    """
+    Print one row per scale and script.
+    """
+    print(
+        f"{'scale':>7} {'script':<11} {'seconds':>8} {'appl/s':>8} {'GET':>6} {'PATCH':>6} {'POST':>6} {'429':>5} "
+        f"{'chat':>6} {'written':>8} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>7}"
+    )
+    for result in results:
+        requests = result["requests"]
+        print(
+            f"{result['scale']:>7} {result['script']:<11} {result['seconds']:>8.2f} {result['applicants_per_second']:>8.0f} "
+            f"{requests['GET']:>6} {requests['PATCH']:>6} {requests['POST']:>6} {requests['429']:>5} {requests['chat']:>6} "
+            f"{result['written_records']:>8} {result['p50_ms']:>9.0f} {result['p99_ms']:>9.0f} {result['peak_rss_mb']:>7.1f}"
+        )
+
+
+def find_regressions(results, baseline_path):
+    """
+    Compare wall times with a baseline saved by --output and return the scripts slower than the tolerance.
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {(result["scale"], result["script"]): result for result in json.load(baseline_file)}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["scale"], result["script"]))
+        if previous and result["seconds"] > previous["seconds"] * (1 + REGRESSION_TOLERANCE):
+            regressions.append(f"{result['script']} at {result['scale']} applicants: {previous['seconds']:.2f}s -> {result['seconds']:.2f}s")
+    return regressions
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the scripts against a local Airtable and OpenAI stand-in.")
+    parser.add_argument("--scales", default="1000", help="Comma-separated applicant counts, e.g. 1000,10000,100000.")
+    parser.add_argument("--scripts", default=",".join(SCRIPTS), help="Comma-separated scripts to run, in pipeline order.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic applicants and 429 injection.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every Airtable request.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of Airtable requests answered with a 429.")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds added to every chat completion.")
+    parser.add_argument("--requests-per-second", type=float, default=1000, help="Airtable request rate allowed to the scripts. Use 5 to match Airtable.")
+    parser.add_argument("--concurrency", type=int, default=0, help="Concurrent OpenAI requests of evaluate_applicants.py.")
+    parser.add_argument("--output", metavar="PATH", help="Save the results as JSON to compare later runs against.")
+    parser.add_argument("--baseline", metavar="PATH", help="Results saved with --output; exits with an error when a script got 20%% slower.")
+    args = parser.parse_args()
+    args.scales = [int(scale) for scale in args.scales.split(",")]
+    args.scripts = [name for name in SCRIPTS if name in args.scripts.split(",")]
+    return args
+
+
+def main():
+    """
+    Run the benchmark at every scale, print the results and check them against a baseline.
+    """
+    args = parse_args()
+    results = []
+    for count in args.scales:
+        print(f"Benchmarking {', '.join(args.scripts)} with {count} applicants")
+        results.extend(benchmark_scale(count, args))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        regressions = find_regressions(results, args.baseline)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
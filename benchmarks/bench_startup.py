@@ -0,0 +1,81 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = ["compress_json", "decompress_json", "shortlist_leads", "evaluate_applicants", "run_pipeline", "sync_snapshot", "webhook_service"]
+
+# Third-party modules that should only be imported by the commands using them
+HEAVY_MODULES = ["openai", "requests", "dotenv", "tiktoken"]
+
+IMPORT_CHECK = (
+    "import importlib, sys; "
+    "importlib.import_module(sys.argv[1]); "
+    "print(','.join(name for name in sys.argv[2:] if name in sys.modules))"
+)
+
+
+def time_command(command, environment, runs):
+    """
+    Run a command several times and return the wall times in milliseconds.
+    """
+    timings = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        subprocess.run(command, cwd=REPO_DIR, env=environment, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return timings
+
+
+def find_loaded_modules(script, environment):
+    """
+    Get the heavy modules loaded by importing a script.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHECK, script, *HEAVY_MODULES],
+        cwd=REPO_DIR,
+        env=environment,
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout.strip()
+    return output or "-"
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Measure how long the scripts take to start.")
+    parser.add_argument("--runs", type=int, default=10, help="Number of runs per command.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Time a bare interpreter, then importing and running --help of every script, without any secrets set.
+    """
+    args = parse_args()
+
+    # No .env and no secrets, so any eager validation or network setup fails the run
+    environment = {"PATH": os.environ.get("PATH", ""), "PYTHONDONTWRITEBYTECODE": "1"}
+    interpreter = statistics.median(time_command([sys.executable, "-c", "pass"], environment, args.runs))
+    print(f"Bare interpreter: {interpreter:.1f} ms")
+
+    print(f"{'script':<20} {'import ms':>10} {'--help ms':>10}  heavy modules loaded")
+    for script in SCRIPTS:
+        import_timings = time_command([sys.executable, "-c", f"import {script}"], environment, args.runs)
+        help_timings = time_command([sys.executable, f"{script}.py", "--help"], environment, args.runs)
+        print(
+            f"{script:<20} {statistics.median(import_timings):>10.1f} {statistics.median(help_timings):>10.1f}  "
+            f"{find_loaded_modules(script, environment)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compress_json import build_child_indexes, build_compressed_json
+from utils.models import decode_json
+from standin_server import AirtableStandIn, build_environment, start_server
+from synthetic_applicants import TABLE_IDS, TITLES, build_synthetic_tables
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_TABLE_KEYS = ["personal", "experience", "salary"]
+
+TABLE_KEYS = {table_id: table_key for table_key, table_id in TABLE_IDS.items()}
+
+# Seconds to wait for the service to start, and between checks of the stand-in tables
+STARTUP_TIMEOUT = 30
+POLL_INTERVAL = 0.05
+
+
+def build_submission_payloads(tables, index, edits):
+    """
+    Build the webhook payloads of the form submission of the applicant at index: the applicant created,
+    its child records created unlinked, linked by the automation, then a burst of edits to its first experience.
+    Payloads are in the Airtable format with field names as field ids.
+    """
+    applicant_record = tables["applicants"][index]
+    applicant_id = applicant_record["fields"]["Applicant ID"]
+    child_records = {
+        table_key: [record for record in tables[table_key] if record["fields"]["Applicant ID"] == applicant_id]
+        for table_key in CHILD_TABLE_KEYS
+    }
+
+    payloads = [{
+        "actionMetadata": {"source": "formSubmission"},
+        "changedTablesById": {TABLE_IDS["applicants"]: {"createdRecordsById": {applicant_record["id"]: {"cellValuesByFieldId": {
+            "Applicant ID": applicant_id,
+            "Shortlist Status": "Waiting",
+        }}}}},
+    }]
+
+    payloads.append({
+        "actionMetadata": {"source": "formSubmission"},
+        "changedTablesById": {
+            TABLE_IDS[table_key]: {"createdRecordsById": {
+                record["id"]: {"cellValuesByFieldId": {name: value for name, value in record["fields"].items() if name not in ("Applicant", "Applicant ID")}}
+                for record in records
+            }}
+            for table_key, records in child_records.items()
+        },
+    })
+
+    payloads.append({
+        "actionMetadata": {"source": "automation"},
+        "changedTablesById": {
+            TABLE_IDS[table_key]: {"changedRecordsById": {
+                record["id"]: {"current": {"cellValuesByFieldId": {"Applicant": [applicant_record["id"]], "Applicant ID": applicant_id}}}
+                for record in records
+            }}
+            for table_key, records in child_records.items()
+        },
+    })
+
+    experience_record_id = child_records["experience"][0]["id"]
+    for edit in range(edits):
+        payloads.append({
+            "actionMetadata": {"source": "client"},
+            "changedTablesById": {TABLE_IDS["experience"]: {"changedRecordsById": {
+                experience_record_id: {"current": {"cellValuesByFieldId": {"Title": TITLES[edit % len(TITLES)]}}}
+            }}},
+        })
+    return payloads
+
+
+def build_recording(tables, first_index, submissions, edits, interval, burst_interval):
+    """
+    Build a recording of submissions as (delay, payload) pairs, delay being the seconds since the previous payload.
+    """
+    recording = []
+    for index in range(first_index, first_index + submissions):
+        for position, payload in enumerate(build_submission_payloads(tables, index, edits)):
+            recording.append((interval if position == 0 and recording else burst_interval, payload))
+    return recording
+
+
+def load_recording(path):
+    """
+    Load a recording saved with --save-payloads, one {"delay", "payload"} JSON object per line.
+    """
+    with open(path) as recording_file:
+        return [(line["delay"], line["payload"]) for line in map(json.loads, recording_file) if line]
+
+
+def save_recording(recording, path):
+    """
+    Save a recording as JSON lines.
+    """
+    with open(path, "w") as recording_file:
+        for delay, payload in recording:
+            recording_file.write(json.dumps({"delay": delay, "payload": payload}) + "\n")
+
+
+def find_free_port():
+    """
+    Get a free local port for the notification listener of the service.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_for_line(log_path, text, timeout):
+    """
+    Wait until a line containing text is written to a log file.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(log_path) as log_file:
+            if text in log_file.read():
+                return
+        time.sleep(POLL_INTERVAL)
+    raise RuntimeError(f"Timed out waiting for {text!r} in {log_path}")
+
+
+def get_fields(standin, table_key, record_id):
+    """
+    Copy the fields of a stand-in record, or None once it is destroyed.
+    """
+    with standin.lock:
+        record = standin.records[TABLE_IDS[table_key]].get(record_id)
+        return dict(record["fields"]) if record else None
+
+
+def is_processed(standin, record_id):
+    """
+    Check if an applicant has a shortlist status and a Compressed JSON matching its current child records.
+    """
+    applicant_fields = get_fields(standin, "applicants", record_id) or {}
+    if applicant_fields.get("Shortlist Status", "Waiting") == "Waiting":
+        return False
+    with standin.lock:
+        child_records = {
+            table_key: [
+                {"id": record["id"], "fields": dict(record["fields"])}
+                for record in standin.records[TABLE_IDS[table_key]].values()
+                if record["fields"].get("Applicant") == [record_id]
+            ]
+            for table_key in CHILD_TABLE_KEYS
+        }
+    indexes, _ = build_child_indexes(child_records["experience"], child_records["personal"], child_records["salary"])
+    expected = build_compressed_json({"fields": applicant_fields}, indexes["experience"], indexes["personal"], indexes["salary"])
+    return decode_json(applicant_fields.get("Compressed JSON", "null")) == expected
+
+
+def replay_recording(standin, recording, submitted_at, changed_at):
+    """
+    Replay payloads on schedule, noting when each applicant was submitted and when its records last changed.
+    """
+    for delay, payload in recording:
+        time.sleep(delay)
+        standin.replay_payload(payload)
+        replayed_at = time.perf_counter()
+        for table_id, table_changes in payload["changedTablesById"].items():
+            for record_id in [*table_changes.get("createdRecordsById", {}), *table_changes.get("changedRecordsById", {})]:
+                if TABLE_KEYS[table_id] == "applicants":
+                    submitted_at.setdefault(record_id, replayed_at)
+                    changed_at[record_id] = replayed_at
+                    continue
+                applicant_link = (get_fields(standin, TABLE_KEYS[table_id], record_id) or {}).get("Applicant")
+                if applicant_link:
+                    changed_at[applicant_link[0]] = replayed_at
+
+
+def format_latencies(latencies):
+    """
+    Format the min, median and max of latencies in seconds.
+    """
+    latencies = sorted(latencies)
+    if not latencies:
+        return "-"
+    return f"min {latencies[0]:.2f}s, median {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s"
+
+
+def check_results(standin, replayed_record_ids, existing_record_ids):
+    """
+    Count the Compressed JSON writes and leads of every replayed applicant, check their Compressed JSON
+    matches their final child records, and count the writes to applicants no payload touched.
+    """
+    with standin.lock:
+        payloads = list(standin.webhook_payloads)
+        tables = {
+            table_key: [{"id": record["id"], "fields": dict(record["fields"])} for record in standin.records[table_id].values()]
+            for table_key, table_id in TABLE_IDS.items()
+        }
+
+    compressions = {record_id: 0 for record_id in replayed_record_ids}
+    existing_writes = 0
+    for payload in payloads:
+        if payload["actionMetadata"]["source"] != "publicApi":
+            continue
+        changed_records = payload["changedTablesById"].get(TABLE_IDS["applicants"], {}).get("changedRecordsById", {})
+        for record_id, changed in changed_records.items():
+            if record_id in compressions and "Compressed JSON" in changed["current"]["cellValuesByFieldId"]:
+                compressions[record_id] += 1
+            elif record_id in existing_record_ids:
+                existing_writes += 1
+
+    leads = {record_id: 0 for record_id in replayed_record_ids}
+    for lead in tables["shortlisted"]:
+        if lead["fields"]["Applicant"][0] in leads:
+            leads[lead["fields"]["Applicant"][0]] += 1
+
+    indexes, _ = build_child_indexes(tables["experience"], tables["personal"], tables["salary"])
+    stale = []
+    for applicant_record in tables["applicants"]:
+        if applicant_record["id"] in compressions:
+            expected = build_compressed_json(applicant_record, indexes["experience"], indexes["personal"], indexes["salary"])
+            if decode_json(applicant_record["fields"].get("Compressed JSON", "null")) != expected:
+                stale.append(applicant_record["fields"]["Applicant ID"])
+    return compressions, leads, stale, existing_writes
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Replay webhook payloads of form submissions against a stand-in and time webhook_service.py.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of applicants already in the base.")
+    parser.add_argument("--submissions", type=int, default=20, help="Number of form submissions to replay.")
+    parser.add_argument("--edits", type=int, default=3, help="Edits to the first experience following every submission.")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between submissions.")
+    parser.add_argument("--burst-interval", type=float, default=0.1, help="Seconds between the payloads of one submission.")
+    parser.add_argument("--payloads", metavar="PATH", help="Replay a recording saved with --save-payloads instead of generating submissions.")
+    parser.add_argument("--save-payloads", metavar="PATH", help="Save the generated recording as JSON lines.")
+    parser.add_argument("--debounce", type=float, default=1.0, help="--debounce of the service.")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="--poll-interval of the service.")
+    parser.add_argument("--no-pings", action="store_true", help="Run the service without a notification URL, relying on polling alone.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every Airtable request.")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds added to every chat completion.")
+    parser.add_argument("--requests-per-second", type=float, default=5, help="Airtable request rate allowed to the service.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the last submission to be processed.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic applicants.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Start a stand-in holding --count applicants and the webhook service, replay the recorded payloads,
+    time every changed applicant until its results match its last change, then check the written records.
+    """
+    args = parse_args()
+    tables = build_synthetic_tables(args.count + args.submissions, args.seed)
+    existing_tables = {table_key: [] for table_key in tables}
+    existing_tables["applicants"] = tables["applicants"][:args.count]
+    existing_applicant_ids = {record["fields"]["Applicant ID"] for record in existing_tables["applicants"]}
+    for table_key in CHILD_TABLE_KEYS:
+        existing_tables[table_key] = [record for record in tables[table_key] if record["fields"]["Applicant ID"] in existing_applicant_ids]
+
+    if args.payloads:
+        recording = load_recording(args.payloads)
+    else:
+        recording = build_recording(tables, args.count, args.submissions, args.edits, args.interval, args.burst_interval)
+    if args.save_payloads:
+        save_recording(recording, args.save_payloads)
+        print(f"Saved {len(recording)} payloads to {args.save_payloads}")
+
+    standin = AirtableStandIn(existing_tables, latency=args.latency, llm_latency=args.llm_latency, seed=args.seed)
+    server, url = start_server(standin)
+    environment = dict(os.environ, **build_environment(url, args.requests_per_second))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        log_path = os.path.join(work_dir, "webhook_service.log")
+        command = [
+            sys.executable, os.path.join(REPO_DIR, "webhook_service.py"),
+            "--debounce", str(args.debounce),
+            "--poll-interval", str(args.poll_interval),
+            "--state-path", os.path.join(work_dir, "webhook_state.json"),
+            "--no-cache",
+        ]
+        if not args.no_pings:
+            port = find_free_port()
+            command += ["--notification-url", f"http://127.0.0.1:{port}/", "--listen-host", "127.0.0.1", "--listen-port", str(port)]
+
+        with open(log_path, "w") as log_file:
+            process = subprocess.Popen(command, cwd=work_dir, env=environment, stdout=log_file, stderr=subprocess.STDOUT)
+        try:
+            wait_for_line(log_path, "Following webhook", STARTUP_TIMEOUT)
+
+            submitted_at = {}
+            changed_at = {}
+            replayer = threading.Thread(target=replay_recording, args=(standin, recording, submitted_at, changed_at), daemon=True)
+            replayer.start()
+
+            # Note when every applicant is processed after its last change, until all are or the timeout passes
+            processed_at = {}
+            deadline = None
+            while True:
+                replaying = replayer.is_alive()
+                for record_id, last_changed_at in list(changed_at.items()):
+                    if processed_at.get(record_id, 0) < last_changed_at and is_processed(standin, record_id):
+                        processed_at[record_id] = time.perf_counter()
+                if not replaying:
+                    deadline = deadline or time.monotonic() + args.timeout
+                    if all(processed_at.get(record_id, 0) >= last_changed_at for record_id, last_changed_at in changed_at.items()):
+                        break
+                    if time.monotonic() > deadline:
+                        break
+                time.sleep(POLL_INTERVAL)
+
+        finally:
+            process.send_signal(signal.SIGINT)
+            process.wait(timeout=30)
+            server.shutdown()
+            with open(log_path) as log_file:
+                service_log = log_file.read()
+
+    jobs = service_log.count(" changed applicants: ")
+    unprocessed = [record_id for record_id, last_changed_at in changed_at.items() if processed_at.get(record_id, 0) < last_changed_at]
+    compressions, leads, stale, existing_writes = check_results(standin, set(submitted_at), {record["id"] for record in existing_tables["applicants"]})
+
+    print(f"Replayed {len(recording)} payloads of {len(submitted_at)} submissions into a base of {args.count} applicants")
+    print(f"Processed {len(changed_at) - len(unprocessed)} of {len(changed_at)} changed applicants in {jobs} jobs")
+    print(f"Submission to processed: {format_latencies(processed_at[record_id] - submitted_at[record_id] for record_id in submitted_at if record_id in processed_at)}")
+    print(f"Last change to processed: {format_latencies(processed_at[record_id] - changed_at[record_id] for record_id in changed_at if record_id in processed_at)}")
+    print(f"Compressed JSON writes per submission: {dict(sorted(Counter(compressions.values()).items()))}")
+    print(f"Leads per submission: {dict(sorted(Counter(leads.values()).items()))}")
+    print(f"Writes to applicants without changes: {existing_writes}")
+
+    failures = []
+    if unprocessed:
+        failures.append(f"{len(unprocessed)} applicants not processed within {args.timeout:g}s of the last payload")
+    if stale:
+        failures.append(f"Compressed JSON not matching the final records of {', '.join(stale)}")
+    if any(count > 1 for count in leads.values()):
+        failures.append("Applicants with more than one lead")
+    if existing_writes:
+        failures.append("Applicants without changes were written")
+    if failures:
+        print(service_log[-3000:])
+        for failure in failures:
+            print(f"Failed: {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,695 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from functools import lru_cache
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+from synthetic_applicants import TABLE_IDS, build_synthetic_tables
+
+
+BASE_ID = "appStandIn"
+
+# Airtable limits enforced by the stand-in
+MAX_PAGE_SIZE = 100
+MAX_RECORDS_PER_WRITE = 10
+MAX_PAYLOADS_PER_REQUEST = 50
+WEBHOOK_LIFETIME = timedelta(days=7)
+
+FORMULA_TOKEN_PATTERN = re.compile(r"\s*(?:(\{[^}]*\})|('(?:[^'\\]|\\.)*')|(!=|=|,|\(|\))|([A-Z_]+))")
+BATCH_APPLICANT_PATTERN = re.compile(r"^([^\t\n]+)\t\{", re.MULTILINE)
+
+
+def current_timestamp():
+    """
+    Get the current UTC time in the format returned by LAST_MODIFIED_TIME().
+    """
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def to_formula_text(value):
+    """
+    Convert a field value to the text a formula compares it as.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    return str(value)
+
+
+@lru_cache(maxsize=256)
+def compile_formula(formula):
+    """
+    Compile the filterByFormula subset used by the scripts (AND, OR, NOT, IS_AFTER, LAST_MODIFIED_TIME,
+    DATETIME_PARSE, RECORD_ID, = and != over fields and strings) into a function of (record, modified_times).
+    """
+    tokens = []
+    position = 0
+    while position < len(formula.rstrip()):
+        match = FORMULA_TOKEN_PATTERN.match(formula, position)
+        if not match:
+            raise ValueError(f"Unsupported formula at position {position}: {formula}")
+        tokens.append(match.groups())
+        position = match.end()
+    tokens.append((None, None, None, None))
+    cursor = [0]
+
+    def take():
+        token = tokens[cursor[0]]
+        cursor[0] += 1
+        return token
+
+    def expect(symbol):
+        if take()[2] != symbol:
+            raise ValueError(f"Expected {symbol!r} in formula: {formula}")
+
+    def parse_call(name):
+        expect("(")
+        if name == "LAST_MODIFIED_TIME":
+            field = take()[0] if tokens[cursor[0]][0] else None
+            expect(")")
+            field_name = field[1:-1] if field else ""
+            return lambda record, modified: modified.get(field_name, modified[""])
+
+        if name == "RECORD_ID":
+            expect(")")
+            return lambda record, modified: record["id"]
+
+        arguments = [parse_expression()]
+        while tokens[cursor[0]][2] == ",":
+            take()
+            arguments.append(parse_expression())
+        expect(")")
+
+        if name == "AND":
+            return lambda record, modified: all(argument(record, modified) for argument in arguments)
+        if name == "OR":
+            return lambda record, modified: any(argument(record, modified) for argument in arguments)
+        if name == "NOT":
+            return lambda record, modified: not arguments[0](record, modified)
+        if name == "IS_AFTER":
+            return lambda record, modified: arguments[0](record, modified) > arguments[1](record, modified)
+        if name == "DATETIME_PARSE":
+            return arguments[0]
+        raise ValueError(f"Unsupported formula function {name}")
+
+    def parse_operand():
+        field, string, symbol, name = take()
+        if field:
+            field_name = field[1:-1]
+            return lambda record, modified: to_formula_text(record["fields"].get(field_name))
+        if string:
+            text = string[1:-1].replace("\\'", "'").replace("\\\\", "\\")
+            return lambda record, modified: text
+        if name:
+            return parse_call(name)
+        raise ValueError(f"Unexpected {symbol!r} in formula: {formula}")
+
+    def parse_expression():
+        left = parse_operand()
+        operator = tokens[cursor[0]][2]
+        if operator not in ("=", "!="):
+            return left
+        take()
+        right = parse_operand()
+        if operator == "=":
+            return lambda record, modified: left(record, modified) == right(record, modified)
+        return lambda record, modified: left(record, modified) != right(record, modified)
+
+    return parse_expression()
+
+
+class AirtableStandIn:
+    """
+    In-memory stand-in for the Airtable list, PATCH, POST, DELETE and webhook endpoints and for OpenAI chat completions,
+    files and batches.
+    Requests are delayed by latency seconds and Airtable requests answered with a 429 at the given rate.
+    Request counts and the time every record was written are kept to measure the scripts.
+    Every write and replayed payload is logged as a webhook payload, with field names used as field ids,
+    and webhooks with a notification URL are pinged with a MAC like Airtable does.
+    """
+
+    def __init__(self, tables, latency=0.0, rate_limit_rate=0.0, retry_after=0.1, llm_latency=0.0, seed=42):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.llm_latency = llm_latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+        self.records = {table_id: {} for table_id in TABLE_IDS.values()}
+        self.modified_times = {}
+        self.merge_indexes = {}
+        self.request_counts = Counter()
+        self.written_at = []
+
+        self.webhooks = {}
+        self.webhook_payloads = []
+        self.ping_event = threading.Event()
+        self.pinger = None
+
+        self.files = {}
+        self.batches = {}
+        self.batch_outputs = {}
+
+        timestamp = current_timestamp()
+        for table_key, table_records in tables.items():
+            for record in table_records:
+                self.records[TABLE_IDS[table_key]][record["id"]] = {
+                    "id": record["id"],
+                    "createdTime": timestamp,
+                    "fields": dict(record["fields"]),
+                }
+                self.modified_times[record["id"]] = {"": timestamp}
+
+    def list_records(self, table_id, params):
+        """
+        Return one page of records, applying fields[] projection, filterByFormula and the offset cursor.
+        """
+        page_size = min(int(params.get("pageSize", [MAX_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+        offset = int(params.get("offset", [0])[0])
+        fields = params.get("fields[]")
+        formula = params.get("filterByFormula", [None])[0]
+        matches = compile_formula(formula) if formula else None
+
+        with self.lock:
+            table_records = islice(self.records[table_id].values(), offset, None)
+            page = []
+            next_offset = None
+            for position, record in enumerate(table_records):
+                if matches is not None and not matches(record, self.modified_times[record["id"]]):
+                    continue
+                if len(page) == page_size:
+                    next_offset = offset + position
+                    break
+                page.append(self.render_record(record, fields))
+
+        data = {"records": page}
+        if next_offset is not None:
+            data["offset"] = str(next_offset)
+        return 200, data
+
+    def render_record(self, record, fields=None):
+        """
+        Copy a record for a response, keeping only the requested fields.
+        """
+        record_fields = record["fields"]
+        if fields:
+            record_fields = {name: record_fields[name] for name in fields if name in record_fields}
+        return {"id": record["id"], "createdTime": record["createdTime"], "fields": dict(record_fields)}
+
+    def find_merge_match(self, table_id, fields_to_merge_on, fields):
+        """
+        Find the record whose merge fields equal those of an upserted record, indexing the table on first use.
+        """
+        index_key = (table_id, tuple(fields_to_merge_on))
+        if index_key not in self.merge_indexes:
+            self.merge_indexes[index_key] = {
+                tuple(record["fields"].get(name) for name in fields_to_merge_on): record_id
+                for record_id, record in self.records[table_id].items()
+            }
+        return self.merge_indexes[index_key].get(tuple(fields.get(name) for name in fields_to_merge_on))
+
+    def write_fields(self, table_id, record_id, fields):
+        """
+        Create or update a record, dropping emptied fields and updating merge indexes and modified times.
+        """
+        timestamp = current_timestamp()
+        if record_id is None:
+            record_id = f"rec{uuid.uuid4().hex[:14]}"
+            self.records[table_id][record_id] = {"id": record_id, "createdTime": timestamp, "fields": {}}
+            self.modified_times[record_id] = {}
+
+        record = self.records[table_id][record_id]
+        modified_times = self.modified_times[record_id]
+        modified_times[""] = timestamp
+        for name, value in fields.items():
+            if value is None or value == "" or value == []:
+                record["fields"].pop(name, None)
+            else:
+                record["fields"][name] = value
+            modified_times[name] = timestamp
+
+        for (index_table_id, fields_to_merge_on), index in self.merge_indexes.items():
+            if index_table_id == table_id:
+                index[tuple(record["fields"].get(name) for name in fields_to_merge_on)] = record_id
+        return record
+
+    def write_records(self, table_id, method, payload):
+        """
+        Apply a PATCH (update by id) or POST (create) with optional performUpsert, like Airtable does.
+        """
+        records = payload.get("records", [])
+        if not records or len(records) > MAX_RECORDS_PER_WRITE:
+            return 422, {"error": {"type": "INVALID_RECORDS", "message": f"Send between 1 and {MAX_RECORDS_PER_WRITE} records"}}
+        fields_to_merge_on = (payload.get("performUpsert") or {}).get("fieldsToMergeOn")
+
+        with self.lock:
+            record_ids = []
+            for record in records:
+                record_id = record.get("id")
+                if record_id is None and fields_to_merge_on:
+                    record_id = self.find_merge_match(table_id, fields_to_merge_on, record.get("fields", {}))
+                elif method == "PATCH" and record_id not in self.records[table_id]:
+                    return 422, {"error": {"type": "INVALID_RECORDS", "message": f"Record {record_id} does not exist"}}
+                elif method == "POST" and record_id is not None:
+                    return 422, {"error": {"type": "INVALID_RECORDS", "message": "Created records cannot have an id"}}
+                record_ids.append(record_id)
+
+            table_changes = {"createdRecordsById": {}, "changedRecordsById": {}, "destroyedRecordIds": []}
+            written_records = []
+            for record_id, record in zip(record_ids, records):
+                written_record = self.render_record(self.write_fields(table_id, record_id, record.get("fields", {})))
+                written_records.append(written_record)
+                cell_values = {"cellValuesByFieldId": record.get("fields", {})}
+                if record_id is None:
+                    table_changes["createdRecordsById"][written_record["id"]] = {"createdTime": written_record["createdTime"], **cell_values}
+                else:
+                    table_changes["changedRecordsById"][record_id] = {"current": cell_values}
+            self.written_at.extend([time.perf_counter()] * len(written_records))
+            self.log_webhook_payload({table_id: table_changes}, "publicApi")
+        return 200, {"records": written_records}
+
+    def delete_records(self, table_id, params):
+        """
+        Delete the records listed in records[], like Airtable does.
+        """
+        record_ids = params.get("records[]", [])
+        if not record_ids or len(record_ids) > MAX_RECORDS_PER_WRITE:
+            return 422, {"error": {"type": "INVALID_RECORDS", "message": f"Send between 1 and {MAX_RECORDS_PER_WRITE} records"}}
+
+        with self.lock:
+            missing_record_ids = [record_id for record_id in record_ids if record_id not in self.records[table_id]]
+            if missing_record_ids:
+                return 404, {"error": {"type": "NOT_FOUND", "message": f"Records {', '.join(missing_record_ids)} do not exist"}}
+            for record_id in record_ids:
+                del self.records[table_id][record_id]
+                del self.modified_times[record_id]
+            self.merge_indexes.clear()
+            self.log_webhook_payload({table_id: {"destroyedRecordIds": record_ids}}, "publicApi")
+        return 200, {"records": [{"id": record_id, "deleted": True} for record_id in record_ids]}
+
+    def log_webhook_payload(self, changed_tables_by_id, source):
+        """
+        Append a payload to the webhook log and wake the pinger. Called with the lock held.
+        """
+        self.webhook_payloads.append({
+            "timestamp": current_timestamp(),
+            "baseTransactionNumber": len(self.webhook_payloads) + 1,
+            "actionMetadata": {"source": source, "sourceMetadata": {}},
+            "payloadFormat": "v0",
+            "changedTablesById": changed_tables_by_id,
+        })
+        self.ping_event.set()
+
+    def replay_payload(self, payload):
+        """
+        Apply the record changes of a recorded webhook payload to the tables, as if they were made in Airtable,
+        and log it for the webhooks. Cell values are keyed by field name, the stand-in's field ids.
+        """
+        with self.lock:
+            for table_id, table_changes in payload.get("changedTablesById", {}).items():
+                for record_id, created in table_changes.get("createdRecordsById", {}).items():
+                    self.records[table_id][record_id] = {"id": record_id, "createdTime": current_timestamp(), "fields": {}}
+                    self.modified_times[record_id] = {}
+                    self.write_fields(table_id, record_id, created.get("cellValuesByFieldId", {}))
+                for record_id, changed in table_changes.get("changedRecordsById", {}).items():
+                    self.write_fields(table_id, record_id, changed["current"].get("cellValuesByFieldId", {}))
+                for record_id in table_changes.get("destroyedRecordIds", []):
+                    self.records[table_id].pop(record_id, None)
+                    self.modified_times.pop(record_id, None)
+                    self.merge_indexes.clear()
+            source = (payload.get("actionMetadata") or {}).get("source", "client")
+            self.log_webhook_payload(payload.get("changedTablesById", {}), source)
+
+    def create_webhook(self, payload):
+        """
+        Create a webhook receiving the payloads logged from now on.
+        """
+        webhook_id = f"ach{uuid.uuid4().hex[:14]}"
+        expiration_time = (datetime.now(timezone.utc) + WEBHOOK_LIFETIME).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        with self.lock:
+            self.webhooks[webhook_id] = {
+                "notification_url": payload.get("notificationUrl"),
+                "mac_secret": base64.b64encode(self.rng.randbytes(32)).decode("ascii"),
+                "expiration_time": expiration_time,
+                "first_payload": len(self.webhook_payloads),
+            }
+            if self.webhooks[webhook_id]["notification_url"] and self.pinger is None:
+                self.pinger = threading.Thread(target=self.send_pings, daemon=True)
+                self.pinger.start()
+            mac_secret = self.webhooks[webhook_id]["mac_secret"]
+        return 200, {"id": webhook_id, "macSecretBase64": mac_secret, "expirationTime": expiration_time}
+
+    def list_webhook_payloads(self, webhook_id, params):
+        """
+        Return the payloads of a webhook from the cursor on, numbered from 1 at its creation.
+        """
+        cursor = int(params.get("cursor", [1])[0])
+        limit = min(int(params.get("limit", [MAX_PAYLOADS_PER_REQUEST])[0]), MAX_PAYLOADS_PER_REQUEST)
+        with self.lock:
+            first_payload = self.webhooks[webhook_id]["first_payload"]
+            available = self.webhook_payloads[first_payload + cursor - 1:]
+        payloads = available[:limit]
+        return 200, {"payloads": payloads, "cursor": cursor + len(payloads), "mightHaveMore": len(available) > limit, "payloadFormat": "v0"}
+
+    def send_pings(self):
+        """
+        Ping the notification URL of every webhook whenever payloads were logged, one ping per wake-up like Airtable's coalesced pings.
+        """
+        while True:
+            self.ping_event.wait()
+            self.ping_event.clear()
+            with self.lock:
+                webhooks = [(webhook_id, dict(webhook)) for webhook_id, webhook in self.webhooks.items() if webhook["notification_url"]]
+            for webhook_id, webhook in webhooks:
+                body = json.dumps({"base": {"id": BASE_ID}, "webhook": {"id": webhook_id}, "timestamp": current_timestamp()}).encode("utf-8")
+                digest = hmac.new(base64.b64decode(webhook["mac_secret"]), body, hashlib.sha256).hexdigest()
+                request = Request(webhook["notification_url"], data=body, method="POST", headers={
+                    "Content-Type": "application/json",
+                    "X-Airtable-Content-MAC": f"hmac-sha256={digest}",
+                })
+                try:
+                    urlopen(request, timeout=5).close()
+                except OSError:
+                    # Missed pings are caught up by polling, as with Airtable
+                    pass
+
+    def handle_webhooks(self, method, parts, query, payload):
+        """
+        Route a request to the webhooks endpoints, parts being the path after /v0/bases/{base id}/webhooks.
+        """
+        if method == "POST" and not parts:
+            return self.create_webhook(payload)
+        if not parts or parts[0] not in self.webhooks:
+            return 404, {"error": {"type": "NOT_FOUND"}}
+        if method == "GET" and parts[1:] == ["payloads"]:
+            return self.list_webhook_payloads(parts[0], parse_qs(query))
+        if method == "POST" and parts[1:] == ["refresh"]:
+            expiration_time = (datetime.now(timezone.utc) + WEBHOOK_LIFETIME).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            with self.lock:
+                self.webhooks[parts[0]]["expiration_time"] = expiration_time
+            return 200, {"expirationTime": expiration_time}
+        return 404, {"error": {"type": "NOT_FOUND"}}
+
+    def complete_chat(self, payload):
+        """
+        Answer a chat completion with a valid evaluation in the requested format.
+        """
+        prompt = payload["messages"][-1]["content"]
+        score = len(prompt) % 10 + 1
+        evaluation = {"summary": "Experienced applicant with a consistent profile.", "score": score, "issues": [], "follow_ups": ["Confirm the availability."]}
+
+        schema_name = ((payload.get("response_format") or {}).get("json_schema") or {}).get("name")
+        if schema_name == "applicant_evaluations":
+            content = json.dumps({"results": [{"applicant_id": applicant_id, **evaluation} for applicant_id in BATCH_APPLICANT_PATTERN.findall(prompt)]})
+        elif schema_name:
+            content = json.dumps(evaluation)
+        else:
+            content = f"Summary: {evaluation['summary']}\nScore: {score}\nIssues: None\nFollow-Ups:\n- Confirm the availability."
+
+        return 200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stand-in"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+    def store_file(self, content, purpose):
+        """
+        Keep an uploaded or generated file and describe it like the files endpoint.
+        """
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        with self.lock:
+            self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()), "filename": f"{file_id}.jsonl", "purpose": purpose, "status": "processed"}
+
+    def create_batch(self, payload):
+        """
+        Answer every request of an uploaded input file right away. Requests to other endpoints get an error line.
+        The batch reports in_progress on its first retrieval and completed with its output file afterwards, so callers poll once.
+        """
+        with self.lock:
+            input_content = self.files.get(payload.get("input_file_id"))
+        if input_content is None:
+            return 404, {"error": {"message": f"No such file: {payload.get('input_file_id')}", "type": "invalid_request_error"}}
+
+        output_lines = []
+        failed = 0
+        for line in input_content.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            output_line = {"id": f"batch_req_{uuid.uuid4().hex[:24]}", "custom_id": request["custom_id"], "response": None, "error": None}
+            if request.get("url") != payload.get("endpoint"):
+                failed += 1
+                output_line["error"] = {"code": "invalid_url", "message": f"The URL {request.get('url')} does not match the batch endpoint."}
+            else:
+                self.request_counts["batch chat"] += 1
+                status, body = self.complete_chat(request["body"])
+                output_line["response"] = {"status_code": status, "request_id": uuid.uuid4().hex, "body": body}
+            output_lines.append(json.dumps(output_line))
+
+        output_file = self.store_file(("\n".join(output_lines) + "\n").encode("utf-8"), "batch_output")
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": payload.get("endpoint"),
+            "input_file_id": payload["input_file_id"],
+            "completion_window": payload.get("completion_window"),
+            "status": "in_progress",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "request_counts": {"total": len(output_lines), "completed": 0, "failed": 0},
+        }
+        with self.lock:
+            self.batches[batch_id] = batch
+            self.batch_outputs[batch_id] = output_file["id"], {"total": len(output_lines), "completed": len(output_lines) - failed, "failed": failed}
+        return 200, batch
+
+    def retrieve_batch(self, batch_id):
+        """
+        Return a batch, completing it after it was seen in progress once.
+        """
+        with self.lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return 404, {"error": {"message": f"No such batch: {batch_id}", "type": "invalid_request_error"}}
+            visible_batch = dict(batch)
+            if batch["status"] == "in_progress":
+                output_file_id, request_counts = self.batch_outputs.pop(batch_id)
+                batch.update(status="completed", output_file_id=output_file_id, request_counts=request_counts, completed_at=int(time.time()))
+        return 200, visible_batch
+
+    def handle_batch_api(self, method, parts, payload):
+        """
+        Route a request to the files and batches endpoints, parts being the path after /v1.
+        File contents are returned as bytes instead of JSON data.
+        """
+        if method == "POST" and parts == ["files"]:
+            return 200, self.store_file(payload["file"], payload["purpose"].decode("utf-8"))
+        if method == "GET" and len(parts) == 3 and parts[0] == "files" and parts[2] == "content":
+            with self.lock:
+                content = self.files.get(parts[1])
+            if content is None:
+                return 404, {"error": {"message": f"No such file: {parts[1]}", "type": "invalid_request_error"}}
+            return 200, content
+        if method == "POST" and parts == ["batches"]:
+            return self.create_batch(payload)
+        if method == "GET" and len(parts) == 2 and parts[0] == "batches":
+            return self.retrieve_batch(parts[1])
+        return 404, {"error": {"message": "Unknown endpoint", "type": "invalid_request_error"}}
+
+    def handle(self, method, path, query, payload):
+        """
+        Route a request and return (status, headers, data).
+        """
+        parts = path.strip("/").split("/")
+        if parts[0] == "v1" and parts[1:2] in (["files"], ["batches"]):
+            self.request_counts[f"{parts[1]} {method}"] += 1
+            status, data = self.handle_batch_api(method, parts[1:], payload)
+            return status, {}, data
+
+        if path.endswith("/chat/completions"):
+            self.request_counts["chat"] += 1
+            time.sleep(self.llm_latency)
+            status, data = self.complete_chat(payload)
+            headers = {"x-ratelimit-remaining-requests": "10000", "x-ratelimit-reset-requests": "1s", "x-ratelimit-remaining-tokens": "10000000", "x-ratelimit-reset-tokens": "1s"}
+            return status, headers, data
+
+        if parts[1:4] == ["bases", BASE_ID, "webhooks"]:
+            self.request_counts[f"webhooks {method}"] += 1
+            time.sleep(self.latency)
+            status, data = self.handle_webhooks(method, parts[4:], query, payload)
+            return status, {}, data
+
+        if len(parts) != 3 or parts[1] != BASE_ID or parts[2] not in self.records:
+            return 404, {}, {"error": {"type": "NOT_FOUND"}}
+        table_id = parts[2]
+
+        self.request_counts[method] += 1
+        time.sleep(self.latency)
+        with self.lock:
+            rate_limited = self.rng.random() < self.rate_limit_rate
+        if rate_limited:
+            self.request_counts["429"] += 1
+            return 429, {"Retry-After": str(self.retry_after)}, {"errors": [{"error": "RATE_LIMIT_REACHED"}]}
+
+        if method == "GET":
+            status, data = self.list_records(table_id, parse_qs(query))
+        elif method == "DELETE":
+            status, data = self.delete_records(table_id, parse_qs(query))
+        else:
+            status, data = self.write_records(table_id, method, payload)
+        return status, {}, data
+
+    def snapshot_counts(self):
+        """
+        Get the request counts and number of written records so far.
+        """
+        with self.lock:
+            return dict(self.request_counts), len(self.written_at)
+
+
+def build_handler(standin):
+    """
+    Build a keep-alive request handler class serving a stand-in.
+    """
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def read_payload(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            content_type = self.headers.get("Content-Type", "")
+            if not content_type.startswith("multipart/form-data"):
+                return json.loads(body) if body else {}
+
+            # File uploads are form fields mapped to their raw bytes
+            message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body)
+            return {part.get_param("name", header="content-disposition"): part.get_payload(decode=True) for part in message.iter_parts()}
+
+        def respond(self, method):
+            payload = self.read_payload()
+            url = urlparse(self.path)
+            status, headers, data = standin.handle(method, url.path, url.query, payload)
+
+            is_raw = isinstance(data, bytes)
+            body = data if is_raw else json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/octet-stream" if is_raw else "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.respond("GET")
+
+        def do_PATCH(self):
+            self.respond("PATCH")
+
+        def do_POST(self):
+            self.respond("POST")
+
+        def do_DELETE(self):
+            self.respond("DELETE")
+
+    return StandInHandler
+
+
+def start_server(standin, port=0):
+    """
+    Serve a stand-in on a background thread and return the server and its base URL.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), build_handler(standin))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def build_environment(url, requests_per_second=None):
+    """
+    Build the environment variables pointing the scripts at a stand-in server.
+    """
+    environment = {
+        "OPENAI_API_KEY": "stand-in",
+        "OPENAI_BASE_URL": f"{url}/v1",
+        "AIRTABLE_BASE_ID": BASE_ID,
+        "AIRTABLE_API_KEY": "stand-in",
+        "AIRTABLE_API_URL": f"{url}/v0",
+        "APPLICANTS_TABLE_ID": TABLE_IDS["applicants"],
+        "PERSONAL_DETAILS_TABLE_ID": TABLE_IDS["personal"],
+        "WORK_EXPERIENCE_TABLE_ID": TABLE_IDS["experience"],
+        "SALARY_PREFERENCES_TABLE_ID": TABLE_IDS["salary"],
+        "SHORTLISTED_LEADS_TABLE_ID": TABLE_IDS["shortlisted"],
+    }
+    if requests_per_second is not None:
+        environment["AIRTABLE_REQUESTS_PER_SECOND"] = str(requests_per_second)
+    return environment
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Serve a local Airtable and OpenAI stand-in filled with synthetic applicants.")
+    parser.add_argument("--port", type=int, default=8780, help="Port to listen on.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of synthetic applicants.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic applicants and 429 injection.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every Airtable request.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of Airtable requests answered with a 429.")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds added to every chat completion.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Serve the stand-in until interrupted and print the environment to point the scripts at it.
+    """
+    args = parse_args()
+    standin = AirtableStandIn(
+        build_synthetic_tables(args.count, args.seed),
+        latency=args.latency,
+        rate_limit_rate=args.rate_limit_rate,
+        llm_latency=args.llm_latency,
+        seed=args.seed
+    )
+    server, url = start_server(standin, args.port)
+
+    print(f"Serving {args.count} synthetic applicants on {url}, point the scripts at it with:")
+    for name, value in build_environment(url, requests_per_second=100).items():
+        print(f"export {name}={value}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Requests served: {standin.snapshot_counts()[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import random
+from datetime import date, timedelta
+
+
+COMPANIES = ["Google", "Meta", "OpenAI", "Microsoft", "Amazon", "Stripe", "Acme Corp", "Globex", "Initech", "Umbrella"]
+TITLES = ["Software Engineer", "Senior Engineer", "Data Scientist", "Engineering Manager", "ML Engineer"]
+TECHNOLOGIES = ["Python", "Go", "Rust", "TypeScript", "React", "PostgreSQL", "Kubernetes", "AWS", "Docker", "PyTorch"]
+LOCATIONS = ["USA", "Canada", "UK", "Germany", "India"]
+CURRENCIES = ["USD", "EUR", "INR"]
+
+# Table ids of the stand-in base, passed to the scripts through the usual environment variables
+TABLE_IDS = {
+    "applicants": "tblApplicants",
+    "personal": "tblPersonalDetails",
+    "experience": "tblWorkExperience",
+    "salary": "tblSalaryPreferences",
+    "shortlisted": "tblShortlistedLeads",
+}
+
+
+def build_synthetic_profile(rng, index):
+    """
+    Build a random profile with the same shape as compress_json output.
+    """
+    experiences = []
+    start = date(2010, 1, 1) + timedelta(days=rng.randrange(3000))
+    for _ in range(rng.randint(1, 5)):
+        end = start + timedelta(days=rng.randrange(200, 1500))
+        experiences.append({
+            "company": rng.choice(COMPANIES),
+            "title": rng.choice(TITLES),
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "technologies": rng.sample(TECHNOLOGIES, rng.randint(2, 6)),
+        })
+        start = end
+
+    return {
+        "personal": {
+            "name": f"Applicant {index}",
+            "location": rng.choice(LOCATIONS),
+            "email": f"applicant{index}@example.com",
+            "linkedin": f"https://linkedin.com/in/applicant{index}",
+        },
+        "experience": experiences,
+        "salary": {
+            "rate": rng.randint(40, 150),
+            "min_rate": rng.randint(30, 100),
+            "currency": rng.choice(CURRENCIES),
+            "availability": rng.choice([10, 20, 30, 40]),
+        },
+    }
+
+
+def build_synthetic_tables(count, seed=42):
+    """
+    Build Airtable records for count applicants and their linked child records, keyed by table key.
+    Applicants start without Compressed JSON and with the Waiting shortlist status, like freshly submitted forms.
+    """
+    rng = random.Random(seed)
+    tables = {table_key: [] for table_key in TABLE_IDS}
+
+    for index in range(count):
+        profile = build_synthetic_profile(rng, index)
+        applicant_id = f"A{index:07d}"
+        applicant_record_id = f"recApp{index:011d}"
+
+        personal_record_id = f"recPer{index:011d}"
+        tables["personal"].append({"id": personal_record_id, "fields": {
+            "Applicant": [applicant_record_id],
+            "Applicant ID": applicant_id,
+            "Full Name": profile["personal"]["name"],
+            "Location": profile["personal"]["location"],
+            "Email": profile["personal"]["email"],
+            "LinkedIn": profile["personal"]["linkedin"],
+        }})
+
+        experience_record_ids = []
+        for position, experience in enumerate(profile["experience"]):
+            experience_record_id = f"recExp{index:09d}{position:02d}"
+            experience_record_ids.append(experience_record_id)
+            tables["experience"].append({"id": experience_record_id, "fields": {
+                "Applicant": [applicant_record_id],
+                "Applicant ID": applicant_id,
+                "Company": experience["company"],
+                "Title": experience["title"],
+                "Start": experience["start"],
+                "End": experience["end"],
+                "Technologies": ",".join(experience["technologies"]),
+            }})
+
+        salary_record_id = f"recSal{index:011d}"
+        tables["salary"].append({"id": salary_record_id, "fields": {
+            "Applicant": [applicant_record_id],
+            "Applicant ID": applicant_id,
+            "Preferred Rate": profile["salary"]["rate"],
+            "Minimum Rate": profile["salary"]["min_rate"],
+            "Currency": profile["salary"]["currency"],
+            "Availability (hrs/wk)": str(profile["salary"]["availability"]),
+        }})
+
+        tables["applicants"].append({"id": applicant_record_id, "fields": {
+            "Applicant ID": applicant_id,
+            "Shortlist Status": "Waiting",
+            "Personal Details": [personal_record_id],
+            "Work Experience": experience_record_ids,
+            "Salary Preferences": [salary_record_id],
+        }})
+
+    return tables
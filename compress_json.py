@@ -1,47 +1,78 @@
-import json
-from copy import deepcopy
+import argparse
 from utils.config_loader import TABLES   
-from utils.airtable_operations import fetch_records_from_table, sanitize_records, upsert_records
+from utils.airtable_operations import build_match_formula, iter_records_from_table
+from utils.compact_codec import encode_profile
+from utils.metrics import add_metrics_arguments, start_metrics, timed
+from utils.models import RecordPatch
+from utils.parallel import map_chunks_in_processes
+from utils.snapshot_store import SnapshotStore
+from utils.record_index import find_orphaned_records, index_child_records
+from utils.run_journal import JournaledWriter, RunJournal, get_journal_path
+from utils.watermarks import DEFAULT_WATERMARKS_PATH, build_modified_since_formula, current_timestamp, load_watermarks, save_watermarks
 
 
-def build_compressed_json(applicant_record, experience_records, personal_records, salary_records):
+# Only download the columns used to build the compressed JSON
+APPLICANT_FIELDS = ["Applicant ID", "Compressed JSON"]
+PERSONAL_FIELDS = ["Applicant ID", "Applicant", "Full Name", "Location", "Email", "LinkedIn"]
+EXPERIENCE_FIELDS = ["Applicant ID", "Applicant", "Company", "Title", "Start", "End", "Technologies"]
+SALARY_FIELDS = ["Applicant ID", "Applicant", "Preferred Rate", "Minimum Rate", "Currency", "Availability (hrs/wk)"]
+
+# Child records not linked to any applicant are never part of a compressed JSON
+LINKED_CHILD_FORMULA = "NOT({Applicant} = '')"
+
+# Tables tracked by incremental compression and the number of Applicant IDs matched per formula
+WATERMARK_TABLES = ["applicants", "experience", "personal", "salary"]
+MATCH_CHUNK_SIZE = 50
+
+CHILD_TABLE_NAMES = {
+    "experience": "Work Experience",
+    "personal": "Personal Details",
+    "salary": "Salary Preferences",
+}
+
+JOIN_ISSUES = {
+    "orphaned": "without a matching applicant",
+    "duplicates": "duplicating an earlier record of the same applicant",
+    "unlinked": "without an applicant link",
+}
+
+
+@timed("compress.build_compressed_json")
+def build_compressed_json(applicant_record, experience_index, personal_index, salary_index):
     """
-    Build a compressed JSON object from the records.
+    Build a compressed JSON object from the indexed child records of the applicant.
     """
     applicant_id = applicant_record["fields"]["Applicant ID"]
 
     personal_data = {}
-    for personal_record in personal_records:
-        if personal_record.get("fields", {}).get("Applicant") is not None and applicant_id == personal_record["fields"]["Applicant ID"]:
-            personal_data = {
-                "name": personal_record["fields"]["Full Name"],
-                "location": personal_record["fields"]["Location"],
-                "email": personal_record["fields"]["Email"],
-                "linkedin": personal_record["fields"]["LinkedIn"],
-            }
-            break
+    personal_record = personal_index.get(applicant_id)
+    if personal_record is not None:
+        personal_data = {
+            "name": personal_record["fields"]["Full Name"],
+            "location": personal_record["fields"]["Location"],
+            "email": personal_record["fields"]["Email"],
+            "linkedin": personal_record["fields"]["LinkedIn"],
+        }
 
     experience_data = []
-    for experience_record in experience_records:
-        if experience_record.get("fields", {}).get("Applicant") is not None and applicant_id == experience_record["fields"]["Applicant ID"]:
-            experience_data.append({
-                "company": experience_record["fields"]["Company"],
-                "title": experience_record["fields"]["Title"],
-                "start": experience_record["fields"]["Start"],
-                "end": experience_record["fields"]["End"],
-                "technologies": experience_record["fields"]["Technologies"].split(","),
-            })
-    
+    for experience_record in experience_index.get(applicant_id, []):
+        experience_data.append({
+            "company": experience_record["fields"]["Company"],
+            "title": experience_record["fields"]["Title"],
+            "start": experience_record["fields"]["Start"],
+            "end": experience_record["fields"]["End"],
+            "technologies": experience_record["fields"]["Technologies"].split(","),
+        })
+
     salary_data = {}
-    for salary_record in salary_records:
-        if salary_record.get("fields", {}).get("Applicant") is not None and applicant_id == salary_record["fields"]["Applicant ID"]:
-            salary_data = {
-                "rate": int(salary_record["fields"]["Preferred Rate"]),
-                "min_rate": int(salary_record["fields"]["Minimum Rate"]),
-                "currency": salary_record["fields"]["Currency"],
-                "availability": int(salary_record["fields"]["Availability (hrs/wk)"]),
-            }
-            break
+    salary_record = salary_index.get(applicant_id)
+    if salary_record is not None:
+        salary_data = {
+            "rate": int(salary_record["fields"]["Preferred Rate"]),
+            "min_rate": int(salary_record["fields"]["Minimum Rate"]),
+            "currency": salary_record["fields"]["Currency"],
+            "availability": int(salary_record["fields"]["Availability (hrs/wk)"]),
+        }
 
     compressed_json = {
         "personal": personal_data,
@@ -51,40 +82,254 @@ def build_compressed_json(applicant_record, experience_records, personal_records
     return compressed_json
 
 
-def main():
+def build_child_indexes(experience_records, personal_records, salary_records):
     """
-    Main function to fetch all records from all tables.
+    Build one Applicant ID index per child table along with a report of rows that cannot be joined.
+    """
+    experience_index, experience_report = index_child_records(experience_records, unique=False)
+    personal_index, personal_report = index_child_records(personal_records)
+    salary_index, salary_report = index_child_records(salary_records)
+
+    indexes = {
+        "experience": experience_index,
+        "personal": personal_index,
+        "salary": salary_index,
+    }
+    join_report = {
+        "experience": experience_report,
+        "personal": personal_report,
+        "salary": salary_report,
+    }
+    return indexes, join_report
+
+
+def print_join_report(indexes, join_report, applicant_ids):
+    """
+    Print child records that were not joined to any applicant.
+    """
+    for table_key, table_name in CHILD_TABLE_NAMES.items():
+        report = join_report[table_key]
+        report["orphaned"] = find_orphaned_records(indexes[table_key], applicant_ids)
+
+        for issue, description in JOIN_ISSUES.items():
+            if report[issue]:
+                print(f"Found {len(report[issue])} {table_name} records {description}: {', '.join(report[issue])}")
+
+
+def fetch_child_records(filter_by_formula):
+    """
+    Fetch linked experience, personal and salary records matching a formula.
+    Fetch errors are raised so that a failed read never overwrites profiles with empty data.
+    """
+    formula = f"AND({LINKED_CHILD_FORMULA}, {filter_by_formula})" if filter_by_formula else LINKED_CHILD_FORMULA
+    experience_records = list(iter_records_from_table(TABLES["experience"], fields=EXPERIENCE_FIELDS, filter_by_formula=formula))
+    personal_records = list(iter_records_from_table(TABLES["personal"], fields=PERSONAL_FIELDS, filter_by_formula=formula))
+    salary_records = list(iter_records_from_table(TABLES["salary"], fields=SALARY_FIELDS, filter_by_formula=formula))
+    return experience_records, personal_records, salary_records
+
+
+def find_changed_applicant_ids(watermarks):
+    """
+    Find Applicant IDs of applicants created, or having child records modified, since the watermarks.
+    """
+    changed_applicant_ids = set()
+    for table_key in CHILD_TABLE_NAMES:
+        formula = f"AND({LINKED_CHILD_FORMULA}, {build_modified_since_formula(watermarks[table_key])})"
+        for child_record in iter_records_from_table(TABLES[table_key], fields=["Applicant ID"], filter_by_formula=formula):
+            changed_applicant_ids.add(child_record["fields"].get("Applicant ID"))
+
+    # Compressed JSON writes modify applicants too, so only new Applicant IDs count as changes
+    formula = build_modified_since_formula(watermarks["applicants"], field_name="Applicant ID")
+    for applicant_record in iter_records_from_table(TABLES["applicants"], fields=["Applicant ID"], filter_by_formula=formula):
+        changed_applicant_ids.add(applicant_record["fields"].get("Applicant ID"))
+
+    changed_applicant_ids.discard(None)
+    return sorted(changed_applicant_ids)
+
+
+def build_compressed_json_patch(applicant_record, indexes, compact=False):
     """
-    applicants_records = fetch_records_from_table(TABLES["applicants"])
-    experience_records = fetch_records_from_table(TABLES["experience"])
-    personal_records = fetch_records_from_table(TABLES["personal"])
-    salary_records = fetch_records_from_table(TABLES["salary"])
+    Build the Compressed JSON update of an applicant, or None when the stored value would not change.
+    """
+    applicant_compressed_json = encode_profile(build_compressed_json(
+        applicant_record,
+        indexes["experience"],
+        indexes["personal"],
+        indexes["salary"]
+    ), compact=compact)
+
+    # Skip writes that would not change the stored value
+    if applicant_record["fields"].get("Compressed JSON") == applicant_compressed_json:
+        return None
+    return RecordPatch(applicant_record["id"], {"Compressed JSON": applicant_compressed_json}).to_record()
 
-    print(f"Fetched {len(applicants_records)} applicants records")
+
+# Child indexes and format of a compression worker process, set once per worker
+_worker_indexes = None
+_worker_compact = False
+
+
+def init_compress_worker(indexes, compact):
+    """
+    Keep the read-only child indexes in a worker process for all the chunks it compresses.
+    """
+    global _worker_indexes, _worker_compact
+    _worker_indexes = indexes
+    _worker_compact = compact
+
+
+def compress_chunk(applicants_records):
+    """
+    Build the Compressed JSON updates of a chunk of applicants in a worker process.
+    """
+    return [build_compressed_json_patch(applicant_record, _worker_indexes, _worker_compact) for applicant_record in applicants_records]
+
+
+def compress_applicants(applicants_records, experience_records, personal_records, salary_records, compact=False, workers=1):
+    """
+    Build compressed JSON for applicants, keeping only records whose serialized JSON changed.
+    With compact the value is written in the versioned compact format instead of plain JSON.
+    With several workers applicants are compressed in chunks by a process pool, in the same order as in a single process.
+    """
     print(f"Fetched {len(experience_records)} experience records")
     print(f"Fetched {len(personal_records)} personal records")
     print(f"Fetched {len(salary_records)} salary records")
 
-    # Build compressed JSON for entire applicants records
-    final_applicants_records = []
-    for applicant_record in applicants_records:
-        applicant_compressed_json = build_compressed_json(applicant_record, experience_records, personal_records, salary_records)
-        updated_applicant_record = deepcopy(applicant_record)
-        updated_applicant_record["fields"]["Compressed JSON"] = json.dumps(applicant_compressed_json)
-        final_applicants_records.append(updated_applicant_record)
-
-    # Sanitize records and upsert 10 records at a time
-    sanitized_records = sanitize_records(final_applicants_records)
-    i = 0
-    while i < len(sanitized_records):
-        j = min(i + 10, len(sanitized_records))
-        print(f"Upserting {len(sanitized_records[i:j])} records in batch from index {i} to {j}")
-        upsert_records(
-            table_id=TABLES["applicants"],
-            table_name="Applicants",
-            sanitized_records=sanitized_records[i:j]
+    indexes, join_report = build_child_indexes(experience_records, personal_records, salary_records)
+
+    applicant_ids = set()
+
+    def iter_applicants_records():
+        for applicant_record in applicants_records:
+            applicant_ids.add(applicant_record["fields"]["Applicant ID"])
+            yield applicant_record
+
+    if workers > 1:
+        chunk_results = map_chunks_in_processes(
+            compress_chunk,
+            iter_applicants_records(),
+            workers,
+            initializer=init_compress_worker,
+            initargs=(indexes, compact)
         )
-        i = j
+        patches = (patch for _, chunk_patches in chunk_results for patch in chunk_patches)
+    else:
+        patches = (build_compressed_json_patch(applicant_record, indexes, compact) for applicant_record in iter_applicants_records())
+
+    unchanged_count = 0
+    final_applicants_records = []
+    for patch in patches:
+        if patch is None:
+            unchanged_count += 1
+            continue
+        final_applicants_records.append(patch)
+
+    print(f"Built compressed JSON for {len(final_applicants_records)} changed applicants records, {unchanged_count} unchanged")
+    print_join_report(indexes, join_report, applicant_ids)
+    return final_applicants_records
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Compress child tables into the Compressed JSON of applicants.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only recompute applicants whose records changed since the last run."
+    )
+    source.add_argument(
+        "--snapshot",
+        metavar="PATH",
+        help="Read records from a local snapshot created by sync_snapshot.py instead of Airtable."
+    )
+    parser.add_argument(
+        "--watermarks-path",
+        default=DEFAULT_WATERMARKS_PATH,
+        help="JSON file holding the last run timestamp per table."
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write Compressed JSON in the versioned compact format instead of plain JSON."
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Discard the journal of an interrupted run instead of resuming it."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes building compressed JSON. Incremental runs only touch a few applicants and stay in one process."
+    )
+    add_metrics_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """
+    Main function to fetch all records from all tables.
+    Compressed JSON updates are journaled and written in batches as applicants are processed.
+    """
+    args = parse_args()
+    start_metrics("compress_json", args)
+    run_started_at = current_timestamp()
+    watermarks = load_watermarks(args.watermarks_path)
+
+    store = SnapshotStore(args.snapshot) if args.snapshot else None
+
+    journal = RunJournal(get_journal_path("compress_json"), resume=not args.no_resume)
+    final_applicants_records = JournaledWriter(
+        journal,
+        {"applicants": {"table_id": TABLES["applicants"], "table_name": "Applicants"}},
+        on_flushed=None if store is None else lambda _, records: store.apply_updates("applicants", records)
+    )
+
+    if store is not None:
+        final_applicants_records.extend(compress_applicants(
+            journal.iter_unfinished(store.iter_records("applicants", fields=APPLICANT_FIELDS)),
+            list(store.iter_records("experience", fields=EXPERIENCE_FIELDS)),
+            list(store.iter_records("personal", fields=PERSONAL_FIELDS)),
+            list(store.iter_records("salary", fields=SALARY_FIELDS)),
+            compact=args.compact,
+            workers=args.workers
+        ))
+
+    elif args.incremental and all(table_key in watermarks for table_key in WATERMARK_TABLES):
+        changed_applicant_ids = find_changed_applicant_ids(watermarks)
+        print(f"Found {len(changed_applicant_ids)} changed applicants since last run")
+
+        for i in range(0, len(changed_applicant_ids), MATCH_CHUNK_SIZE):
+            match_formula = build_match_formula("Applicant ID", changed_applicant_ids[i:i + MATCH_CHUNK_SIZE])
+            final_applicants_records.extend(compress_applicants(
+                journal.iter_unfinished(iter_records_from_table(TABLES["applicants"], fields=APPLICANT_FIELDS, filter_by_formula=match_formula)),
+                *fetch_child_records(match_formula),
+                compact=args.compact
+            ))
+
+    else:
+        if args.incremental:
+            print("No watermarks found, compressing all applicants")
+        final_applicants_records.extend(compress_applicants(
+            journal.iter_unfinished(iter_records_from_table(TABLES["applicants"], fields=APPLICANT_FIELDS)),
+            *fetch_child_records(None),
+            compact=args.compact,
+            workers=args.workers
+        ))
+
+    # Write the remaining updates, keeping the journal when any batch failed
+    succeeded = final_applicants_records.close()
+
+    if store is not None:
+        store.close()
+
+    # Only move the watermarks forward once every change read from Airtable has been written
+    elif succeeded:
+        save_watermarks({table_key: run_started_at for table_key in WATERMARK_TABLES}, args.watermarks_path)
 
     print("Compressed JSON completed successfully!!!")
 
@@ -1,14 +1,27 @@
-import json
+import argparse
 from utils.config_loader import TABLES   
-from utils.airtable_operations import fetch_records_from_table, upsert_records
+from utils.airtable_operations import iter_records_from_table
+from utils.compact_codec import decode_profile
+from utils.metrics import add_metrics_arguments, start_metrics
+from utils.run_journal import JournaledWriter, RunJournal, get_journal_path
+
+
+# Only download applicants having a compressed JSON and the link fields to child tables
+APPLICANT_FIELDS = ["Applicant ID", "Compressed JSON", "Personal Details", "Work Experience", "Salary Preferences"]
+COMPRESSED_APPLICANTS_FORMULA = "NOT({Compressed JSON} = '')"
+
+# Child records without a link are matched on Applicant ID and created when missing
+MERGE_FIELDS = ["Applicant ID"]
+# An applicant has many experiences, so extra ones are matched on the role as well,
+# and a resumed run replaying its journal updates the experiences it already created
+EXPERIENCE_MERGE_FIELDS = ["Applicant ID", "Company", "Start"]
 
 
 def create_personal_details_record(applicant_id, personal_data, personal_details_record_id, applicant_record_id):
     """
-    Create a personal details record.
+    Create a personal details record, without id when the applicant has no linked record yet.
     """
     updated_personal_details_record = {
-        "id": personal_details_record_id,
         "fields": {
             "Applicant": [
                 applicant_record_id
@@ -20,17 +33,19 @@ def create_personal_details_record(applicant_id, personal_data, personal_details
             "LinkedIn": personal_data["linkedin"]
         }
     }
+    if personal_details_record_id:
+        updated_personal_details_record["id"] = personal_details_record_id
     return updated_personal_details_record
 
 
 def create_work_experience_records(applicant_id, experience_data, work_experience_record_ids, applicant_record_id):
     """
-    Create a work experience record.
+    Create work experience records, pairing experiences with linked record ids in order.
+    Experiences beyond the linked records are created without id.
     """
     updated_work_experience_records = []
-    for i, work_experience_record_id in enumerate(work_experience_record_ids):
+    for i in range(len(experience_data)):
         updated_work_experience_record = {
-            "id": work_experience_record_id,
             "fields": {
                 "Applicant": [
                     applicant_record_id
@@ -43,16 +58,17 @@ def create_work_experience_records(applicant_id, experience_data, work_experienc
                 "Technologies": ",".join(experience_data[i]["technologies"])
             }
         }
+        if i < len(work_experience_record_ids):
+            updated_work_experience_record["id"] = work_experience_record_ids[i]
         updated_work_experience_records.append(updated_work_experience_record)
     return updated_work_experience_records
 
 
 def create_salary_preferences_record(applicant_id, salary_data, salary_preferences_record_id, applicant_record_id):
     """
-    Create a salary preferences record.
+    Create a salary preferences record, without id when the applicant has no linked record yet.
     """
     updated_salary_preferences_record = {
-        "id": salary_preferences_record_id,
         "fields": {
             "Applicant": [
                 applicant_record_id
@@ -64,22 +80,55 @@ def create_salary_preferences_record(applicant_id, salary_data, salary_preferenc
             "Availability (hrs/wk)": str(salary_data["availability"])
         }
     }
+    if salary_preferences_record_id:
+        updated_salary_preferences_record["id"] = salary_preferences_record_id
     return updated_salary_preferences_record
 
 
-def main():
+def parse_args():
     """
-    Decompress applicants records.
+    Parse command line arguments.
     """
-    applicants_records = fetch_records_from_table(TABLES["applicants"])
-    print(f"Found {len(applicants_records)} applicant records.")
+    parser = argparse.ArgumentParser(description="Push the Compressed JSON of applicants back to the child tables.")
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Discard the journal of an interrupted run instead of resuming it."
+    )
+    add_metrics_arguments(parser)
+    return parser.parse_args()
 
-    for i, applicant_record in enumerate(applicants_records):
-        print(f"Processing applicant {i+1} of {len(applicants_records)}: {applicant_record['fields']['Applicant ID']}")
 
+def main():
+    """
+    Decompress applicants records.
+    Child table updates are journaled per applicant and flushed per table in full batches as they accumulate.
+    """
+    args = parse_args()
+    start_metrics("decompress_json", args)
+
+    journal = RunJournal(get_journal_path("decompress_json"), resume=not args.no_resume)
+    writer = JournaledWriter(journal, {
+        # Personal Details and Salary Preferences hold one record per applicant, so missing ones are merged on Applicant ID
+        "personal": {"table_id": TABLES["personal"], "table_name": "Personal Details", "fields_to_merge_on": MERGE_FIELDS},
+        # Work Experience holds many records per applicant, so existing ones are updated by id and extra ones upserted
+        "experience_updates": {"table_id": TABLES["experience"], "table_name": "Work Experience"},
+        "experience_creates": {"table_id": TABLES["experience"], "table_name": "Work Experience", "fields_to_merge_on": EXPERIENCE_MERGE_FIELDS},
+        "salary": {"table_id": TABLES["salary"], "table_name": "Salary Preferences", "fields_to_merge_on": MERGE_FIELDS},
+    })
+
+    applicants_records = iter_records_from_table(
+        TABLES["applicants"],
+        fields=APPLICANT_FIELDS,
+        filter_by_formula=COMPRESSED_APPLICANTS_FORMULA
+    )
+
+    for i, applicant_record in enumerate(journal.iter_unfinished(applicants_records)):
         applicant_fields = applicant_record.get("fields", {})
-        applicant_id = applicant_fields["Applicant ID"]
-        compressed_json = applicant_fields["Compressed JSON"]
+        applicant_id = applicant_fields.get("Applicant ID")
+        compressed_json = applicant_fields.get("Compressed JSON")
+
+        print(f"Processing applicant {i+1}: {applicant_id}")
         personal_details_reference = applicant_fields.get("Personal Details", [])
         work_experience_references = applicant_fields.get("Work Experience", [])
         salary_preferences_reference = applicant_fields.get("Salary Preferences", [])
@@ -90,74 +139,60 @@ def main():
             continue
 
         try:
-            compressed_json_data = json.loads(compressed_json)
+            compressed_json_data = decode_profile(compressed_json)
 
         except Exception as ex:
             print(f"Skipping invalid JSON for {applicant_id}: {ex}")
             continue
 
-        # Insert updated Personal Details record
-        if compressed_json_data["personal"] and personal_details_reference:
-            personal_details_record = create_personal_details_record(
+        child_records = {"personal": [], "experience_updates": [], "experience_creates": [], "salary": []}
+
+        # Collect updated Personal Details record
+        if compressed_json_data["personal"]:
+            child_records["personal"].append(create_personal_details_record(
                 applicant_id=applicant_id,
                 personal_data=compressed_json_data["personal"],
-                personal_details_record_id=personal_details_reference[0],
+                personal_details_record_id=personal_details_reference[0] if personal_details_reference else None,
                 applicant_record_id=applicant_record["id"]
-            )
-
-            print(f"Upserting personal details record for {applicant_id}")
-            upsert_records(
-                table_id=TABLES["personal"],
-                table_name="Personal Details",
-                sanitized_records=[personal_details_record]
-            )
+            ))
 
         else:
             print(f"Skipping Personal Details for Applicant ID: {applicant_id} because it doesn't have personal details")
-        
-        # Insert updated Work Experience records
-        if compressed_json_data["experience"] and work_experience_references:
-            work_experience_records = create_work_experience_records(
+
+        # Collect updated Work Experience records
+        if compressed_json_data["experience"]:
+            for work_experience_record in create_work_experience_records(
                 applicant_id=applicant_id,
                 experience_data=compressed_json_data["experience"],
                 work_experience_record_ids=work_experience_references,
                 applicant_record_id=applicant_record["id"]
-            )
-
-            i = 0
-            while i < len(work_experience_records):
-                j = min(i + 10, len(work_experience_records))
-                print(f"Upserting {len(work_experience_records[i:j])} work experience records in batch from index {i} to {j}")
-                upsert_records(
-                    table_id=TABLES["experience"],
-                    table_name="Work Experience",
-                    sanitized_records=work_experience_records[i:j]
-                )
-                i = j
+            ):
+                if "id" in work_experience_record:
+                    child_records["experience_updates"].append(work_experience_record)
+                else:
+                    child_records["experience_creates"].append(work_experience_record)
 
         else:
             print(f"Skipping Work Experience for Applicant ID: {applicant_id} because it doesn't have work experience")
 
-        # Insert updated Salary Preferences record
-        if compressed_json_data["salary"] and salary_preferences_reference:
-            salary_preferences_record = create_salary_preferences_record(
+        # Collect updated Salary Preferences record
+        if compressed_json_data["salary"]:
+            child_records["salary"].append(create_salary_preferences_record(
                 applicant_id=applicant_id,
                 salary_data=compressed_json_data["salary"],
-                salary_preferences_record_id=salary_preferences_reference[0],
+                salary_preferences_record_id=salary_preferences_reference[0] if salary_preferences_reference else None,
                 applicant_record_id=applicant_record["id"]
-            )
-
-            print(f"Upserting salary preferences record for {applicant_id}")
-            upsert_records(
-                table_id=TABLES["salary"],
-                table_name="Salary Preferences",
-                sanitized_records=[salary_preferences_record]
-            )
+            ))
 
         else:
             print(f"Skipping Salary Preferences for Applicant ID: {applicant_id} because it doesn't have salary preferences")
 
-        print(f"Completed processing applicant {i+1} of {len(applicants_records)}: {applicant_record['fields']['Applicant ID']}")
+        writer.add(applicant_record["id"], child_records)
+
+    # Write the remaining child records, keeping the journal when any batch failed
+    writer.close()
+
+    print("Decompressed JSON completed successfully!!!")
 
 
 if __name__ == "__main__":
@@ -1,77 +1,150 @@
-import json
-from openai import OpenAI
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import time
-from utils.config_loader import TABLES, OPENAI_API_KEY
-from utils.airtable_operations import fetch_records_from_table, sanitize_records, upsert_records
+from utils.config_loader import TABLES
+from utils.airtable_operations import iter_records_from_table, sanitize_records
+from utils.batch_writer import MAX_BATCH_SIZE, print_batch_report, write_records_in_batches
+from utils.compact_codec import decode_profile, to_plain_json
+from utils.run_journal import DEFAULT_FLUSH_SIZE, JournaledWriter, RunJournal, get_journal_path
+from utils.streaming import DEFAULT_QUEUE_SIZE, stream_in_background
+from utils.snapshot_store import SnapshotStore
+from utils.metrics import add_metrics_arguments, increment, start_metrics, timed
+from utils.llm_cache import DEFAULT_CACHE_PATH, LLMCache, build_cache_key
+from utils.openai_batch import (
+    DEFAULT_BATCH_INPUT_DIR,
+    DEFAULT_BATCH_STATE_PATH,
+    MAX_REQUESTS_PER_BATCH,
+    build_batch_request_line,
+    create_batch,
+    download_batch_output,
+    load_batch_state,
+    parse_batch_output,
+    save_batch_state,
+    upload_batch_input,
+    wait_for_batch,
+    write_batch_input,
+)
+from utils.openai_operations import (
+    MAX_TOKENS,
+    MODEL,
+    TEMPERATURE,
+    RateLimitBudget,
+    build_completion_options,
+    call_openai_api_async,
+    create_async_openai_client,
+    get_openai_client,
+    record_usage,
+)
+from utils.llm_output import (
+    BATCH_RESPONSE_FORMAT,
+    SINGLE_RESPONSE_FORMAT,
+    ParseMetrics,
+    parse_batch_response,
+    parse_evaluation_response,
+)
+from utils.prompt_builder import (
+    BATCH_MAX_TOKENS_PER_APPLICANT,
+    REASK_MAX_TOKENS,
+    build_batch_prompt,
+    build_reask_prompt,
+    build_single_prompt,
+    iter_prompt_batches,
+    render_profile,
+)
 
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Parse failures and re-asks of the current run
+parse_metrics = ParseMetrics()
+
+# Bump whenever the prompts in utils/prompt_builder.py or the response parsing change so cached results are not reused
+PROMPT_VERSION = 4
+
+# Only download already shortlisted applicants and the columns needed for evaluation
+APPLICANT_FIELDS = ["Applicant ID", "Compressed JSON", "Shortlist Status"]
+EVALUATION_APPLICANTS_FORMULA = "AND({Compressed JSON} != '', NOT(OR({Shortlist Status} = 'Waiting', {Shortlist Status} = 'Invalid')))"
 
 
 def build_validation_prompt(compressed_json):
     """
     Build a validation prompt for the applicant.
     """
-    return f"""
-    You are a recruiting analyst. Given this JSON applicant profile, do four things:
-    1. Provide a concise 75-word summary.
-    2. Rate overall candidate quality from 1-10 (higher is better).
-    3. List any data gaps or inconsistencies you notice.
-    4. Suggest up to three follow-up questions to clarify gaps.
-
-    Return exactly in the following format:
-    Summary: <text>
-    Score: <integer>
-    Issues: <comma-separated list or 'None'>
-    Follow-Ups: <bullet list>
-
-    JSON:
-    {compressed_json}
-    """
+    return build_single_prompt(render_profile(compressed_json))
 
 
-def call_openai_api(prompt, retries=3):
+@timed("openai.call_openai_api")
+def call_openai_api(prompt, retries=3, max_tokens=MAX_TOKENS, response_format=None):
     """
     Call the OpenAI API to get a response for the prompt.
     """
     for i in range(retries):
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
-                temperature=0.3
-            )
+            response = get_openai_client().chat.completions.create(**build_completion_options(prompt, max_tokens, response_format))
+            record_usage(response)
             return response.choices[0].message.content
 
         except Exception as ex:
             print(f"OpenAI API error: {ex}")
+            increment("openai.errors")
             time.sleep(2 ** i)
 
     return None
 
 
-def parse_llm_response(response):
+def parse_llm_response(response, reask=False):
     """
-    Parse the response from the OpenAI API.
+    Parse the response from the OpenAI API, or return None when it matches neither the JSON schema nor the text format.
     """
-    llm_result = {"LLM Summary": "", "LLM Score": 0, "LLM Follow-Ups": ""}
-    try:
-        lines = response.splitlines()
-        for line in lines:
-            if line.startswith("Summary:"):
-                llm_result["LLM Summary"] = line[len("Summary:"):].strip()
-            elif line.startswith("Score:"):
-                llm_result["LLM Score"] = int(line[len("Score:"):].strip())
-            elif line.startswith("Follow-Ups:"):
-                llm_result["LLM Follow-Ups"] = "\n".join(lines[lines.index(line)+1:]).strip()
-
-    except Exception as ex:
-        print(f"Failed to parse response: {ex}")
-
+    llm_result = parse_evaluation_response(response)
+    parse_metrics.record(llm_result, reask)
     return llm_result
 
 
+def reask_evaluation(response):
+    """
+    Ask once for an unparseable answer to be reformatted, without resending the profile.
+    Return (response, llm_result), with None as result when the re-ask did not help either.
+    """
+    response = call_openai_api(build_reask_prompt(response), max_tokens=REASK_MAX_TOKENS, response_format=SINGLE_RESPONSE_FORMAT)
+    return response, parse_llm_response(response, reask=True) if response else None
+
+
+def request_evaluation(rendered_profile):
+    """
+    Evaluate one applicant from its rendered profile, re-asking once for a reformatted answer when the response cannot be parsed.
+    Return (response, llm_result), with None as result when no usable answer was received.
+    """
+    response = call_openai_api(build_single_prompt(rendered_profile), response_format=SINGLE_RESPONSE_FORMAT)
+    if not response:
+        return None, None
+
+    llm_result = parse_llm_response(response)
+    if llm_result is None:
+        return reask_evaluation(response)
+    return response, llm_result
+
+
+async def request_evaluation_async(async_client, rendered_profile, budget):
+    """
+    Evaluate one applicant asynchronously, re-asking once like request_evaluation.
+    """
+    response = await call_openai_api_async(
+        async_client, build_single_prompt(rendered_profile), budget, response_format=SINGLE_RESPONSE_FORMAT
+    )
+    if not response:
+        return None, None
+
+    llm_result = parse_llm_response(response)
+    if llm_result is None:
+        response = await call_openai_api_async(
+            async_client, build_reask_prompt(response), budget, max_tokens=REASK_MAX_TOKENS, response_format=SINGLE_RESPONSE_FORMAT
+        )
+        llm_result = parse_llm_response(response, reask=True) if response else None
+    return response, llm_result
+
+
 def create_updated_applicant_record(applicant_id, llm_result, applicant_record_id):
     """
     Create an updated applicant record.
@@ -88,21 +161,26 @@ def create_updated_applicant_record(applicant_id, llm_result, applicant_record_i
     return updated_applicant_record
 
 
-def main():
+def iter_pending_applicants(store=None):
     """
-    Process applicants records to get shortlisted leads and update applicants records.
+    Yield (applicant_id, compressed_json, applicant_record_id) for applicants ready for evaluation.
+    Applicants are read from the snapshot store when one is given.
     """
-    final_applicants_records = []
-
-    # Fetch applicants records and process them one by one
-    applicants_records = fetch_records_from_table(TABLES["applicants"])
+    if store is not None:
+        applicants_records = store.iter_records("applicants", fields=APPLICANT_FIELDS)
+    else:
+        applicants_records = iter_records_from_table(
+            TABLES["applicants"],
+            fields=APPLICANT_FIELDS,
+            filter_by_formula=EVALUATION_APPLICANTS_FORMULA
+        )
     for i, applicant_record in enumerate(applicants_records):
-        print(f"Processing applicant {i+1} of {len(applicants_records)}: {applicant_record['fields']['Applicant ID']}")
-
         applicant_fields = applicant_record.get("fields", {})
-        applicant_id = applicant_fields["Applicant ID"]
-        compressed_json = applicant_fields["Compressed JSON"]
-        shortlist_status = applicant_fields["Shortlist Status"]
+        applicant_id = applicant_fields.get("Applicant ID")
+        compressed_json = applicant_fields.get("Compressed JSON")
+        shortlist_status = applicant_fields.get("Shortlist Status")
+
+        print(f"Processing applicant {i+1}: {applicant_id}")
 
         if not compressed_json or not applicant_id:
             print(f"Skipping {applicant_id} because it doesn't have applicant ID or compressed JSON")
@@ -113,39 +191,430 @@ def main():
             continue
 
         try:
-            compressed_json_data = json.loads(compressed_json)
+            decode_profile(compressed_json)
         except Exception as ex:
             print(f"Skipping invalid JSON for {applicant_id}: {ex}")
             continue
 
-        prompt = build_validation_prompt(compressed_json)
-        response = call_openai_api(prompt)
+        # Compact values are expanded so the LLM always sees plain JSON
+        yield applicant_id, to_plain_json(compressed_json), applicant_record["id"]
+
+
+def lookup_cached_llm_result(cache, applicant_id, compressed_json):
+    """
+    Return the cache key and cached LLM result for a compressed JSON, or None as result on a miss.
+    """
+    if cache is None:
+        return None, None
+
+    cache_key = build_cache_key(PROMPT_VERSION, MODEL, TEMPERATURE, compressed_json)
+    cached = cache.get(cache_key)
+    if cached is None:
+        return cache_key, None
+
+    print(f"Using cached evaluation for {applicant_id}")
+    return cache_key, cached[1]
+
+
+def iter_uncached_applicants(pending_applicants, cache, final_applicants_records):
+    """
+    Yield (applicant_id, compressed_json, applicant_record_id, cache_key) for applicants without a cached evaluation.
+    Records of cached evaluations are appended to final_applicants_records directly.
+    """
+    for applicant_id, compressed_json, applicant_record_id in pending_applicants:
+        cache_key, llm_result = lookup_cached_llm_result(cache, applicant_id, compressed_json)
+        if llm_result is None:
+            yield applicant_id, compressed_json, applicant_record_id, cache_key
+            continue
+
+        final_applicants_records.append(create_updated_applicant_record(
+            applicant_id=applicant_id,
+            llm_result=llm_result,
+            applicant_record_id=applicant_record_id
+        ))
+
+
+def build_batch_request(batch):
+    """
+    Build the prompt and completion size of a batched request, or None as prompt for a single applicant.
+    """
+    if len(batch) < 2:
+        return None, 0
+    prompt = build_batch_prompt([(applicant[0], rendered_profile) for rendered_profile, applicant in batch])
+    return prompt, BATCH_MAX_TOKENS_PER_APPLICANT * len(batch)
+
+
+def parse_batch_llm_results(batch, response):
+    """
+    Parse the batched response of a batch, reporting the applicants that fall back to single prompts.
+    """
+    llm_results = {}
+    if response:
+        llm_results = parse_batch_response(response, [applicant[0] for _, applicant in batch])
+        for _, applicant in batch:
+            parse_metrics.record(llm_results.get(applicant[0]))
+    if len(llm_results) < len(batch):
+        print(f"Falling back to single prompts for {len(batch) - len(llm_results)} of {len(batch)} batched applicants")
+    return llm_results
+
+
+def record_llm_result(applicant, response, llm_result, cache, final_applicants_records):
+    """
+    Cache an evaluation and record the updated applicant.
+    """
+    applicant_id, _, applicant_record_id, cache_key = applicant
+    if cache is not None:
+        cache.put(cache_key, response, llm_result)
+    final_applicants_records.append(create_updated_applicant_record(
+        applicant_id=applicant_id,
+        llm_result=llm_result,
+        applicant_record_id=applicant_record_id
+    ))
+    print(f"Evaluated {applicant_id} with score {llm_result['LLM Score']}")
+
+
+def evaluate_applicants(pending_applicants, cache=None, batch_size=1, results=None):
+    """
+    Evaluate applicants with the synchronous OpenAI client.
+    With a batch size above 1 several applicants share one structured prompt, falling back to single prompts
+    for applicants whose batched result is missing or invalid.
+    Updated records are appended to results when given, e.g. a JournaledWriter writing them during the run.
+    """
+    final_applicants_records = [] if results is None else results
+    uncached_applicants = iter_uncached_applicants(pending_applicants, cache, final_applicants_records)
+    for batch in iter_prompt_batches(uncached_applicants, batch_size):
+        llm_results = {}
+        prompt, max_tokens = build_batch_request(batch)
+        if prompt is not None:
+            response = call_openai_api(prompt, max_tokens=max_tokens, response_format=BATCH_RESPONSE_FORMAT)
+            llm_results = parse_batch_llm_results(batch, response)
+
+        for rendered_profile, applicant in batch:
+            applicant_id = applicant[0]
+            if applicant_id in llm_results:
+                response, llm_result = llm_results[applicant_id]
+            else:
+                response, llm_result = request_evaluation(rendered_profile)
+                if llm_result is None:
+                    print(f"Skipping {applicant_id} because no usable response from OpenAI API")
+                    continue
+            record_llm_result(applicant, response, llm_result, cache, final_applicants_records)
+
+    return final_applicants_records
+
+
+async def evaluate_applicants_async(pending_applicants, concurrency, cache=None, batch_size=1, results=None):
+    """
+    Evaluate applicants concurrently with the async OpenAI client.
+    At most `concurrency` requests are in flight and results are collected in completion order.
+    Batches and results are handled as in evaluate_applicants.
+    Fetching applicants, cache lookups and recording results block on Airtable, SQLite and the journal, so they run
+    on one thread outside the event loop, which also keeps the cache and results from being used concurrently.
+    """
+    loop = asyncio.get_running_loop()
+    blocking_executor = ThreadPoolExecutor(max_workers=1)
+    async_client = create_async_openai_client()
+    budget = RateLimitBudget()
+    queue = asyncio.Queue(maxsize=concurrency)
+    final_applicants_records = [] if results is None else results
+
+    async def worker():
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                queue.task_done()
+                return
+
+            try:
+                llm_results = {}
+                prompt, max_tokens = build_batch_request(batch)
+                if prompt is not None:
+                    response = await call_openai_api_async(
+                        async_client, prompt, budget, max_tokens=max_tokens, response_format=BATCH_RESPONSE_FORMAT
+                    )
+                    llm_results = parse_batch_llm_results(batch, response)
+
+                for rendered_profile, applicant in batch:
+                    applicant_id = applicant[0]
+                    if applicant_id in llm_results:
+                        response, llm_result = llm_results[applicant_id]
+                    else:
+                        response, llm_result = await request_evaluation_async(async_client, rendered_profile, budget)
+                        if llm_result is None:
+                            print(f"Skipping {applicant_id} because no usable response from OpenAI API")
+                            continue
+                    await loop.run_in_executor(
+                        blocking_executor, record_llm_result, applicant, response, llm_result, cache, final_applicants_records
+                    )
+            finally:
+                queue.task_done()
+
+    async def produce():
+        uncached_applicants = iter_uncached_applicants(pending_applicants, cache, final_applicants_records)
+        batches = iter_prompt_batches(uncached_applicants, batch_size)
+        while True:
+            batch = await loop.run_in_executor(blocking_executor, next, batches, None)
+            if batch is None:
+                break
+            await queue.put(batch)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    # Waited on together, so a failing worker stops the run instead of leaving the producer blocked on a full queue
+    tasks = [asyncio.create_task(produce()), *(asyncio.create_task(worker()) for _ in range(concurrency))]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in tasks:
+            if task in done and task.exception() is not None:
+                raise task.exception()
+    finally:
+        # A fetch still running after a failure is not waited for, its result is dropped
+        blocking_executor.shutdown(wait=False, cancel_futures=True)
+        await async_client.close()
+    return final_applicants_records
+
+
+def queue_batch_jobs(pending_applicants, cache, state, state_path, final_applicants_records):
+    """
+    Write uncached pending applicants to Batch API input files, recording each file as a job in the state.
+    """
+    uncached_applicants = iter_uncached_applicants(pending_applicants, cache, final_applicants_records)
+    chunk = list(islice(uncached_applicants, MAX_REQUESTS_PER_BATCH))
+    while chunk:
+        input_path = os.path.join(DEFAULT_BATCH_INPUT_DIR, f"batch_{int(time.time())}_{len(state['jobs'])}.jsonl")
+        write_batch_input(input_path, [
+            build_batch_request_line(applicant_record_id, build_validation_prompt(compressed_json), SINGLE_RESPONSE_FORMAT)
+            for _, compressed_json, applicant_record_id, _ in chunk
+        ])
+        state["jobs"].append({
+            "input_path": input_path,
+            "input_file_id": None,
+            "batch_id": None,
+            "applicants": {
+                applicant_record_id: [applicant_id, cache_key]
+                for applicant_id, _, applicant_record_id, cache_key in chunk
+            },
+        })
+        save_batch_state(state, state_path)
+        print(f"Queued {len(chunk)} applicants in {input_path}")
+        chunk = list(islice(uncached_applicants, MAX_REQUESTS_PER_BATCH))
+
+
+def submit_batch_jobs(state, state_path):
+    """
+    Upload and create every job not submitted yet, persisting each id as soon as it is known.
+    """
+    for job in state["jobs"]:
+        if job["input_file_id"] is None:
+            job["input_file_id"] = upload_batch_input(get_openai_client(), job["input_path"])
+            save_batch_state(state, state_path)
+        if job["batch_id"] is None:
+            job["batch_id"] = create_batch(get_openai_client(), job["input_file_id"])
+            save_batch_state(state, state_path)
+            print(f"Submitted batch {job['batch_id']} with {len(job['applicants'])} applicants")
+
+
+def map_batch_results(applicants, batch_results, cache=None):
+    """
+    Map Batch API results keyed on applicant record ids back to updated applicant records.
+    Applicants without a successful result are skipped and picked up again by the next run.
+    """
+    final_applicants_records = []
+    for applicant_record_id, (applicant_id, cache_key) in applicants.items():
+        response = batch_results.get(applicant_record_id)
         if not response:
-            print(f"Skipping {applicant_id} because no response from OpenAI API")
+            print(f"Skipping {applicant_id} because the batch returned no response")
             continue
 
         llm_result = parse_llm_response(response)
-        updated_applicant_record = create_updated_applicant_record(
+        if llm_result is None:
+            response, llm_result = reask_evaluation(response)
+        if llm_result is None:
+            print(f"Skipping {applicant_id} because its batch response could not be parsed")
+            continue
+
+        if cache is not None and cache_key is not None:
+            cache.put(cache_key, response, llm_result)
+        final_applicants_records.append(create_updated_applicant_record(
             applicant_id=applicant_id,
             llm_result=llm_result,
-            applicant_record_id=applicant_record["id"]
-        )
-        final_applicants_records.append(updated_applicant_record)
+            applicant_record_id=applicant_record_id
+        ))
+    return final_applicants_records
 
-    # Upsert final applicants records
+
+def collect_batch_jobs(state, state_path, poll_interval, cache=None, store=None):
+    """
+    Wait for every submitted job, write its results to Airtable and drop it from the state once written.
+    Jobs whose write partly failed stay in the state so the next run retries them.
+    """
+    for job in list(state["jobs"]):
+        batch = wait_for_batch(get_openai_client(), job["batch_id"], poll_interval)
+        print(f"Batch {job['batch_id']} finished with status {batch.status}")
+
+        batch_results = parse_batch_output(download_batch_output(get_openai_client(), batch))
+        report = write_evaluated_applicants(map_batch_results(job["applicants"], batch_results, cache), store)
+        if report["failed_batches"]:
+            continue
+
+        state["jobs"].remove(job)
+        save_batch_state(state, state_path)
+        if os.path.exists(job["input_path"]):
+            os.remove(job["input_path"])
+
+
+def write_evaluated_applicants(final_applicants_records, store=None):
+    """
+    Upsert evaluated applicants and mirror the written records into the snapshot store.
+    """
     sanitized_final_applicants_records = sanitize_records(final_applicants_records)
-    i = 0
-    while i < len(sanitized_final_applicants_records):
-        j = min(i + 10, len(sanitized_final_applicants_records))
-        print(f"Creating {len(sanitized_final_applicants_records[i:j])} new applicants records in batch from index {i} to {j}")
-        upsert_records(
-            table_id=TABLES["applicants"],
-            table_name="Applicants",
-            sanitized_records=sanitized_final_applicants_records[i:j],
-            use_post=False
-        )
-        i = j
+    report = write_records_in_batches(
+        table_id=TABLES["applicants"],
+        table_name="Applicants",
+        records=sanitized_final_applicants_records
+    )
+    print_batch_report(report)
+
+    if store is not None:
+        upserted_record_ids = set(report["upserted_record_ids"])
+        store.apply_updates("applicants", [record for record in sanitized_final_applicants_records if record["id"] in upserted_record_ids])
+    return report
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Evaluate shortlisted applicants with an LLM.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of concurrent OpenAI requests. Values above 1 use the async client."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the OpenAI API instead of reusing cached evaluations."
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=DEFAULT_CACHE_PATH,
+        help="SQLite file holding cached evaluations."
+    )
+    parser.add_argument(
+        "--snapshot",
+        metavar="PATH",
+        help="Read applicants from a local snapshot created by sync_snapshot.py instead of Airtable."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Number of applicants evaluated per structured prompt. Failed batch results fall back to single prompts."
+    )
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Evaluate through the OpenAI Batch API at half the cost. Unfinished jobs of a previous run are resumed first."
+    )
+    parser.add_argument(
+        "--batch-state-path",
+        default=DEFAULT_BATCH_STATE_PATH,
+        help="JSON file holding the submitted Batch API jobs."
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        default=60,
+        help="Seconds between Batch API status checks."
+    )
+    parser.add_argument(
+        "--no-wait",
+        action="store_true",
+        help="With --batch-api, exit after submitting instead of waiting for the results."
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Discard the journal of an interrupted run instead of resuming it."
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Overlap fetching, evaluating and writing through bounded queues instead of running them one after another."
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help="Maximum number of fetched applicants waiting to be evaluated in streaming mode."
+    )
+    add_metrics_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """
+    Process applicants records to get shortlisted leads and update applicants records.
+    """
+    args = parse_args()
+    start_metrics("evaluate_applicants", args)
+
+    cache = None if args.no_cache else LLMCache(args.cache_path)
+
+    store = SnapshotStore(args.snapshot) if args.snapshot else None
+
+    pending_applicants = iter_pending_applicants(store)
+    try:
+        if args.batch_api:
+            state = load_batch_state(args.batch_state_path)
+            final_applicants_records = []
+            if state["jobs"]:
+                print(f"Resuming {len(state['jobs'])} unfinished batch jobs")
+            else:
+                queue_batch_jobs(pending_applicants, cache, state, args.batch_state_path, final_applicants_records)
+            submit_batch_jobs(state, args.batch_state_path)
+
+            # Cached evaluations do not need the batch
+            if final_applicants_records:
+                write_evaluated_applicants(final_applicants_records, store)
+            if args.no_wait:
+                print(f"Submitted {len(state['jobs'])} batch jobs, re-run with --batch-api to collect the results")
+            else:
+                collect_batch_jobs(state, args.batch_state_path, args.poll_interval, cache, store)
+        else:
+            # Results are journaled and written in batches as they come in, so a restart skips evaluated applicants.
+            # Concurrent workers record results on one helper thread, which hands the writes to the background
+            # instead of waiting for Airtable while they and the fetching of applicants queue up behind it.
+            journal = RunJournal(get_journal_path("evaluate_applicants"), resume=not args.no_resume)
+            final_applicants_records = JournaledWriter(
+                journal,
+                {"applicants": {"table_id": TABLES["applicants"], "table_name": "Applicants"}},
+                flush_size=MAX_BATCH_SIZE if args.stream else DEFAULT_FLUSH_SIZE,
+                on_flushed=None if store is None else lambda _, records: store.apply_updates("applicants", records),
+                background=args.stream or args.concurrency > 1
+            )
+            # The snapshot connection must not be used by two threads at once, so only Airtable fetches move to the background
+            if args.stream and store is None:
+                pending_applicants = stream_in_background(pending_applicants, args.queue_size)
+            pending_applicants = (applicant for applicant in pending_applicants if not journal.has_result(applicant[2]))
+
+            if args.concurrency > 1:
+                asyncio.run(evaluate_applicants_async(pending_applicants, args.concurrency, cache, args.batch_size, final_applicants_records))
+            else:
+                evaluate_applicants(pending_applicants, cache, args.batch_size, final_applicants_records)
+            final_applicants_records.close()
+    finally:
+        if cache is not None:
+            cache.close()
+        if store is not None:
+            store.close()
 
+    parse_metrics.report()
     print("Applicants evaluation completed successfully!!!")
 
 
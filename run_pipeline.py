@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import time
+from utils.config_loader import TABLES
+from utils.airtable_operations import iter_records_from_table
+from utils.batch_writer import print_batch_report, write_records_in_batches
+from utils.llm_cache import DEFAULT_CACHE_PATH, LLMCache
+from utils.compact_codec import decode_profile, encode_profile, to_plain_json
+from utils.metrics import add_metrics_arguments, metrics, start_metrics
+from utils.models import Applicant, Profile
+from utils.snapshot_store import SnapshotStore
+from compress_json import (
+    EXPERIENCE_FIELDS,
+    PERSONAL_FIELDS,
+    SALARY_FIELDS,
+    build_child_indexes,
+    build_compressed_json,
+    fetch_child_records,
+    print_join_report,
+)
+from shortlist_leads import LEAD_MERGE_FIELDS, create_shortlisted_lead_record, get_shortlist_status, verify_shortlist_criteria_batch
+from evaluate_applicants import evaluate_applicants, evaluate_applicants_async, parse_metrics
+
+
+STAGES = ["compress", "shortlist", "evaluate"]
+
+# Union of the applicant columns read by every stage
+APPLICANT_FIELDS = ["Applicant ID", "Compressed JSON", "Shortlist Status"]
+
+UNPROCESSED_STATUSES = ["Waiting", "Invalid"]
+
+
+def load_applicants(store=None, filter_by_formula=None):
+    """
+    Load applicants as compact in-memory objects carrying their profile and pending field updates.
+    With a formula only the matching applicants are loaded from Airtable.
+    """
+    if store is not None:
+        applicants_records = store.iter_records("applicants", fields=APPLICANT_FIELDS)
+    else:
+        applicants_records = iter_records_from_table(TABLES["applicants"], fields=APPLICANT_FIELDS, filter_by_formula=filter_by_formula)
+
+    applicants = []
+    for applicant_record in applicants_records:
+        applicant_fields = applicant_record.get("fields", {})
+        if not applicant_fields.get("Applicant ID"):
+            print(f"Skipping {applicant_record['id']} because it doesn't have applicant ID")
+            continue
+
+        applicants.append(Applicant(
+            record_id=applicant_record["id"],
+            applicant_id=applicant_fields["Applicant ID"],
+            shortlist_status=applicant_fields.get("Shortlist Status"),
+            compressed_json=applicant_fields.get("Compressed JSON")
+        ))
+    return applicants
+
+
+def get_profile(applicant):
+    """
+    Get the parsed profile of an applicant, parsing the stored compressed JSON at most once.
+    """
+    if applicant.profile is None and applicant.compressed_json:
+        try:
+            applicant.profile = Profile.from_dict(decode_profile(applicant.compressed_json))
+        except Exception as ex:
+            print(f"Skipping invalid JSON for {applicant.applicant_id}: {ex}")
+    return applicant.profile
+
+
+def run_compress_stage(applicants, store=None, compact=False, filter_by_formula=None):
+    """
+    Build the compressed JSON of every applicant from the child tables.
+    With a formula only the matching child records are fetched from Airtable.
+    """
+    if store is not None:
+        child_records = (
+            list(store.iter_records("experience", fields=EXPERIENCE_FIELDS)),
+            list(store.iter_records("personal", fields=PERSONAL_FIELDS)),
+            list(store.iter_records("salary", fields=SALARY_FIELDS)),
+        )
+    else:
+        child_records = fetch_child_records(filter_by_formula)
+
+    indexes, join_report = build_child_indexes(*child_records)
+    applicant_ids = set()
+    for applicant in applicants:
+        applicant_ids.add(applicant.applicant_id)
+        profile = build_compressed_json(
+            {"fields": {"Applicant ID": applicant.applicant_id}},
+            indexes["experience"],
+            indexes["personal"],
+            indexes["salary"]
+        )
+        compressed_json = encode_profile(profile, compact=compact)
+        applicant.profile = Profile.from_dict(profile)
+        if compressed_json != applicant.compressed_json:
+            applicant.compressed_json = compressed_json
+            applicant.patch.fields["Compressed JSON"] = compressed_json
+
+    print_join_report(indexes, join_report, applicant_ids)
+
+
+def run_shortlist_stage(applicants):
+    """
+    Shortlist unprocessed applicants in one batch and return the shortlisted leads to create.
+    """
+    pending_applicants = [
+        applicant for applicant in applicants
+        if applicant.shortlist_status in UNPROCESSED_STATUSES and get_profile(applicant) is not None
+    ]
+    shortlist_results = verify_shortlist_criteria_batch([applicant.profile.to_dict() for applicant in pending_applicants])
+
+    shortlisted_leads = []
+    for applicant, (is_shortlisted, reason) in zip(pending_applicants, shortlist_results):
+        applicant.shortlist_status = get_shortlist_status(is_shortlisted, reason)
+        applicant.patch.fields["Shortlist Status"] = applicant.shortlist_status
+        if is_shortlisted:
+            shortlisted_leads.append(create_shortlisted_lead_record(
+                applicant_id=applicant.applicant_id,
+                compressed_json=applicant.compressed_json,
+                score_reason=reason,
+                applicant_record_id=applicant.record_id
+            ))
+
+    print(f"Shortlisted {len(shortlisted_leads)} of {len(pending_applicants)} unprocessed applicants")
+    return shortlisted_leads
+
+
+def run_evaluate_stage(applicants, concurrency, cache, batch_size=1):
+    """
+    Evaluate processed applicants with the LLM and record the results as field updates.
+    """
+    applicants_by_record_id = {}
+    pending_applicants = []
+    for applicant in applicants:
+        if applicant.shortlist_status in UNPROCESSED_STATUSES or get_profile(applicant) is None:
+            continue
+        applicants_by_record_id[applicant.record_id] = applicant
+        pending_applicants.append((applicant.applicant_id, to_plain_json(applicant.compressed_json), applicant.record_id))
+
+    if concurrency > 1:
+        evaluated_records = asyncio.run(evaluate_applicants_async(pending_applicants, concurrency, cache, batch_size))
+    else:
+        evaluated_records = evaluate_applicants(pending_applicants, cache, batch_size)
+
+    for evaluated_record in evaluated_records:
+        llm_fields = {field: value for field, value in evaluated_record["fields"].items() if field != "Applicant ID"}
+        applicants_by_record_id[evaluated_record["id"]].patch.fields.update(llm_fields)
+
+    print(f"Evaluated {len(evaluated_records)} of {len(pending_applicants)} processed applicants")
+    parse_metrics.report()
+
+
+def write_back(applicants, shortlisted_leads, store=None):
+    """
+    Write every stage's changes back to Airtable in one batched write per table, leads first.
+    Applicants whose lead was not written keep their previous Shortlist Status, so the next run shortlists them again.
+    Leads are upserted on Applicant ID, so shortlisting an applicant again updates its lead.
+    Returns the record IDs of applicants whose lead or changes were not written.
+    """
+    report = write_records_in_batches(
+        table_id=TABLES["shortlisted"],
+        table_name="Shortlisted Leads",
+        records=shortlisted_leads,
+        fields_to_merge_on=LEAD_MERGE_FIELDS
+    )
+    print_batch_report(report)
+
+    # Leads are upserted without an id, so failed ones are reported by Applicant ID
+    failed_lead_applicant_ids = set(report["failed_record_ids"])
+    failed_record_ids = set()
+    for applicant in applicants:
+        if applicant.applicant_id in failed_lead_applicant_ids:
+            applicant.patch.fields.pop("Shortlist Status", None)
+            failed_record_ids.add(applicant.record_id)
+
+    applicants_records = [applicant.patch.to_record() for applicant in applicants if applicant.patch.fields]
+    report = write_records_in_batches(
+        table_id=TABLES["applicants"],
+        table_name="Applicants",
+        records=applicants_records
+    )
+    print_batch_report(report)
+    failed_record_ids.update(report["failed_record_ids"])
+
+    if store is not None:
+        upserted_record_ids = set(report["upserted_record_ids"])
+        store.apply_updates("applicants", [record for record in applicants_records if record["id"] in upserted_record_ids])
+
+    return failed_record_ids
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Run compress, shortlist and evaluate stages in a single process.")
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=f"Comma separated stages to run, in pipeline order. Default: {','.join(STAGES)}"
+    )
+    parser.add_argument(
+        "--snapshot",
+        metavar="PATH",
+        help="Read records from a local snapshot created by sync_snapshot.py instead of Airtable."
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write Compressed JSON in the versioned compact format instead of plain JSON."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of concurrent OpenAI requests in the evaluate stage."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Number of applicants evaluated per structured prompt in the evaluate stage."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the OpenAI API instead of reusing cached evaluations."
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=DEFAULT_CACHE_PATH,
+        help="SQLite file holding cached evaluations."
+    )
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown_stages = set(stages) - set(STAGES)
+    if unknown_stages:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown_stages))}")
+    args.stages = [stage for stage in STAGES if stage in stages]
+    return args
+
+
+def main():
+    """
+    Run the selected pipeline stages on in-memory applicants and write back once at the end.
+    """
+    args = parse_args()
+    start_metrics("run_pipeline", args)
+    store = SnapshotStore(args.snapshot) if args.snapshot else None
+    cache = None if args.no_cache or "evaluate" not in args.stages else LLMCache(args.cache_path)
+    timings = {}
+
+    try:
+        started_at = time.perf_counter()
+        applicants = load_applicants(store)
+        timings["load"] = time.perf_counter() - started_at
+        print(f"Loaded {len(applicants)} applicants")
+
+        shortlisted_leads = []
+        for stage in args.stages:
+            print(f"Running {stage} stage")
+            started_at = time.perf_counter()
+            if stage == "compress":
+                run_compress_stage(applicants, store, args.compact)
+            elif stage == "shortlist":
+                shortlisted_leads = run_shortlist_stage(applicants)
+            elif stage == "evaluate":
+                run_evaluate_stage(applicants, args.concurrency, cache, args.batch_size)
+            timings[stage] = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        write_back(applicants, shortlisted_leads, store)
+        timings["write"] = time.perf_counter() - started_at
+
+    finally:
+        if cache is not None:
+            cache.close()
+        if store is not None:
+            store.close()
+
+    for stage, seconds in timings.items():
+        print(f"Stage {stage} took {seconds:.2f}s")
+        if metrics.enabled:
+            metrics.observe(f"stage.{stage}", seconds)
+
+    print("Pipeline completed successfully!!!")
+
+
+if __name__ == "__main__":
+    main()
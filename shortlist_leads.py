@@ -1,88 +1,76 @@
-from copy import deepcopy
-import json
-from datetime import datetime
+import argparse
 from utils.config_loader import TABLES
-from utils.airtable_operations import fetch_records_from_table, sanitize_records, upsert_records
+from utils.airtable_operations import MAX_BATCH_SIZE, iter_records_from_table
+from utils.compact_codec import decode_profile
+from utils.metrics import add_metrics_arguments, start_metrics, timed
+from utils.models import RecordPatch
+from utils.parallel import DEFAULT_CHUNK_SIZE, map_chunks_in_processes
+from utils.run_journal import DEFAULT_FLUSH_SIZE, JournaledWriter, RunJournal, get_journal_path
+from utils.snapshot_store import SnapshotStore
+from utils.rule_engine import RuleEngine, format_rule_results
+from utils.streaming import DEFAULT_QUEUE_SIZE, STREAM_CHUNK_SIZE, iter_chunks, stream_in_background
 
 
-TIER_1_COMPANIES = {
-    "Google", "Meta", "OpenAI", "Amazon", "Microsoft", "Netflix",
-    "Apple", "Tesla", "Uber", "Airbnb", "Stripe", "Salesforce", "LinkedIn"
-}
-ALLOWED_LOCATIONS = {"US", "Canada", "UK", "Germany", "India"}
+# Shortlist rules are loaded from shortlist_rules.json and reloaded when the file changes
+RULE_ENGINE = RuleEngine()
 
+MISSING_FIELDS_REASON = "Missing required fields"
 
-def verify_shortlist_criteria(applicant_id, compressed_json):
+# Leads are upserted on Applicant ID, so replaying a journal or shortlisting an applicant again keeps a single lead
+LEAD_MERGE_FIELDS = ["Applicant ID"]
+
+# Only download unprocessed applicants and the columns needed for shortlisting
+APPLICANT_FIELDS = ["Applicant ID", "Compressed JSON", "Shortlist Status"]
+PENDING_APPLICANTS_FORMULA = "OR({Shortlist Status} = 'Waiting', {Shortlist Status} = 'Invalid')"
+
+
+@timed("shortlist.verify_shortlist_criteria")
+def verify_shortlist_criteria(applicant_id, compressed_json, rules=None):
     """
     Verify if the applicant meets the shortlist criteria.
+    The reason lists the pass or fail explanation of every rule.
     """
-    # Experience check
-    work_experiences = compressed_json.get("experience", [])
-    salary_preferences = compressed_json.get("salary", {})
-    personal_details = compressed_json.get("personal", {})
+    rules = rules or RULE_ENGINE.get_rules()
+    facts = rules["extract_facts"](compressed_json)
+    if facts is None:
+        return False, MISSING_FIELDS_REASON
 
-    if not work_experiences or not salary_preferences or not personal_details:
-        return False, "Missing required fields"
+    rule_results = [(name, *rule(facts)) for name, rule in rules["rules"]]
+    is_shortlisted = all(passed for _, passed, _ in rule_results)
+    return is_shortlisted, format_rule_results(rule_results)
 
-    # Initialize criteria
-    meets_experience_criteria = False
-    meets_compensation_criteria = False
-    meets_location_criteria = False
 
-    # Verify if applicant meets experience criteria
-    total_years = 0
-    is_from_tier1 = False
-    has_4_yoe = False
-    for experience in work_experiences:
-        start = experience["start"]
-        end = experience["end"]
-        company = experience["company"]
+@timed("shortlist.verify_shortlist_criteria_batch")
+def verify_shortlist_criteria_batch(compressed_jsons, rules=None):
+    """
+    Verify the shortlist criteria for many applicants at once.
+    Facts are loaded into typed columns and each rule computes a pass mask for the whole population in one pass.
+    Returns (is_shortlisted, reason) per applicant, identical to verify_shortlist_criteria.
+    """
+    rules = rules or RULE_ENGINE.get_rules()
+    results = [(False, MISSING_FIELDS_REASON)] * len(compressed_jsons)
 
-        if company.lower() in {company.lower() for company in TIER_1_COMPANIES}:
-            is_from_tier1 = True
+    # Only complete profiles get a row
+    columns = rules["extract_columns"](compressed_jsons)
+    rule_columns = [(name, *rule(columns)) for name, rule in rules["column_rules"]]
+    shortlisted_mask = [all(passed) for passed in zip(*(mask for _, mask, _ in rule_columns))]
 
-        try:
-            delta = (datetime.strptime(end, "%Y-%m-%d") - datetime.strptime(start, "%Y-%m-%d")).days
-            total_years += delta / 365.0
-            if total_years >= 4:
-                has_4_yoe = True
-        except Exception:
-            continue
+    for row, index in enumerate(columns["indices"]):
+        rule_results = [(name, mask[row], explanations[row]) for name, mask, explanations in rule_columns]
+        results[index] = (shortlisted_mask[row], format_rule_results(rule_results))
 
-    # Convert currency to USD for comparison
-    currency = salary_preferences.get("currency", "")
-    if currency == "EUR":
-        rate_in_usd = round(salary_preferences["rate"] * 1.15, 2)
-    elif currency == "USD":
-        rate_in_usd = round(salary_preferences["rate"], 2)
-    elif currency == "INR":
-        rate_in_usd = round(salary_preferences["rate"] * 0.012, 2)
-    else:
-        # Default to USD if currency is not recognized
-        rate_in_usd = round(salary_preferences["rate"], 2)
-
-    # Verify if applicant meets all criteria
-    meets_experience_criteria = is_from_tier1 or has_4_yoe
-    meets_compensation_criteria = int(rate_in_usd) <= 100 and int(salary_preferences.get("availability", 0)) >= 20
-    meets_location_criteria = personal_details.get("location", "").lower() in {location.lower() for location in ALLOWED_LOCATIONS}
-
-    if meets_experience_criteria and meets_compensation_criteria and meets_location_criteria:
-        if is_from_tier1:
-            score_reason = f"""
-            Worked at Tier-1 company with total experience of {total_years:.1f} years. 
-            Expects compensation of {rate_in_usd} USD with availability of {salary_preferences.get('availability', 0)} hours per week.
-            Currently in {personal_details.get('location', '')}.
-            """
-            return True, score_reason
-        else:
-            score_reason = f"""
-            Worked at multiple companies having total experience of {total_years:.1f} years. 
-            Expects compensation of {rate_in_usd} USD with availability of {salary_preferences.get('availability', 0)} hours per week. 
-            Currently in {personal_details.get('location', '')}. 
-            """
-        return True, score_reason
-    else:
-        return False, "Does not meet all criteria"
+    return results
+
+
+def get_shortlist_status(is_shortlisted, reason):
+    """
+    Get the Shortlist Status of an applicant from its shortlist result.
+    """
+    if is_shortlisted:
+        return "Processing"
+    if reason == MISSING_FIELDS_REASON:
+        return "Invalid"
+    return "Rejected"
 
 
 def create_shortlisted_lead_record(applicant_id, compressed_json, score_reason, applicant_record_id):
@@ -102,22 +90,17 @@ def create_shortlisted_lead_record(applicant_id, compressed_json, score_reason,
     return updated_shortlisted_lead_record
 
 
-def main():
+def iter_pending_applicants(applicants_records):
     """
-    Shortlist leads.
+    Yield unprocessed applicants records having an applicant ID and a compressed JSON.
     """
-    final_shortlisted_leads = []
-    final_applicants_records = []
-
-    # Process applicants records to get shortlisted leads and update applicants records
-    applicants_records = fetch_records_from_table(TABLES["applicants"])
     for i, applicant_record in enumerate(applicants_records):
-        print(f"Processing applicant {i+1} of {len(applicants_records)}: {applicant_record['fields']['Applicant ID']}")
-
         applicant_fields = applicant_record.get("fields", {})
-        applicant_id = applicant_fields["Applicant ID"]
-        compressed_json = applicant_fields["Compressed JSON"]
-        shortlist_status = applicant_fields["Shortlist Status"]
+        applicant_id = applicant_fields.get("Applicant ID")
+        compressed_json = applicant_fields.get("Compressed JSON")
+        shortlist_status = applicant_fields.get("Shortlist Status")
+
+        print(f"Processing applicant {i+1}: {applicant_id}")
 
         if not compressed_json or not applicant_id:
             print(f"Skipping {applicant_id} because it doesn't have applicant ID or compressed JSON")
@@ -127,64 +110,142 @@ def main():
             print(f"Skipping {applicant_id} because it's already processed. Shortlist Status: {shortlist_status}")
             continue
 
+        yield applicant_record
+
+
+def shortlist_chunk(applicants_records):
+    """
+    Decode the compressed JSON of a chunk of applicants and verify their criteria in one pass.
+    Returns (is_shortlisted, reason) per applicant, or (None, error) when the compressed JSON cannot be decoded.
+    Runs in worker processes with --workers.
+    """
+    results = [None] * len(applicants_records)
+    decoded_indices = []
+    compressed_jsons = []
+    for index, applicant_record in enumerate(applicants_records):
         try:
-            compressed_json_data = json.loads(compressed_json)
+            compressed_jsons.append(decode_profile(applicant_record["fields"]["Compressed JSON"]))
+            decoded_indices.append(index)
         except Exception as ex:
-            print(f"Skipping invalid JSON for {applicant_id}: {ex}")
-            continue
+            results[index] = (None, str(ex))
 
-        is_shortlisted, reason = verify_shortlist_criteria(applicant_id, compressed_json_data)
-        if is_shortlisted:
-            updated_shortlisted_lead_record = create_shortlisted_lead_record(
-                applicant_id=applicant_id,
-                compressed_json=compressed_json,
-                score_reason=reason,
-                applicant_record_id=applicant_record["id"]
-            )
-            final_shortlisted_leads.append(updated_shortlisted_lead_record)
-
-            # Create a new applicant record with shortlist status as "Processing"
-            updated_applicant_record = deepcopy(applicant_record)
-            updated_applicant_record["fields"]["Shortlist Status"] = "Processing"
-            final_applicants_records.append(updated_applicant_record)
-
-        else:
-            # Create a new applicant record with shortlist status as "Rejected" or "Invalid"
-            updated_applicant_record = deepcopy(applicant_record)
-            if "missing" in reason.lower():
-                updated_applicant_record["fields"]["Shortlist Status"] = "Invalid"
-            else:
-                updated_applicant_record["fields"]["Shortlist Status"] = "Rejected"
-            final_applicants_records.append(updated_applicant_record)
-
-        print(f"Applicant {applicant_id} Shortlist status: {updated_applicant_record['fields']['Shortlist Status']}")
-
-    # Upsert final shortlisted leads
-    i = 0
-    while i < len(final_shortlisted_leads):
-        j = min(i + 10, len(final_shortlisted_leads))
-        print(f"Upserting {len(final_shortlisted_leads[i:j])} shortlisted leads in batch from index {i} to {j}")
-        upsert_records(
-            table_id=TABLES["shortlisted"],
-            table_name="Shortlisted Leads",
-            sanitized_records=final_shortlisted_leads[i:j],
-            use_post=True
-        )
-        i = j
-
-    # Upsert final applicants records
-    sanitized_applicants_records = sanitize_records(final_applicants_records)
-    i = 0
-    while i < len(sanitized_applicants_records):
-        j = min(i + 10, len(sanitized_applicants_records))
-        print(f"Upserting {len(sanitized_applicants_records[i:j])} applicants records in batch from index {i} to {j}")
-        upsert_records(
-            table_id=TABLES["applicants"],
-            table_name="Applicants",
-            sanitized_records=sanitized_applicants_records[i:j],
-            use_post=False
+    for index, result in zip(decoded_indices, verify_shortlist_criteria_batch(compressed_jsons)):
+        results[index] = result
+    return results
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Shortlist applicants meeting the shortlist rules.")
+    parser.add_argument(
+        "--snapshot",
+        metavar="PATH",
+        help="Read applicants from a local snapshot created by sync_snapshot.py instead of Airtable."
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Discard the journal of an interrupted run instead of resuming it."
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Overlap fetching, shortlisting and writing through bounded queues instead of running them one after another."
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help="Maximum number of fetched applicants waiting to be shortlisted in streaming mode."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes decoding and verifying applicants. Results are merged in fetch order."
+    )
+    add_metrics_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """
+    Shortlist leads.
+    Leads and shortlist statuses are journaled per applicant and written in batches as they are produced.
+    With --stream, fetching, shortlisting and writing overlap and memory is bounded by the queue sizes.
+    """
+    args = parse_args()
+    start_metrics("shortlist_leads", args)
+    store = SnapshotStore(args.snapshot) if args.snapshot else None
+
+    def apply_flushed_updates(target, records):
+        if store is not None and target == "applicants":
+            store.apply_updates("applicants", records)
+
+    journal = RunJournal(get_journal_path("shortlist_leads"), resume=not args.no_resume)
+    writer = JournaledWriter(
+        journal,
+        {
+            "shortlisted": {"table_id": TABLES["shortlisted"], "table_name": "Shortlisted Leads", "fields_to_merge_on": LEAD_MERGE_FIELDS},
+            "applicants": {"table_id": TABLES["applicants"], "table_name": "Applicants"},
+        },
+        flush_size=MAX_BATCH_SIZE if args.stream else DEFAULT_FLUSH_SIZE,
+        on_flushed=apply_flushed_updates,
+        background=args.stream
+    )
+
+    # Process applicants records to get shortlisted leads and update applicants records
+    if store is not None:
+        applicants_records = store.iter_records("applicants", fields=APPLICANT_FIELDS)
+    else:
+        applicants_records = iter_records_from_table(
+            TABLES["applicants"],
+            fields=APPLICANT_FIELDS,
+            filter_by_formula=PENDING_APPLICANTS_FORMULA
         )
-        i = j
+        # Pages are fetched in the background while earlier ones are shortlisted
+        if args.stream:
+            applicants_records = stream_in_background(applicants_records, args.queue_size)
+
+    pending_applicants = iter_pending_applicants(journal.iter_unfinished(applicants_records))
+
+    # Verify criteria for all pending applicants in one pass, per chunk while streaming, or per chunk in worker processes
+    chunk_size = STREAM_CHUNK_SIZE if args.stream else DEFAULT_CHUNK_SIZE
+    if args.workers > 1:
+        chunk_results = map_chunks_in_processes(shortlist_chunk, pending_applicants, args.workers, chunk_size)
+    else:
+        chunks = iter_chunks(pending_applicants, chunk_size) if args.stream else [list(pending_applicants)]
+        chunk_results = ((chunk, shortlist_chunk(chunk)) for chunk in chunks)
+
+    for chunk, shortlist_results in chunk_results:
+        for applicant_record, (is_shortlisted, reason) in zip(chunk, shortlist_results):
+            applicant_id = applicant_record["fields"]["Applicant ID"]
+            if is_shortlisted is None:
+                print(f"Skipping invalid JSON for {applicant_id}: {reason}")
+                continue
+
+            shortlisted_leads = []
+            if is_shortlisted:
+                shortlisted_leads.append(create_shortlisted_lead_record(
+                    applicant_id=applicant_id,
+                    compressed_json=applicant_record["fields"]["Compressed JSON"],
+                    score_reason=reason,
+                    applicant_record_id=applicant_record["id"]
+                ))
+
+            # Patch the shortlist status of the applicant as "Processing", "Rejected" or "Invalid"
+            applicant_patch = RecordPatch(applicant_record["id"], {"Shortlist Status": get_shortlist_status(is_shortlisted, reason)})
+            writer.add(applicant_record["id"], {"shortlisted": shortlisted_leads, "applicants": [applicant_patch.to_record()]})
+
+            print(f"Applicant {applicant_id} Shortlist status: {applicant_patch.fields['Shortlist Status']}")
+
+    # Write the remaining leads and statuses, keeping the journal when any batch failed
+    writer.close()
+
+    if store is not None:
+        store.close()
 
     print("Shortlist leads and update applicants records completed successfully!!!")
 
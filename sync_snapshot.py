@@ -0,0 +1,41 @@
+import argparse
+from utils.config_loader import TABLES
+from utils.snapshot_store import DEFAULT_SNAPSHOT_PATH, SnapshotStore
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Mirror all Airtable tables into a local snapshot.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Download every record again instead of only records modified since the last sync."
+    )
+    parser.add_argument(
+        "--snapshot-path",
+        default=DEFAULT_SNAPSHOT_PATH,
+        help="SQLite file holding the snapshot."
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Sync all tables into the local snapshot.
+    """
+    args = parse_args()
+    store = SnapshotStore(args.snapshot_path)
+    try:
+        for table_key in TABLES:
+            synced_count = store.sync_table(table_key, full=args.full)
+            print(f"Synced {synced_count} {table_key} records")
+    finally:
+        store.close()
+
+    print("Snapshot sync completed successfully!!!")
+
+
+if __name__ == "__main__":
+    main()
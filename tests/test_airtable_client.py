@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.airtable_client import TIMEOUT, AirtableClient, get_rate_limiter
+
+
+BASE_ID = "appTest"
+
+
+def build_response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+
+class RequestUrlTest(unittest.TestCase):
+    def setUp(self):
+        # Created first, so the client does not read the request rate from the settings
+        get_rate_limiter(BASE_ID, requests_per_second=1000)
+        self.client = AirtableClient(BASE_ID, {}, api_url="http://airtable.invalid/v0")
+        self.session_request = mock.Mock()
+        self.client.session.request = self.session_request
+        patch = mock.patch("utils.airtable_client.time.sleep")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def request(self, method, side_effect, **kwargs):
+        self.session_request.side_effect = side_effect
+        return self.client.request(method, "tblTest", **kwargs)
+
+    def test_sends_the_default_timeout(self):
+        self.request("GET", [build_response(200)])
+
+        self.assertEqual(self.session_request.call_args.kwargs["timeout"], TIMEOUT)
+
+    def test_keeps_a_given_timeout(self):
+        self.request("GET", [build_response(200)], timeout=5)
+
+        self.assertEqual(self.session_request.call_args.kwargs["timeout"], 5)
+
+    def test_retries_read_timeouts(self):
+        response = self.request("PATCH", [requests.ReadTimeout("read timed out"), build_response(200)], json={"records": []})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session_request.call_count, 2)
+
+    def test_retries_upserts_on_timeouts(self):
+        body = {"records": [], "performUpsert": {"fieldsToMergeOn": ["Applicant ID"]}}
+        response = self.request("POST", [requests.ConnectTimeout("connect timed out"), build_response(200)], json=body)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_does_not_retry_creates_on_timeouts(self):
+        with self.assertRaises(requests.ReadTimeout):
+            self.request("POST", [requests.ReadTimeout("read timed out"), build_response(200)], json={"records": []})
+
+        self.assertEqual(self.session_request.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import evaluate_applicants
+from evaluate_applicants import evaluate_applicants_async
+
+
+LLM_RESULT = {"LLM Summary": "Experienced applicant.", "LLM Score": 8, "LLM Follow-Ups": "Confirm the availability."}
+
+# Seconds after which a run that never finishes counts as hung
+HANG_TIMEOUT = 10
+
+
+def build_pending_applicants(count):
+    """
+    Build (applicant_id, compressed_json, applicant_record_id) tuples of small complete profiles.
+    """
+    profile = {
+        "personal": {"name": "Applicant", "location": "Canada"},
+        "experience": [{"company": "Google", "title": "Engineer", "start": "2018-01-01", "end": "2022-01-01"}],
+        "salary": {"rate": 80, "currency": "USD", "availability": 30},
+    }
+    return [(f"A{index}", json.dumps(profile), f"rec{index}") for index in range(count)]
+
+
+class EvaluateApplicantsAsyncTest(unittest.TestCase):
+    def setUp(self):
+        async def request_evaluation_async(async_client, rendered_profile, budget):
+            await asyncio.sleep(0)
+            return json.dumps(LLM_RESULT), LLM_RESULT
+
+        async_client = mock.Mock()
+        async_client.close = mock.AsyncMock()
+        patches = [
+            mock.patch.object(evaluate_applicants, "create_async_openai_client", return_value=async_client),
+            mock.patch.object(evaluate_applicants, "request_evaluation_async", side_effect=request_evaluation_async),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_evaluation(self, pending_applicants, concurrency):
+        return asyncio.run(asyncio.wait_for(
+            evaluate_applicants_async(iter(pending_applicants), concurrency),
+            HANG_TIMEOUT
+        ))
+
+    def test_records_every_applicant(self):
+        records = self.run_evaluation(build_pending_applicants(20), concurrency=3)
+
+        self.assertEqual(sorted(record["id"] for record in records), sorted(f"rec{index}" for index in range(20)))
+
+    def test_worker_failure_stops_the_run(self):
+        with mock.patch.object(evaluate_applicants, "record_llm_result", side_effect=OSError("journal is full")):
+            with self.assertRaisesRegex(OSError, "journal is full"):
+                self.run_evaluation(build_pending_applicants(50), concurrency=2)
+
+    def test_producer_failure_stops_the_run(self):
+        def iter_failing_applicants():
+            yield from build_pending_applicants(5)
+            raise ConnectionError("Airtable is unreachable")
+
+        with self.assertRaisesRegex(ConnectionError, "Airtable is unreachable"):
+            asyncio.run(asyncio.wait_for(evaluate_applicants_async(iter_failing_applicants(), 2), HANG_TIMEOUT))
+
+
+if __name__ == "__main__":
+    unittest.main()
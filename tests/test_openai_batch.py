@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluate_applicants import map_batch_results, parse_llm_response
+from utils.llm_cache import LLMCache
+from utils.openai_batch import BATCH_ENDPOINT, build_batch_request_line, parse_batch_output
+from utils.llm_output import SINGLE_RESPONSE_FORMAT
+
+
+EVALUATION = {"summary": "Experienced applicant.", "score": 8, "issues": [], "follow_ups": ["Confirm the availability."]}
+
+
+def build_output_line(custom_id, content=None, status_code=200, error=None):
+    """
+    Build one line of a Batch API output file.
+    """
+    response = None
+    if error is None:
+        response = {"status_code": status_code, "request_id": "req", "body": {"choices": [{"message": {"role": "assistant", "content": content}}]}}
+        if status_code != 200:
+            response["body"] = {"error": {"message": "Server error"}}
+    return json.dumps({"id": f"batch_req_{custom_id}", "custom_id": custom_id, "response": response, "error": error})
+
+
+class BuildBatchRequestLineTest(unittest.TestCase):
+    def test_targets_chat_completions_with_the_response_format(self):
+        line = build_batch_request_line("rec1", "Evaluate this applicant", SINGLE_RESPONSE_FORMAT)
+
+        self.assertEqual(line["custom_id"], "rec1")
+        self.assertEqual(line["method"], "POST")
+        self.assertEqual(line["url"], BATCH_ENDPOINT)
+        self.assertEqual(line["body"]["messages"], [{"role": "user", "content": "Evaluate this applicant"}])
+        self.assertEqual(line["body"]["response_format"], SINGLE_RESPONSE_FORMAT)
+        json.dumps(line)
+
+    def test_omits_the_response_format_when_not_given(self):
+        self.assertNotIn("response_format", build_batch_request_line("rec1", "Evaluate")["body"])
+
+
+class ParseBatchOutputTest(unittest.TestCase):
+    def test_maps_custom_ids_to_content_and_failures_to_none(self):
+        text = "\n".join([
+            build_output_line("rec1", content="first"),
+            "",
+            build_output_line("rec2", error={"code": "invalid_url", "message": "Bad URL"}),
+            build_output_line("rec3", status_code=500),
+            build_output_line("rec4", content="fourth"),
+        ]) + "\n"
+
+        self.assertEqual(parse_batch_output(text), {"rec1": "first", "rec2": None, "rec3": None, "rec4": "fourth"})
+
+    def test_empty_output(self):
+        self.assertEqual(parse_batch_output(""), {})
+
+
+class MapBatchResultsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = LLMCache(os.path.join(self.directory.name, "cache.sqlite"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_maps_results_back_to_applicant_records(self):
+        applicants = {"rec1": ["A1", "key1"], "rec2": ["A2", "key2"], "rec3": ["A3", None]}
+        response = json.dumps(EVALUATION)
+        batch_results = parse_batch_output("\n".join([
+            build_output_line("rec1", content=response),
+            build_output_line("rec2", error={"code": "invalid_url", "message": "Bad URL"}),
+            build_output_line("rec3", content=response),
+        ]))
+
+        records = map_batch_results(applicants, batch_results, self.cache)
+
+        self.assertEqual([record["id"] for record in records], ["rec1", "rec3"])
+        self.assertEqual(records[0]["fields"]["Applicant ID"], "A1")
+        self.assertEqual(records[0]["fields"]["LLM Score"], 8)
+        # Only results with a cache key are cached, failed ones are left for the next run
+        self.assertIsNotNone(self.cache.get("key1"))
+        self.assertIsNone(self.cache.get("key2"))
+
+    def test_skips_applicants_missing_from_the_output(self):
+        self.assertEqual(map_batch_results({"rec1": ["A1", "key1"]}, {}, self.cache), [])
+
+    def test_reasks_unparseable_responses_once(self):
+        applicants = {"rec1": ["A1", "key1"], "rec2": ["A2", "key2"]}
+        batch_results = {"rec1": "not an evaluation", "rec2": "still not an evaluation"}
+        fixed_response = json.dumps(EVALUATION)
+
+        def reask_evaluation(response):
+            if response == "not an evaluation":
+                return fixed_response, parse_llm_response(fixed_response, reask=True)
+            return response, None
+
+        with mock.patch("evaluate_applicants.reask_evaluation", side_effect=reask_evaluation) as reask:
+            records = map_batch_results(applicants, batch_results, self.cache)
+
+        self.assertEqual(reask.call_count, 2)
+        self.assertEqual([record["id"] for record in records], ["rec1"])
+        self.assertEqual(self.cache.get("key1")[0], fixed_response)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import random
+import sys
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shortlist_leads import MISSING_FIELDS_REASON, verify_shortlist_criteria, verify_shortlist_criteria_batch
+from utils.rule_engine import DEFAULT_RULES_PATH, compile_rules
+
+
+COMPANIES = ["Google", "google", "META", "OpenAI", "Stripe", "Acme Corp", "Globex", "", None]
+CURRENCIES = ["USD", "usd", "EUR", "INR", "GBP", ""]
+LOCATIONS = ["US", "us", "Canada", "UK", "Germany", "India", "France", "Brazil"]
+OPEN_ENDED_ENDS = [None, "", "Present", " current ", "NOW", "ongoing"]
+INVALID_DATES = ["2021-13-01", "2020-02-30", "next year", "", None]
+
+
+def build_experience(rng):
+    """
+    Build an experience dict, sometimes open-ended, with an invalid date, or ending before it starts.
+    """
+    start = date(2005, 1, 1) + timedelta(days=rng.randrange(6000))
+    end = start + timedelta(days=rng.randrange(-100, 2000))
+    experience = {"company": rng.choice(COMPANIES), "start": start.isoformat(), "end": end.isoformat()}
+
+    roll = rng.random()
+    if roll < 0.15:
+        experience["end"] = rng.choice(OPEN_ENDED_ENDS)
+    elif roll < 0.2:
+        del experience["end"]
+    elif roll < 0.3:
+        experience[rng.choice(["start", "end"])] = rng.choice(INVALID_DATES)
+    elif roll < 0.35:
+        del experience["start"]
+    return experience
+
+
+def build_profile(rng):
+    """
+    Build a compressed profile, overlapping roles included, with sections sometimes missing or empty.
+    """
+    profile = {
+        "personal": {"name": "Applicant", "location": rng.choice(LOCATIONS)},
+        "experience": [build_experience(rng) for _ in range(rng.randint(0, 6))],
+        "salary": {
+            "rate": rng.choice([rng.randint(10, 9000), round(rng.uniform(10, 200), 2)]),
+            "currency": rng.choice(CURRENCIES),
+            "availability": rng.choice([10, 20, 40, "20", "35"]),
+        },
+    }
+    if rng.random() < 0.1:
+        del profile["salary"]["currency"]
+    if rng.random() < 0.1:
+        del profile["salary"]["availability"]
+    if rng.random() < 0.1:
+        profile[rng.choice(["personal", "salary", "experience"])] = rng.choice([{}, []])
+    if rng.random() < 0.05:
+        del profile[rng.choice(["personal", "salary", "experience"])]
+    return profile
+
+
+class VerifyShortlistCriteriaBatchTest(unittest.TestCase):
+    def setUp(self):
+        with open(DEFAULT_RULES_PATH) as rules_file:
+            self.rules = compile_rules(json.load(rules_file))
+
+    def test_matches_single_applicant_verification(self):
+        rng = random.Random(7)
+        profiles = [build_profile(rng) for _ in range(3000)]
+
+        expected = [verify_shortlist_criteria(f"A{index}", profile, self.rules) for index, profile in enumerate(profiles)]
+        results = verify_shortlist_criteria_batch(profiles, self.rules)
+
+        self.assertEqual(results, expected)
+        # The generated population covers every outcome
+        self.assertIn((False, MISSING_FIELDS_REASON), results)
+        self.assertTrue(any(is_shortlisted for is_shortlisted, _ in results))
+        self.assertTrue(any(not is_shortlisted and reason != MISSING_FIELDS_REASON for is_shortlisted, reason in results))
+
+    def test_empty_population(self):
+        self.assertEqual(verify_shortlist_criteria_batch([], self.rules), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
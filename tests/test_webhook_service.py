@@ -0,0 +1,111 @@
+import os
+import sys
+import types
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from standin_server import AirtableStandIn, build_environment, start_server
+from synthetic_applicants import TABLE_IDS, build_synthetic_tables
+
+
+ARGS = types.SimpleNamespace(compact=False, concurrency=1, batch_size=1)
+
+# Preferred Rate above every shortlisting limit, rejecting the applicant
+REJECTED_RATE = 100000
+
+standin = None
+server = None
+
+
+def setUpModule():
+    global standin, server
+    standin = AirtableStandIn(build_synthetic_tables(40, seed=1), seed=1)
+    server, url = start_server(standin)
+    os.environ.update(build_environment(url))
+
+
+def tearDownModule():
+    server.shutdown()
+
+
+class ProcessApplicantsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Imported once the environment points at the stand-in
+        import webhook_service
+        cls.webhook_service = webhook_service
+        applicant_ids = [record["fields"]["Applicant ID"] for record in standin.records[TABLE_IDS["applicants"]].values()]
+        assert webhook_service.process_applicants(sorted(applicant_ids), None, ARGS) == []
+
+    def process(self, applicant_ids):
+        return self.webhook_service.process_applicants(applicant_ids, None, ARGS)
+
+    def applicants_by_id(self):
+        return {record["fields"]["Applicant ID"]: record for record in standin.records[TABLE_IDS["applicants"]].values()}
+
+    def lead_applicant_ids(self):
+        return {record["fields"]["Applicant ID"] for record in standin.records[TABLE_IDS["shortlisted"]].values()}
+
+    def status(self, applicant_id):
+        return self.applicants_by_id()[applicant_id]["fields"]["Shortlist Status"]
+
+    def set_status(self, applicant_id, status):
+        self.applicants_by_id()[applicant_id]["fields"]["Shortlist Status"] = status
+
+    def set_child_field(self, table_key, applicant_id, field, value):
+        for record in standin.records[TABLE_IDS[table_key]].values():
+            if record["fields"]["Applicant ID"] == applicant_id:
+                record["fields"][field] = value
+
+    def set_rate(self, applicant_id, rate):
+        self.set_child_field("salary", applicant_id, "Preferred Rate", rate)
+
+    def shortlisted_applicant_id(self):
+        applicant_ids = sorted(applicant_id for applicant_id in self.lead_applicant_ids() if self.status(applicant_id) == "Processing")
+        self.assertTrue(applicant_ids)
+        return applicant_ids[0]
+
+    def test_script_rejection_deletes_the_lead_and_is_reshortlisted(self):
+        applicant_id = self.shortlisted_applicant_id()
+        rate = next(
+            record["fields"]["Preferred Rate"] for record in standin.records[TABLE_IDS["salary"]].values()
+            if record["fields"]["Applicant ID"] == applicant_id
+        )
+
+        self.set_rate(applicant_id, REJECTED_RATE)
+        self.assertEqual(self.process([applicant_id]), [])
+        self.assertEqual(self.status(applicant_id), "Rejected")
+        self.assertNotIn(applicant_id, self.lead_applicant_ids())
+
+        self.set_rate(applicant_id, rate)
+        self.assertEqual(self.process([applicant_id]), [])
+        self.assertEqual(self.status(applicant_id), "Processing")
+        self.assertIn(applicant_id, self.lead_applicant_ids())
+
+    def test_selected_applicant_is_left_alone(self):
+        applicant_id = self.shortlisted_applicant_id()
+        self.set_status(applicant_id, "Selected")
+
+        self.set_rate(applicant_id, REJECTED_RATE)
+        self.assertEqual(self.process([applicant_id]), [])
+
+        self.assertEqual(self.status(applicant_id), "Selected")
+        self.assertIn(applicant_id, self.lead_applicant_ids())
+
+    def test_applicant_rejected_after_review_is_left_alone(self):
+        applicant_id = self.shortlisted_applicant_id()
+        self.set_status(applicant_id, "Rejected")
+
+        # Still meets the criteria, so shortlisting it again would mark it Processing
+        self.set_child_field("personal", applicant_id, "Email", "new.address@example.com")
+        self.assertEqual(self.process([applicant_id]), [])
+
+        self.assertEqual(self.status(applicant_id), "Rejected")
+        self.assertIn(applicant_id, self.lead_applicant_ids())
+
+
+if __name__ == "__main__":
+    unittest.main()
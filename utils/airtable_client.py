@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+from utils.config_loader import get_airtable_headers, settings
+from utils.metrics import metrics
+
+
+# Airtable asks clients to wait 30 seconds after a 429. Its limit of 5 requests per second per base
+# is read from AIRTABLE_REQUESTS_PER_SECOND, which can be raised for local stand-ins.
+RATE_LIMITED_WAIT_SECONDS = 30
+MAX_RETRIES = 5
+POOL_SIZE = 10
+# Seconds to connect and to wait for each read, so a stalled connection fails and is retried instead of hanging
+TIMEOUT = (10, 60)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` requests per second with bursts up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available and take it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# One limiter per base, shared by every client talking to it
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(base_id, requests_per_second=None):
+    """
+    Get the shared token bucket of a base, allowing AIRTABLE_REQUESTS_PER_SECOND by default.
+    """
+    with _rate_limiters_lock:
+        if base_id not in _rate_limiters:
+            _rate_limiters[base_id] = TokenBucket(requests_per_second or float(settings.AIRTABLE_REQUESTS_PER_SECOND))
+        return _rate_limiters[base_id]
+
+
+class AirtableClient:
+    """
+    Airtable API client owning a pooled keep-alive session.
+    Requests are throttled per base and retried on 429 (honouring Retry-After), and idempotent ones also on
+    connection errors, timeouts and 5xx with exponential backoff.
+    """
+
+    def __init__(self, base_id, headers, api_url=None, max_retries=MAX_RETRIES, pool_size=POOL_SIZE, timeout=TIMEOUT):
+        # requests is only imported by commands talking to Airtable
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_id = base_id
+        self.api_url = api_url or settings.AIRTABLE_API_URL
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.rate_limiter = get_rate_limiter(base_id)
+        # A read timeout is not a ConnectionError, but is as safe to retry
+        self.connection_errors = (requests.ConnectionError, requests.Timeout)
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def table_url(self, table_id):
+        """
+        Build the endpoint URL of a table.
+        """
+        return f"{self.api_url}/{self.base_id}/{table_id}"
+
+    def webhooks_url(self, path=""):
+        """
+        Build the URL of the webhooks endpoint of the base, or of a path below it.
+        """
+        return f"{self.api_url}/bases/{self.base_id}/webhooks{path}"
+
+    def request(self, method, table_id, **kwargs):
+        """
+        Send a request to a table endpoint, retrying on rate limits and server errors.
+        Returns the last response once it succeeds or retries are exhausted.
+        """
+        return self.request_url(method, self.table_url(table_id), f"{table_id} table", **kwargs)
+
+    @staticmethod
+    def is_idempotent(method, kwargs):
+        """
+        Check if sending a request twice has the effect of sending it once.
+        A POST creates records or webhooks unless it is an upsert, so it may have been applied when the connection
+        dropped or timed out or a 5xx came back, and is only retried on 429, which Airtable returns before applying anything.
+        """
+        if method.upper() != "POST":
+            return True
+        body = kwargs.get("json")
+        return isinstance(body, dict) and bool(body.get("performUpsert"))
+
+    def request_url(self, method, url, target, **kwargs):
+        """
+        Send a request to any endpoint of the base, named target in logs, with the same throttling and retries.
+        """
+        idempotent = self.is_idempotent(method, kwargs)
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            started_at = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except self.connection_errors as ex:
+                if metrics.enabled:
+                    metrics.increment("airtable.connection_errors")
+                if attempt == self.max_retries or not idempotent:
+                    raise
+                wait = 2 ** attempt + random.uniform(0, 1)
+                print(f"Airtable connection error on {target}, retrying in {wait:.1f}s: {ex}")
+                time.sleep(wait)
+                continue
+
+            if metrics.enabled:
+                self.record_request(method, target, response, time.perf_counter() - started_at, attempt)
+
+            if response.status_code == 429:
+                wait = float(response.headers.get("Retry-After", RATE_LIMITED_WAIT_SECONDS))
+            elif response.status_code >= 500 and idempotent:
+                wait = 2 ** attempt + random.uniform(0, 1)
+            else:
+                return response
+
+            if attempt < self.max_retries:
+                print(f"Airtable returned {response.status_code} on {target}, retrying in {wait:.1f}s")
+                time.sleep(wait)
+
+        return response
+
+    def record_request(self, method, target, response, seconds, attempt):
+        """
+        Record the timing, status and transferred bytes of a request in the run metrics.
+        """
+        bytes_sent = len(response.request.body or b"")
+        bytes_received = len(response.content)
+        metrics.observe(f"airtable.{method.lower()}", seconds)
+        metrics.increment("airtable.requests")
+        metrics.increment("airtable.bytes_sent", bytes_sent)
+        metrics.increment("airtable.bytes_received", bytes_received)
+        if attempt:
+            metrics.increment("airtable.retries")
+        if response.status_code == 429:
+            metrics.increment("airtable.rate_limited")
+        metrics.log_event("airtable_request", {
+            "method": method,
+            "target": target,
+            "status": response.status_code,
+            "attempt": attempt,
+            "seconds": round(seconds, 6),
+            "bytes_sent": bytes_sent,
+            "bytes_received": bytes_received,
+        })
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_airtable_client():
+    """
+    Get the Airtable client shared by all tables and scripts.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AirtableClient(settings.AIRTABLE_BASE_ID, get_airtable_headers())
+        return _client
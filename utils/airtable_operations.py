@@ -1,5 +1,10 @@
-import requests
-from utils.config_loader import HEADERS, AIRTABLE_BASE_ID
+from utils.airtable_client import get_airtable_client
+from utils.metrics import timed
+
+
+# Airtable returns at most 100 records per list request and accepts at most 10 per write request
+MAX_PAGE_SIZE = 100
+MAX_BATCH_SIZE = 10
 
 
 def sanitize_records(records):
@@ -16,47 +21,96 @@ def sanitize_records(records):
     return cleaned_records
 
 
-def fetch_records_from_table(table_id):
+def build_match_formula(field_name, values):
     """
-    Fetch all records from a given table.
+    Build a formula matching records whose field equals any of the given values.
     """
-    try:
-        url = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{table_id}"
-        response = requests.get(url, headers=HEADERS)
+    conditions = []
+    for value in values:
+        escaped_value = str(value).replace("\\", "\\\\").replace("'", "\\'")
+        conditions.append(f"{{{field_name}}} = '{escaped_value}'")
+    return f"OR({', '.join(conditions)})"
+
+
+def build_record_id_formula(record_ids):
+    """
+    Build a formula matching records by record id.
+    """
+    conditions = [f"RECORD_ID() = '{record_id}'" for record_id in record_ids]
+    return f"OR({', '.join(conditions)})"
+
+
+def iter_records_from_table(table_id, fields=None, filter_by_formula=None, page_size=MAX_PAGE_SIZE, view=None):
+    """
+    Yield records from a given table page by page, following the offset cursor.
+    Only the requested fields and rows are downloaded when projection or filter is given.
+    """
+    client = get_airtable_client()
+    params = {"pageSize": min(page_size, MAX_PAGE_SIZE)}
+    if fields:
+        params["fields[]"] = list(fields)
+    if filter_by_formula:
+        params["filterByFormula"] = filter_by_formula
+    if view:
+        params["view"] = view
+
+    while True:
+        response = client.request("GET", table_id, params=params)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch records from {table_id} table due to error {response.status_code}: {response.text}")
+
         data = response.json()
-        return data.get("records", [])
+        yield from data.get("records", [])
 
-    except Exception as ex:
-        print(f"Error fetching records from {table_id} table: {ex}")
-        return []
+        offset = data.get("offset")
+        if not offset:
+            break
+        params["offset"] = offset
 
 
-def upsert_records(table_id, table_name, sanitized_records, use_post=False):
+@timed("airtable.upsert_records")
+def upsert_records(table_id, table_name, sanitized_records, use_post=False, fields_to_merge_on=None):
     """
     Upsert records to a given table using POST or PATCH method.
+    With fields_to_merge_on, records without an id are matched on those fields and created when no match exists.
+    Returns the records sent back by Airtable, or None if the upsert failed.
     """
-    url = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{table_id}"
     payload = { "records": sanitized_records }
+    if fields_to_merge_on:
+        payload["performUpsert"] = { "fieldsToMergeOn": fields_to_merge_on }
 
     try:
-        if use_post:
-            response = requests.post(
-                url,
-                headers=HEADERS,
-                json=payload
-            )
-        else:
-            response = requests.patch(
-                url,
-                headers=HEADERS,
-                json=payload
-            )
+        response = get_airtable_client().request(
+            "POST" if use_post else "PATCH",
+            table_id,
+            json=payload
+        )
 
         if response.status_code == 200:
-            print(f"Upserted {len(sanitized_records)} records to {table_name} table successfully.")
+            return response.json().get("records", [])
         else:
-            print(f"Failed to upsert to {table_name} table due to error {response.status_code}: {response.text}")
             raise Exception(f"Failed to upsert to {table_name} table due to error {response.status_code}: {response.text}")
 
     except Exception as ex:
         print(f"Failed to upsert to {table_name} table: {ex}")
+        return None
+
+
+@timed("airtable.delete_records")
+def delete_records(table_id, table_name, record_ids):
+    """
+    Delete records from a given table, at most MAX_BATCH_SIZE per request.
+    Returns the ids of the deleted records, leaving out those of failed batches.
+    """
+    deleted_record_ids = []
+    for i in range(0, len(record_ids), MAX_BATCH_SIZE):
+        batch = record_ids[i:i + MAX_BATCH_SIZE]
+        try:
+            response = get_airtable_client().request("DELETE", table_id, params={"records[]": batch})
+            if response.status_code != 200:
+                raise Exception(f"Failed to delete from {table_name} table due to error {response.status_code}: {response.text}")
+            deleted_record_ids.extend(record["id"] for record in response.json().get("records", []))
+
+        except Exception as ex:
+            print(f"Failed to delete from {table_name} table: {ex}")
+    return deleted_record_ids
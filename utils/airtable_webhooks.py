@@ -0,0 +1,143 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.airtable_client import get_airtable_client
+from utils.atomic_io import write_json_atomically
+
+
+DEFAULT_WEBHOOK_STATE_PATH = os.path.join(".cache", "webhook_state.json")
+
+# Airtable returns at most 50 payloads per request and expires webhooks 7 days after creation or refresh
+MAX_PAYLOADS_PER_REQUEST = 50
+REFRESH_BEFORE_EXPIRY = timedelta(days=1)
+
+MAC_HEADER = "X-Airtable-Content-MAC"
+
+
+def load_webhook_state(path=DEFAULT_WEBHOOK_STATE_PATH):
+    """
+    Load the webhook id, MAC secret, payload cursor and pending Applicant IDs, or an empty state.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as state_file:
+        return json.load(state_file)
+
+
+def save_webhook_state(state, path=DEFAULT_WEBHOOK_STATE_PATH):
+    """
+    Atomically persist the webhook state.
+    """
+    write_json_atomically(path, state)
+
+
+def check_response(response, action):
+    """
+    Get the JSON body of a webhooks API response, raising when the request failed.
+    """
+    if response.status_code != 200:
+        raise Exception(f"Failed to {action} due to error {response.status_code}: {response.text}")
+    return response.json()
+
+
+def create_webhook(notification_url=None):
+    """
+    Create a webhook on record changes of the base. Without a notification URL Airtable sends no pings
+    and payloads are only picked up by polling.
+    Returns the webhook id, MAC secret and expiration time.
+    """
+    client = get_airtable_client()
+    specification = {"options": {"filters": {"dataTypes": ["tableData"]}}}
+    response = client.request_url(
+        "POST",
+        client.webhooks_url(),
+        "webhooks",
+        json={"notificationUrl": notification_url, "specification": specification}
+    )
+    return check_response(response, "create webhook")
+
+
+def refresh_webhook(webhook_id):
+    """
+    Extend the life of a webhook and return its new expiration time.
+    """
+    client = get_airtable_client()
+    response = client.request_url("POST", client.webhooks_url(f"/{webhook_id}/refresh"), "webhooks")
+    return check_response(response, f"refresh webhook {webhook_id}")["expirationTime"]
+
+
+def needs_refresh(expiration_time):
+    """
+    Check if a webhook expires within a day.
+    """
+    expires_at = datetime.strptime(expiration_time, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+    return expires_at - datetime.now(timezone.utc) < REFRESH_BEFORE_EXPIRY
+
+
+def fetch_webhook_payloads(webhook_id, cursor):
+    """
+    Fetch the payloads of a webhook from the cursor on, following mightHaveMore.
+    Returns the payloads and the cursor to fetch the next ones with.
+    """
+    client = get_airtable_client()
+    url = client.webhooks_url(f"/{webhook_id}/payloads")
+    payloads = []
+    while True:
+        response = client.request_url("GET", url, "webhooks", params={"cursor": cursor, "limit": MAX_PAYLOADS_PER_REQUEST})
+        data = check_response(response, f"fetch payloads of webhook {webhook_id}")
+        payloads.extend(data.get("payloads", []))
+        cursor = data["cursor"]
+        if not data.get("mightHaveMore") or not data.get("payloads"):
+            return payloads, cursor
+
+
+def iter_changed_records(payload):
+    """
+    Yield (table_id, change, record_id) for the records created, changed or destroyed in a webhook payload,
+    change being "created", "changed" or "destroyed".
+    """
+    for table_id, table_changes in payload.get("changedTablesById", {}).items():
+        for record_id in table_changes.get("createdRecordsById", {}):
+            yield table_id, "created", record_id
+        for record_id in table_changes.get("changedRecordsById", {}):
+            yield table_id, "changed", record_id
+        for record_id in table_changes.get("destroyedRecordIds", []):
+            yield table_id, "destroyed", record_id
+
+
+def build_notification_mac(mac_secret_base64, body):
+    """
+    Build the X-Airtable-Content-MAC header value Airtable sends with a notification body.
+    """
+    digest = hmac.new(base64.b64decode(mac_secret_base64), body, hashlib.sha256).hexdigest()
+    return f"hmac-sha256={digest}"
+
+
+def start_notification_server(host, port, mac_secret_base64, on_notification):
+    """
+    Listen for webhook notification pings on a background thread and call on_notification for every ping
+    carrying a valid MAC. Pings only announce new payloads, which are then fetched with the cursor.
+    """
+
+    class NotificationHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            valid = hmac.compare_digest(self.headers.get(MAC_HEADER, ""), build_notification_mac(mac_secret_base64, body))
+            self.send_response(200 if valid else 401)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            if valid:
+                on_notification()
+
+    server = ThreadingHTTPServer((host, port), NotificationHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
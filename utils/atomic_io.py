@@ -0,0 +1,23 @@
+import json
+import os
+
+
+def write_text_atomically(path, text):
+    """
+    Write text to a file aside and rename it into place, so readers and a crashed run never see a partial file.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as temporary_file:
+        temporary_file.write(text)
+    os.replace(temporary_path, path)
+
+
+def write_json_atomically(path, data):
+    """
+    Write data as indented JSON with write_text_atomically.
+    """
+    write_text_atomically(path, json.dumps(data, indent=2))
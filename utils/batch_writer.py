@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.airtable_operations import MAX_BATCH_SIZE, upsert_records
+
+
+# Airtable allows 5 requests per second per base, the shared client throttles beyond that
+MAX_WORKERS = 5
+
+
+def get_record_key(record):
+    """
+    Identify a record by its id, or by its Applicant ID when it has not been created yet.
+    """
+    return record.get("id") or record.get("fields", {}).get("Applicant ID")
+
+
+def write_records_in_batches(table_id, table_name, records, use_post=False, fields_to_merge_on=None, batch_size=MAX_BATCH_SIZE, max_workers=MAX_WORKERS):
+    """
+    Upsert records in batches of the API maximum, sending batches concurrently.
+    Returns a report of the upserted record IDs and the keys of records in failed batches.
+    """
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    report = {
+        "table_name": table_name,
+        "total_records": len(records),
+        "total_batches": len(batches),
+        "failed_batches": 0,
+        "upserted_record_ids": [],
+        "failed_record_ids": [],
+    }
+    if not batches:
+        return report
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+        futures = {
+            executor.submit(
+                upsert_records,
+                table_id=table_id,
+                table_name=table_name,
+                sanitized_records=batch,
+                use_post=use_post,
+                fields_to_merge_on=fields_to_merge_on
+            ): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            upserted_records = future.result()
+            if upserted_records is None:
+                report["failed_batches"] += 1
+                report["failed_record_ids"].extend(get_record_key(record) for record in futures[future])
+            else:
+                report["upserted_record_ids"].extend(record["id"] for record in upserted_records)
+
+    return report
+
+
+def print_batch_report(report):
+    """
+    Print a one line summary of a batch write report along with failed records.
+    """
+    print(
+        f"Upserted {len(report['upserted_record_ids'])} of {report['total_records']} records "
+        f"to {report['table_name']} table in {report['total_batches']} batches, {report['failed_batches']} failed."
+    )
+    if report["failed_record_ids"]:
+        print(f"Failed {report['table_name']} records: {', '.join(str(key) for key in report['failed_record_ids'])}")
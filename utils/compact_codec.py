@@ -0,0 +1,161 @@
+import base64
+import re
+import zlib
+from datetime import date
+from utils.metrics import timed
+from utils.models import decode_json, encode_json
+
+
+# Compact values start with a version header so readers can tell them apart from plain JSON
+COMPACT_HEADER = "CJ1:"
+
+PERSONAL_KEYS = ["name", "location", "email", "linkedin"]
+EXPERIENCE_KEYS = ["company", "title", "start", "end", "technologies"]
+SALARY_KEYS = ["rate", "min_rate", "currency", "availability"]
+
+ISO_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def pack_date(value):
+    """
+    Pack an ISO date as its ordinal, keeping any other value as is.
+    """
+    if isinstance(value, str) and ISO_DATE_PATTERN.match(value):
+        try:
+            return date.fromisoformat(value).toordinal()
+        except ValueError:
+            return value
+    return value
+
+
+def unpack_date(value):
+    """
+    Unpack an ordinal back into an ISO date.
+    """
+    if isinstance(value, int):
+        return date.fromordinal(value).isoformat()
+    return value
+
+
+def matches_schema(profile):
+    """
+    Check whether a profile has exactly the shape built by compress_json, which the packed layout relies on.
+    """
+    personal = profile.get("personal")
+    experiences = profile.get("experience")
+    salary = profile.get("salary")
+    if set(profile) != {"personal", "experience", "salary"}:
+        return False
+    if not isinstance(personal, dict) or (personal and set(personal) != set(PERSONAL_KEYS)):
+        return False
+    if not isinstance(salary, dict) or (salary and set(salary) != set(SALARY_KEYS)):
+        return False
+    if not isinstance(experiences, list):
+        return False
+    for experience in experiences:
+        if not isinstance(experience, dict) or set(experience) != set(EXPERIENCE_KEYS):
+            return False
+        if not isinstance(experience["company"], str) or not isinstance(experience["technologies"], list):
+            return False
+        if not all(isinstance(technology, str) for technology in experience["technologies"]):
+            return False
+        if isinstance(experience["start"], int) or isinstance(experience["end"], int):
+            return False
+    return True
+
+
+def pack_profile(profile):
+    """
+    Pack a profile into lists, dictionary-coding companies and technologies and packing dates as ordinals.
+    Profiles of any other shape are kept as is.
+    """
+    if not matches_schema(profile):
+        return [0, profile]
+
+    strings = []
+    string_indexes = {}
+
+    def intern(value):
+        if value not in string_indexes:
+            string_indexes[value] = len(strings)
+            strings.append(value)
+        return string_indexes[value]
+
+    personal = profile["personal"]
+    salary = profile["salary"]
+    experiences = [
+        [
+            intern(experience["company"]),
+            experience["title"],
+            pack_date(experience["start"]),
+            pack_date(experience["end"]),
+            [intern(technology) for technology in experience["technologies"]],
+        ]
+        for experience in profile["experience"]
+    ]
+    return [
+        1,
+        strings,
+        [personal[key] for key in PERSONAL_KEYS] if personal else [],
+        experiences,
+        [salary[key] for key in SALARY_KEYS] if salary else [],
+    ]
+
+
+def unpack_profile(packed):
+    """
+    Unpack a profile packed by pack_profile.
+    """
+    if packed[0] == 0:
+        return packed[1]
+
+    _, strings, personal, experiences, salary = packed
+    return {
+        "personal": dict(zip(PERSONAL_KEYS, personal)),
+        "experience": [
+            {
+                "company": strings[company],
+                "title": title,
+                "start": unpack_date(start),
+                "end": unpack_date(end),
+                "technologies": [strings[technology] for technology in technologies],
+            }
+            for company, title, start, end, technologies in experiences
+        ],
+        "salary": dict(zip(SALARY_KEYS, salary)),
+    }
+
+
+def encode_compact(profile):
+    """
+    Encode a profile in the compact format: version header, then base85 of the zlib compressed packed profile.
+    """
+    packed = encode_json(pack_profile(profile)).encode("utf-8")
+    return COMPACT_HEADER + base64.b85encode(zlib.compress(packed, 9)).decode("ascii")
+
+
+def encode_profile(profile, compact=False):
+    """
+    Encode a profile as plain JSON, or in the compact format when requested.
+    """
+    return encode_compact(profile) if compact else encode_json(profile)
+
+
+@timed("json.decode_profile")
+def decode_profile(text):
+    """
+    Decode a Compressed JSON value written in either the plain JSON or the compact format.
+    """
+    if text.startswith(COMPACT_HEADER):
+        packed = zlib.decompress(base64.b85decode(text[len(COMPACT_HEADER):]))
+        return unpack_profile(decode_json(packed))
+    return decode_json(text)
+
+
+def to_plain_json(text):
+    """
+    Get the plain JSON form of a Compressed JSON value, e.g. for LLM prompts.
+    """
+    if text.startswith(COMPACT_HEADER):
+        return encode_json(decode_profile(text))
+    return text
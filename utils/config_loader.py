@@ -1,60 +1,108 @@
 import os
-from dotenv import load_dotenv
+from collections.abc import Mapping
+
+
+# Settings every command needs when it uses them, raised as missing otherwise
+REQUIRED_SETTINGS = [
+    # OpenAI API key
+    "OPENAI_API_KEY",
+    # Airtable basic details
+    "AIRTABLE_BASE_ID",
+    "AIRTABLE_API_KEY",
+    # Airtable Table IDs
+    "APPLICANTS_TABLE_ID",
+    "PERSONAL_DETAILS_TABLE_ID",
+    "WORK_EXPERIENCE_TABLE_ID",
+    "SALARY_PREFERENCES_TABLE_ID",
+    "SHORTLISTED_LEADS_TABLE_ID",
+]
+
+# Airtable endpoint and request rate, overridable to run against a local stand-in server
+OPTIONAL_SETTINGS = {
+    "AIRTABLE_API_URL": "https://api.airtable.com/v0",
+    "AIRTABLE_REQUESTS_PER_SECOND": "5",
+}
 
-# Load environment variables
-load_dotenv()
+TABLE_SETTINGS = {
+    "applicants": "APPLICANTS_TABLE_ID",
+    "personal": "PERSONAL_DETAILS_TABLE_ID",
+    "experience": "WORK_EXPERIENCE_TABLE_ID",
+    "salary": "SALARY_PREFERENCES_TABLE_ID",
+    "shortlisted": "SHORTLISTED_LEADS_TABLE_ID",
+}
 
-# OpenAI API key
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
-# Airtable basic details
-AIRTABLE_BASE_ID = os.getenv('AIRTABLE_BASE_ID')
-AIRTABLE_API_KEY = os.getenv('AIRTABLE_API_KEY')
+class Settings:
+    """
+    Environment settings resolved on first access.
+    The .env file is only loaded once a setting is read, and a setting is only validated when a command reads it,
+    so commands that never call OpenAI run without OPENAI_API_KEY.
+    """
 
-# Airtable Table IDs
-APPLICANTS_TABLE_ID = os.getenv('APPLICANTS_TABLE_ID')
-PERSONAL_DETAILS_TABLE_ID = os.getenv('PERSONAL_DETAILS_TABLE_ID')
-WORK_EXPERIENCE_TABLE_ID = os.getenv('WORK_EXPERIENCE_TABLE_ID')
-SALARY_PREFERENCES_TABLE_ID = os.getenv('SALARY_PREFERENCES_TABLE_ID')
-SHORTLISTED_LEADS_TABLE_ID = os.getenv('SHORTLISTED_LEADS_TABLE_ID')
+    def __init__(self):
+        self.environment_loaded = False
 
+    def load_environment(self):
+        """
+        Load environment variables from .env, keeping variables already set.
+        """
+        if not self.environment_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            self.environment_loaded = True
 
-# Raise exceptions if variable not found
-if not OPENAI_API_KEY:
-    raise ValueError('OPENAI_API_KEY not found in .env file.')
+    def __getattr__(self, name):
+        if name not in REQUIRED_SETTINGS and name not in OPTIONAL_SETTINGS:
+            raise AttributeError(f"Unknown setting {name}")
 
-if not AIRTABLE_BASE_ID:
-    raise ValueError('AIRTABLE_BASE_ID not found in .env file.')
+        self.load_environment()
+        value = os.getenv(name) or OPTIONAL_SETTINGS.get(name)
 
-if not AIRTABLE_API_KEY:
-    raise ValueError('AIRTABLE_API_KEY not found in .env file.')
+        # Raise exceptions if variable not found
+        if not value:
+            raise ValueError(f"{name} not found in .env file.")
 
-if not APPLICANTS_TABLE_ID:
-    raise ValueError('APPLICANTS_TABLE_ID not found in .env file.')
+        # Cached as an attribute, so later reads skip __getattr__
+        setattr(self, name, value)
+        return value
 
-if not PERSONAL_DETAILS_TABLE_ID:
-    raise ValueError('PERSONAL_DETAILS_TABLE_ID not found in .env file.')
 
-if not WORK_EXPERIENCE_TABLE_ID:
-    raise ValueError('WORK_EXPERIENCE_TABLE_ID not found in .env file.')
+class Tables(Mapping):
+    """
+    Airtable table ids by table key, each resolved from the settings when first used.
+    """
 
-if not SALARY_PREFERENCES_TABLE_ID:
-    raise ValueError('SALARY_PREFERENCES_TABLE_ID not found in .env file.')
+    def __getitem__(self, table_key):
+        return getattr(settings, TABLE_SETTINGS[table_key])
 
-if not SHORTLISTED_LEADS_TABLE_ID:
-    raise ValueError('SHORTLISTED_LEADS_TABLE_ID not found in .env file.')
+    def __iter__(self):
+        return iter(TABLE_SETTINGS)
 
+    def __len__(self):
+        return len(TABLE_SETTINGS)
 
-# Create constants for Airtable API requests
-HEADERS = {
-    "Authorization": f"Bearer {AIRTABLE_API_KEY}",
-    "Content-Type": "application/json"
-}
 
-TABLES = {
-    "applicants": APPLICANTS_TABLE_ID,
-    "personal": PERSONAL_DETAILS_TABLE_ID,
-    "experience": WORK_EXPERIENCE_TABLE_ID,
-    "salary": SALARY_PREFERENCES_TABLE_ID,
-    "shortlisted": SHORTLISTED_LEADS_TABLE_ID
-}
+settings = Settings()
+
+TABLES = Tables()
+
+
+def get_airtable_headers():
+    """
+    Build the headers of Airtable API requests.
+    """
+    return {
+        "Authorization": f"Bearer {settings.AIRTABLE_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+
+def __getattr__(name):
+    """
+    Resolve module-level setting names such as OPENAI_API_KEY lazily, for callers reading them from the module.
+    """
+    if name == "HEADERS":
+        return get_airtable_headers()
+    if name in REQUIRED_SETTINGS or name in OPTIONAL_SETTINGS:
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
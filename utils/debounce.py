@@ -0,0 +1,52 @@
+import time
+
+
+class ChangeDebouncer:
+    """
+    Collects keys changed in bursts and releases each one once it has been quiet for delay seconds,
+    or max_delay seconds after its first change, so a burst of edits to one applicant becomes one job.
+    """
+
+    def __init__(self, delay, max_delay):
+        self.delay = delay
+        self.max_delay = max_delay
+        # Key -> (first change, last change) as monotonic times
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, keys, now=None):
+        """
+        Record a change of every key, restarting their quiet period.
+        """
+        now = time.monotonic() if now is None else now
+        for key in keys:
+            first_changed_at = self.pending.get(key, (now, now))[0]
+            self.pending[key] = (first_changed_at, now)
+
+    def due_at(self, key):
+        """
+        Get the monotonic time a pending key is released at.
+        """
+        first_changed_at, last_changed_at = self.pending[key]
+        return min(last_changed_at + self.delay, first_changed_at + self.max_delay)
+
+    def seconds_until_due(self, now=None):
+        """
+        Get the seconds until the next key is released, or None when nothing is pending.
+        """
+        if not self.pending:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, min(self.due_at(key) for key in self.pending) - now)
+
+    def pop_due(self, now=None):
+        """
+        Remove and return the sorted keys that are due.
+        """
+        now = time.monotonic() if now is None else now
+        due_keys = sorted(key for key in self.pending if self.due_at(key) <= now)
+        for key in due_keys:
+            del self.pending[key]
+        return due_keys
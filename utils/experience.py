@@ -0,0 +1,119 @@
+from array import array
+from datetime import date
+from functools import lru_cache
+
+
+# End values of roles the applicant still holds, counted up to today
+OPEN_ENDED_VALUES = frozenset({"", "present", "current", "now", "ongoing"})
+
+# Distinct experience lists kept summarized, so shortlisting and prompt building in one run share the work
+SUMMARY_CACHE_SIZE = 65536
+
+# Distinct date values kept parsed. Valid dates of a century fit, while malformed values cannot grow the cache without bound
+DATE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_iso_date(value):
+    """
+    Parse a YYYY-MM-DD date once per distinct value, or None if it is not a valid date.
+    """
+    try:
+        return date.fromisoformat(value.strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+def is_open_ended(value):
+    """
+    Check if an experience end value marks a role the applicant still holds.
+    """
+    return value is None or (isinstance(value, str) and value.strip().casefold() in OPEN_ENDED_VALUES)
+
+
+def get_span(start, end, today):
+    """
+    Get the (start, end) dates of an experience row, open-ended rows running up to today.
+    Returns None for rows without a valid start or end, or ending before they start, which cannot be placed on the timeline.
+    """
+    start_date = parse_iso_date(start)
+    end_date = today if is_open_ended(end) else parse_iso_date(end)
+    if start_date is None or end_date is None or end_date < start_date:
+        return None
+    return start_date, end_date
+
+
+def merge_intervals_days(intervals):
+    """
+    Count the days covered by (start, end) date intervals, merging overlapping intervals with a sort and sweep.
+    """
+    total_days = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total_days += (current_end - current_start).days
+            current_start, current_end = start, end
+        elif end > current_end:
+            current_end = end
+    if current_end is not None:
+        total_days += (current_end - current_start).days
+    return total_days
+
+
+def merge_span_columns(owners, starts, ends, owner_count):
+    """
+    Count the days covered by the spans of every owner, given as parallel columns of owner index, start and end ordinals.
+    Overlapping spans are merged with one sort and sweep over the whole population, as merge_intervals_days does per owner.
+    Returns an array of days indexed by owner.
+    """
+    days = array("l", [0]) * owner_count
+    current_owner = current_start = current_end = None
+    for owner, start, end in sorted(zip(owners, starts, ends)):
+        if owner != current_owner or start > current_end:
+            if current_owner is not None:
+                days[current_owner] += current_end - current_start
+            current_owner, current_start, current_end = owner, start, end
+        elif end > current_end:
+            current_end = end
+    if current_owner is not None:
+        days[current_owner] += current_end - current_start
+    return days
+
+
+@lru_cache(maxsize=SUMMARY_CACHE_SIZE)
+def summarize_rows(rows, tier_1_companies, today):
+    """
+    Summarize (company, start, end) rows, see summarize_experience.
+    """
+    intervals = []
+    tier_1_intervals = []
+    matched_tier_1_companies = []
+    for company, start, end in rows:
+        is_tier_1 = company.casefold() in tier_1_companies
+        if is_tier_1:
+            matched_tier_1_companies.append(company)
+
+        span = get_span(start, end, today)
+        if span is None:
+            continue
+        intervals.append(span)
+        if is_tier_1:
+            tier_1_intervals.append(span)
+
+    return {
+        "total_years": merge_intervals_days(intervals) / 365.0,
+        "tier_1_years": merge_intervals_days(tier_1_intervals) / 365.0,
+        "tier_1_companies": tuple(matched_tier_1_companies),
+    }
+
+
+def summarize_experience(experiences, tier_1_companies=frozenset(), today=None):
+    """
+    Aggregate the experience dicts of an applicant into total_years and tier_1_years,
+    counting overlapping roles once and open-ended roles up to today.
+    tier_1_companies is a frozenset of casefolded company names; the matched companies are returned in tier_1_companies.
+    Summaries are cached by their rows, so the same applicant is only aggregated once per day.
+    """
+    rows = tuple((experience.get("company") or "", experience.get("start"), experience.get("end")) for experience in experiences)
+    return summarize_rows(rows, tier_1_companies, today or date.today())
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_results.sqlite")
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+def build_cache_key(prompt_version, model, temperature, compressed_json):
+    """
+    Build a content address for an LLM evaluation from everything that affects its result.
+    """
+    key_source = json.dumps([prompt_version, model, temperature, compressed_json])
+    return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent SQLite cache mapping a content address to the raw LLM response and parsed result.
+    Entries older than max_age_days or beyond max_entries (least recently used first) are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+        # Async evaluation looks results up and stores them on its single helper thread while the main thread waits
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_results (
+                cache_key TEXT PRIMARY KEY,
+                raw_response TEXT NOT NULL,
+                llm_result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_llm_results_last_used_at ON llm_results (last_used_at)")
+        self.evict()
+
+    def get(self, cache_key):
+        """
+        Return (raw_response, llm_result) for a cache key, or None on a miss.
+        """
+        row = self.connection.execute(
+            "SELECT raw_response, llm_result, created_at FROM llm_results WHERE cache_key = ?",
+            (cache_key,)
+        ).fetchone()
+
+        if row is None or time.time() - row[2] > self.max_age_seconds:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute(
+            "UPDATE llm_results SET last_used_at = ? WHERE cache_key = ?",
+            (time.time(), cache_key)
+        )
+        return row[0], json.loads(row[1])
+
+    def put(self, cache_key, raw_response, llm_result):
+        """
+        Store the raw response and parsed result for a cache key.
+        """
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO llm_results VALUES (?, ?, ?, ?, ?)",
+            (cache_key, raw_response, json.dumps(llm_result), now, now)
+        )
+        self.connection.commit()
+
+    def evict(self):
+        """
+        Remove expired entries and trim the cache to max_entries.
+        """
+        self.connection.execute(
+            "DELETE FROM llm_results WHERE created_at < ?",
+            (time.time() - self.max_age_seconds,)
+        )
+        self.connection.execute(
+            """
+            DELETE FROM llm_results WHERE cache_key IN (
+                SELECT cache_key FROM llm_results ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+        self.connection.commit()
+
+    def close(self):
+        """
+        Evict stale entries, persist pending updates and close the database.
+        """
+        self.evict()
+        self.connection.close()
+        print(f"LLM cache hits: {self.hits}, misses: {self.misses}")
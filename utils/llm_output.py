@@ -0,0 +1,237 @@
+import re
+from utils.metrics import increment, timed
+from utils.models import decode_json, encode_json
+
+
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "score": {"type": "integer", "minimum": 1, "maximum": 10},
+        "issues": {"type": "array", "items": {"type": "string"}},
+        "follow_ups": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["summary", "score", "issues", "follow_ups"],
+    "additionalProperties": False,
+}
+
+BATCH_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                **EVALUATION_SCHEMA,
+                "properties": {"applicant_id": {"type": "string"}, **EVALUATION_SCHEMA["properties"]},
+                "required": ["applicant_id", *EVALUATION_SCHEMA["required"]],
+            },
+        },
+    },
+    "required": ["results"],
+    "additionalProperties": False,
+}
+
+JSON_TYPES = {"string": str, "integer": int, "number": (int, float), "boolean": bool}
+
+# Section headers of the legacy text format, tolerating markdown decoration and case drift
+LEGACY_SECTION_PATTERN = re.compile(r"^[\s>#*]*(summary|score|issues|follow[- ]?ups?)[\s*]*:[\s*]*", re.IGNORECASE | re.MULTILINE)
+LEGACY_SCORE_PATTERN = re.compile(r"\d+")
+
+
+def build_response_format(name, schema):
+    """
+    Build a strict JSON-schema response_format for chat completions.
+    """
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def compile_validator(schema):
+    """
+    Compile the JSON schema subset used here (type, properties, required, additionalProperties, items,
+    minimum and maximum) into a function returning the first validation error, or None for valid values.
+    """
+    schema_type = schema.get("type")
+
+    if schema_type == "object":
+        property_validators = {name: compile_validator(property_schema) for name, property_schema in schema.get("properties", {}).items()}
+        required = schema.get("required", [])
+        closed = schema.get("additionalProperties") is False
+
+        def validate_object(value, path="$"):
+            if not isinstance(value, dict):
+                return f"{path} is not an object"
+            for name in required:
+                if name not in value:
+                    return f"{path}.{name} is missing"
+            for name, item in value.items():
+                if name in property_validators:
+                    error = property_validators[name](item, f"{path}.{name}")
+                    if error:
+                        return error
+                elif closed:
+                    return f"{path}.{name} is not allowed"
+            return None
+        return validate_object
+
+    if schema_type == "array":
+        validate_item = compile_validator(schema.get("items", {}))
+
+        def validate_array(value, path="$"):
+            if not isinstance(value, list):
+                return f"{path} is not an array"
+            for index, item in enumerate(value):
+                error = validate_item(item, f"{path}[{index}]")
+                if error:
+                    return error
+            return None
+        return validate_array
+
+    expected_type = JSON_TYPES.get(schema_type)
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+
+    def validate_scalar(value, path="$"):
+        if expected_type is None:
+            return None
+        if not isinstance(value, expected_type) or (isinstance(value, bool) and schema_type != "boolean"):
+            return f"{path} is not of type {schema_type}"
+        if minimum is not None and value < minimum:
+            return f"{path} is below {minimum}"
+        if maximum is not None and value > maximum:
+            return f"{path} is above {maximum}"
+        return None
+    return validate_scalar
+
+
+SINGLE_RESPONSE_FORMAT = build_response_format("applicant_evaluation", EVALUATION_SCHEMA)
+BATCH_RESPONSE_FORMAT = build_response_format("applicant_evaluations", BATCH_EVALUATION_SCHEMA)
+
+validate_evaluation = compile_validator(EVALUATION_SCHEMA)
+validate_batch_evaluation = compile_validator(BATCH_EVALUATION_SCHEMA["properties"]["results"]["items"])
+
+
+def to_llm_result(evaluation):
+    """
+    Convert a schema-valid evaluation into the Applicants LLM fields.
+    """
+    return {
+        "LLM Summary": evaluation["summary"].strip(),
+        "LLM Score": evaluation["score"],
+        "LLM Follow-Ups": "\n".join(f"- {follow_up.strip()}" for follow_up in evaluation["follow_ups"][:3]),
+    }
+
+
+def parse_structured_response(response):
+    """
+    Parse a JSON-schema structured response, or return None when it is not valid.
+    """
+    try:
+        evaluation = decode_json(response)
+    except Exception as ex:
+        print(f"Failed to decode structured response: {ex}")
+        return None
+
+    error = validate_evaluation(evaluation)
+    if error or not evaluation["summary"].strip():
+        print(f"Structured response does not match the schema: {error or '$.summary is empty'}")
+        return None
+    return to_llm_result(evaluation)
+
+
+def parse_legacy_response(response):
+    """
+    Parse a "Summary: / Score: / Issues: / Follow-Ups:" text response in a single pass,
+    or return None when the summary or a 1-10 score is missing.
+    """
+    sections = {}
+    matches = list(LEGACY_SECTION_PATTERN.finditer(response))
+    for match, next_match in zip(matches, matches[1:] + [None]):
+        section = match.group(1).lower().replace(" ", "-").rstrip("s")
+        sections.setdefault(section, response[match.end():next_match.start() if next_match else len(response)].strip())
+
+    score = LEGACY_SCORE_PATTERN.search(sections.get("score", ""))
+    if not sections.get("summary") or score is None or not 1 <= int(score.group()) <= 10:
+        print("Text response is missing a summary or a 1-10 score")
+        return None
+
+    return {
+        "LLM Summary": sections["summary"],
+        "LLM Score": int(score.group()),
+        "LLM Follow-Ups": sections.get("follow-up", sections.get("followup", "")),
+    }
+
+
+@timed("llm.parse_evaluation_response")
+def parse_evaluation_response(response):
+    """
+    Parse a single-applicant response, structured JSON first and the legacy text format otherwise.
+    """
+    if response.lstrip().startswith("{"):
+        return parse_structured_response(response)
+    return parse_legacy_response(response)
+
+
+def parse_batch_response(response, applicant_ids):
+    """
+    Parse a batched response into {applicant_id: (item_json, llm_result)} for the requested applicants.
+    Applicants missing from the response or with invalid results are left out, so callers can fall back to single calls.
+    """
+    try:
+        items = decode_json(response)["results"]
+    except Exception as ex:
+        print(f"Failed to parse batched response: {ex}")
+        return {}
+    if not isinstance(items, list):
+        return {}
+
+    applicant_ids = set(applicant_ids)
+    llm_results = {}
+    for item in items:
+        if validate_batch_evaluation(item) or not item["summary"].strip():
+            continue
+        applicant_id = item["applicant_id"]
+        if applicant_id in applicant_ids and applicant_id not in llm_results:
+            llm_results[applicant_id] = (encode_json(item), to_llm_result(item))
+    return llm_results
+
+
+class ParseMetrics:
+    """
+    Count parsed LLM responses, parse failures and re-asks to expose the parse-failure rate of a run.
+    """
+
+    def __init__(self):
+        self.responses = 0
+        self.failures = 0
+        self.reasks = 0
+        self.reask_failures = 0
+
+    def record(self, llm_result, reask=False):
+        """
+        Record the outcome of parsing a response, also counting it in the run metrics.
+        """
+        if reask:
+            self.reasks += 1
+            self.reask_failures += llm_result is None
+            increment("llm.reasks")
+            if llm_result is None:
+                increment("llm.reask_failures")
+        else:
+            self.responses += 1
+            self.failures += llm_result is None
+            increment("llm.responses")
+            if llm_result is None:
+                increment("llm.parse_failures")
+
+    @property
+    def failure_rate(self):
+        return self.failures / self.responses if self.responses else 0.0
+
+    def report(self):
+        """
+        Print the parse-failure rate and re-ask outcomes.
+        """
+        print(
+            f"LLM parse failures: {self.failures} of {self.responses} responses ({self.failure_rate:.1%}), "
+            f"re-asks: {self.reasks}, failed re-asks: {self.reask_failures}"
+        )
@@ -0,0 +1,304 @@
+import atexit
+import cProfile
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from functools import wraps
+from utils.atomic_io import write_json_atomically, write_text_atomically
+
+
+# Timers count durations in buckets growing by 5% from a microsecond, so a timer holds at most a few hundred
+# buckets however many durations it records, and its quantiles are within 5% of the exact values
+BUCKET_GROWTH = 1.05
+MIN_BUCKET_SECONDS = 1e-6
+
+
+def get_bucket(seconds):
+    """
+    Get the histogram bucket of a duration, the smallest index whose upper bound covers it.
+    """
+    if seconds <= MIN_BUCKET_SECONDS:
+        return 0
+    return math.ceil(math.log(seconds / MIN_BUCKET_SECONDS, BUCKET_GROWTH))
+
+
+def get_bucket_upper_bound(bucket):
+    """
+    Get the largest duration counted in a histogram bucket.
+    """
+    return MIN_BUCKET_SECONDS * BUCKET_GROWTH ** bucket
+
+
+def get_quantile(timer, quantile):
+    """
+    Estimate a quantile of a timer's durations from its histogram, as the upper bound of the bucket holding it.
+    """
+    rank = int(quantile * (timer["count"] - 1))
+    seen = 0
+    for bucket in sorted(timer["buckets"]):
+        seen += timer["buckets"][bucket]
+        if seen > rank:
+            return min(get_bucket_upper_bound(bucket), timer["max"])
+    return timer["max"]
+
+
+class Metrics:
+    """
+    Process-wide timers, counters and JSON-lines events of a run.
+    Disabled by default, in which case every hook returns after checking the enabled flag.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        # Timer name -> count, total and max seconds and a histogram of bucket -> durations
+        self.timers = {}
+        self.counters = Counter()
+        self.run_name = None
+        self.started_at = None
+        self.events_file = None
+        self.summary_path = None
+        self.prometheus_path = None
+        self.profiler = None
+        self.profile_path = None
+
+    def get_timer(self, name):
+        """
+        Get the record of a timer, creating it empty. Callers hold the lock.
+        """
+        if name not in self.timers:
+            self.timers[name] = {"count": 0, "total": 0.0, "max": 0.0, "buckets": Counter()}
+        return self.timers[name]
+
+    def observe(self, name, seconds):
+        """
+        Record one duration of a timer.
+        """
+        bucket = get_bucket(seconds)
+        with self.lock:
+            timer = self.get_timer(name)
+            timer["count"] += 1
+            timer["total"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+            timer["buckets"][bucket] += 1
+
+    def increment(self, name, value=1):
+        """
+        Add to a counter.
+        """
+        with self.lock:
+            self.counters[name] += value
+
+    def drain(self):
+        """
+        Take the timers and counters recorded so far, resetting them, e.g. to send them from a worker process.
+        """
+        with self.lock:
+            drained = {"timers": self.timers, "counters": dict(self.counters)}
+            self.timers = {}
+            self.counters = Counter()
+        return drained
+
+    def merge(self, drained):
+        """
+        Add timers and counters taken with drain, e.g. in a worker process, to this process's.
+        """
+        with self.lock:
+            for name, drained_timer in drained["timers"].items():
+                timer = self.get_timer(name)
+                timer["count"] += drained_timer["count"]
+                timer["total"] += drained_timer["total"]
+                timer["max"] = max(timer["max"], drained_timer["max"])
+                timer["buckets"].update(drained_timer["buckets"])
+            self.counters.update(drained["counters"])
+
+    def log_event(self, event, fields):
+        """
+        Append one JSON line to the events log.
+        """
+        if self.events_file is None:
+            return
+        line = json.dumps({"time": time.time(), "run": self.run_name, "event": event, **fields})
+        with self.lock:
+            self.events_file.write(line + "\n")
+
+    def build_summary(self):
+        """
+        Summarize the timers and counters of the run.
+        """
+        with self.lock:
+            recorded_timers = {name: dict(timer, buckets=Counter(timer["buckets"])) for name, timer in self.timers.items()}
+            counters = dict(self.counters)
+
+        timers = {}
+        for name, timer in sorted(recorded_timers.items()):
+            timers[name] = {
+                "count": timer["count"],
+                "total_seconds": round(timer["total"], 6),
+                "mean_ms": round(timer["total"] / timer["count"] * 1000, 3),
+                "p50_ms": round(get_quantile(timer, 0.5) * 1000, 3),
+                "p99_ms": round(get_quantile(timer, 0.99) * 1000, 3),
+                "max_ms": round(timer["max"] * 1000, 3),
+            }
+        return {
+            "run": self.run_name,
+            "started_at": datetime.fromtimestamp(self.started_at[0], timezone.utc).isoformat(),
+            "wall_seconds": round(time.perf_counter() - self.started_at[1], 3),
+            "timers": timers,
+            "counters": dict(sorted(counters.items())),
+        }
+
+    def write_prometheus(self, summary):
+        """
+        Write the summary in the Prometheus textfile collector format.
+        """
+        labels = f'run="{self.run_name}"'
+        lines = [
+            "# TYPE pipeline_run_seconds gauge",
+            f"pipeline_run_seconds{{{labels}}} {summary['wall_seconds']}",
+            "# TYPE pipeline_timer_seconds summary",
+        ]
+        for name, timer in summary["timers"].items():
+            lines.append(f'pipeline_timer_seconds_count{{{labels},timer="{name}"}} {timer["count"]}')
+            lines.append(f'pipeline_timer_seconds_sum{{{labels},timer="{name}"}} {timer["total_seconds"]}')
+            lines.append(f'pipeline_timer_seconds{{{labels},timer="{name}",quantile="0.99"}} {round(timer["p99_ms"] / 1000, 6)}')
+        lines.append("# TYPE pipeline_events_total counter")
+        for name, value in summary["counters"].items():
+            lines.append(f'pipeline_events_total{{{labels},counter="{name}"}} {value}')
+
+        # Written aside and renamed so the collector never reads a partial file
+        write_text_atomically(self.prometheus_path, "\n".join(lines) + "\n")
+
+    def finish(self):
+        """
+        Write the run summary, Prometheus textfile and profile, and close the events log.
+        """
+        if not self.enabled:
+            return
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+            print(f"Profile written to {self.profile_path}")
+
+        summary = self.build_summary()
+        if self.summary_path:
+            write_json_atomically(self.summary_path, summary)
+            print(f"Run summary written to {self.summary_path}")
+        if self.prometheus_path:
+            self.write_prometheus(summary)
+
+        self.log_event("run_finished", {"wall_seconds": summary["wall_seconds"]})
+        if self.events_file is not None:
+            self.events_file.close()
+            self.events_file = None
+        self.enabled = False
+
+
+metrics = Metrics()
+
+
+def configure_metrics(run_name, metrics_dir=None, prometheus_path=None, profile_path=None):
+    """
+    Enable metrics for a run when any output is requested. With metrics_dir, events are logged to
+    {run_name}.events.jsonl and the summary written to {run_name}.summary.json there on exit.
+    The profile only covers the main thread.
+    """
+    if not (metrics_dir or prometheus_path or profile_path):
+        return
+
+    metrics.enabled = True
+    metrics.run_name = run_name
+    metrics.started_at = (time.time(), time.perf_counter())
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        metrics.events_file = open(os.path.join(metrics_dir, f"{run_name}.events.jsonl"), "a", buffering=1)
+        metrics.summary_path = os.path.join(metrics_dir, f"{run_name}.summary.json")
+    metrics.prometheus_path = prometheus_path
+    if profile_path:
+        metrics.profile_path = profile_path
+        metrics.profiler = cProfile.Profile()
+        metrics.profiler.enable()
+
+    atexit.register(metrics.finish)
+    log_event("run_started")
+
+
+def add_metrics_arguments(parser):
+    """
+    Add the metrics options shared by all scripts to an argument parser.
+    """
+    parser.add_argument(
+        "--metrics-dir",
+        metavar="PATH",
+        help="Log timings and request counters as JSON lines to this directory and write a run summary there."
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        metavar="PATH",
+        help="Write the run metrics to a Prometheus textfile collector file."
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Profile the run with cProfile and dump the stats to this file."
+    )
+
+
+def start_metrics(run_name, args):
+    """
+    Configure metrics from the parsed metrics options of a script.
+    """
+    configure_metrics(run_name, args.metrics_dir, args.prometheus_textfile, args.profile)
+
+
+def timed(name):
+    """
+    Decorate a function, sync or async, to record its duration under a timer name.
+    """
+
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if not metrics.enabled:
+                    return await function(*args, **kwargs)
+                started_at = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    metrics.observe(name, time.perf_counter() - started_at)
+            return async_wrapper
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return function(*args, **kwargs)
+            started_at = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - started_at)
+        return wrapper
+
+    return decorator
+
+
+def increment(name, value=1):
+    """
+    Add to a counter when metrics are enabled.
+    """
+    if metrics.enabled:
+        metrics.increment(name, value)
+
+
+def log_event(event, **fields):
+    """
+    Log a structured event when metrics are enabled.
+    """
+    if metrics.enabled:
+        metrics.log_event(event, fields)
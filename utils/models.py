@@ -0,0 +1,137 @@
+import json
+from dataclasses import dataclass, field, fields
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_json(data):
+    """
+    Encode data as compact JSON text, using orjson when it is installed.
+    Both paths produce the same compact separators so stored values do not flap between machines.
+    """
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode_json(text):
+    """
+    Decode JSON text, using orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def from_known_fields(cls, data):
+    """
+    Build a dataclass from the keys of a dict it declares, ignoring unknown keys.
+    """
+    return cls(**{model_field.name: data.get(model_field.name) for model_field in fields(cls)})
+
+
+def without_missing(data):
+    """
+    Drop keys whose value is None so optional fields round-trip unchanged.
+    """
+    return {key: value for key, value in data.items() if value is not None}
+
+
+@dataclass(slots=True)
+class PersonalDetails:
+    name: Optional[str] = None
+    location: Optional[str] = None
+    email: Optional[str] = None
+    linkedin: Optional[str] = None
+
+    def to_dict(self):
+        return without_missing({"name": self.name, "location": self.location, "email": self.email, "linkedin": self.linkedin})
+
+
+@dataclass(slots=True)
+class Experience:
+    company: Optional[str] = None
+    title: Optional[str] = None
+    start: Optional[str] = None
+    end: Optional[str] = None
+    technologies: Optional[list] = None
+
+    def to_dict(self):
+        return without_missing({
+            "company": self.company,
+            "title": self.title,
+            "start": self.start,
+            "end": self.end,
+            "technologies": self.technologies,
+        })
+
+
+@dataclass(slots=True)
+class SalaryPreference:
+    rate: Optional[float] = None
+    min_rate: Optional[float] = None
+    currency: Optional[str] = None
+    availability: Optional[int] = None
+
+    def to_dict(self):
+        return without_missing({"rate": self.rate, "min_rate": self.min_rate, "currency": self.currency, "availability": self.availability})
+
+
+@dataclass(slots=True)
+class Profile:
+    """
+    Typed form of the Compressed JSON of an applicant.
+    """
+    personal: Optional[PersonalDetails] = None
+    experience: list = field(default_factory=list)
+    salary: Optional[SalaryPreference] = None
+
+    @classmethod
+    def from_dict(cls, data):
+        personal = data.get("personal") or None
+        salary = data.get("salary") or None
+        return cls(
+            personal=from_known_fields(PersonalDetails, personal) if personal else None,
+            experience=[from_known_fields(Experience, experience) for experience in data.get("experience") or []],
+            salary=from_known_fields(SalaryPreference, salary) if salary else None,
+        )
+
+    def to_dict(self):
+        return {
+            "personal": self.personal.to_dict() if self.personal else {},
+            "experience": [experience.to_dict() for experience in self.experience],
+            "salary": self.salary.to_dict() if self.salary else {},
+        }
+
+
+@dataclass(slots=True)
+class RecordPatch:
+    """
+    Field-level update of an Airtable record, used instead of copying whole records.
+    """
+    record_id: str
+    fields: dict = field(default_factory=dict)
+
+    def to_record(self):
+        return {"id": self.record_id, "fields": self.fields}
+
+
+@dataclass(slots=True)
+class Applicant:
+    """
+    In-memory applicant carrying its stored Compressed JSON, parsed profile and pending field updates.
+    """
+    record_id: str
+    applicant_id: str
+    shortlist_status: Optional[str] = None
+    compressed_json: Optional[str] = None
+    profile: Optional[Profile] = None
+    patch: Optional[RecordPatch] = None
+
+    def __post_init__(self):
+        if self.patch is None:
+            self.patch = RecordPatch(self.record_id)
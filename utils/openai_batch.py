@@ -0,0 +1,122 @@
+import json
+import os
+import time
+from utils.atomic_io import write_json_atomically
+from utils.openai_operations import build_completion_options
+
+
+DEFAULT_BATCH_STATE_PATH = os.path.join(".cache", "openai_batches.json")
+DEFAULT_BATCH_INPUT_DIR = os.path.join(".cache", "openai_batches")
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+
+# The Batch API accepts at most 50,000 requests per input file
+MAX_REQUESTS_PER_BATCH = 50000
+
+# Statuses after which a batch will not change anymore
+FINISHED_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_request_line(custom_id, prompt, response_format=None):
+    """
+    Build one line of a Batch API input file for a chat completion prompt.
+    """
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": build_completion_options(prompt, response_format=response_format),
+    }
+
+
+def write_batch_input(path, request_lines):
+    """
+    Write Batch API request lines to a JSONL file.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "w") as batch_file:
+        for request_line in request_lines:
+            batch_file.write(json.dumps(request_line) + "\n")
+
+
+def parse_batch_output(text):
+    """
+    Parse a Batch API output file into {custom_id: completion content}.
+    Failed requests map to None.
+    """
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        output_line = json.loads(line)
+        response = output_line.get("response") or {}
+        if output_line.get("error") or response.get("status_code") != 200:
+            print(f"Batch request {output_line.get('custom_id')} failed: {output_line.get('error') or response.get('body')}")
+            results[output_line["custom_id"]] = None
+            continue
+        results[output_line["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return results
+
+
+def load_batch_state(path=DEFAULT_BATCH_STATE_PATH):
+    """
+    Load the persisted batch jobs, or an empty state when none were submitted.
+    """
+    if not os.path.exists(path):
+        return {"jobs": []}
+    with open(path) as state_file:
+        return json.load(state_file)
+
+
+def save_batch_state(state, path=DEFAULT_BATCH_STATE_PATH):
+    """
+    Atomically persist the batch jobs so an interrupted run can resume them.
+    """
+    write_json_atomically(path, state)
+
+
+def upload_batch_input(client, path):
+    """
+    Upload a JSONL input file for the Batch API and return its file id.
+    """
+    with open(path, "rb") as batch_file:
+        return client.files.create(file=batch_file, purpose="batch").id
+
+
+def create_batch(client, input_file_id):
+    """
+    Create a batch for an uploaded input file and return its batch id.
+    """
+    return client.batches.create(
+        input_file_id=input_file_id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=COMPLETION_WINDOW
+    ).id
+
+
+def wait_for_batch(client, batch_id, poll_interval):
+    """
+    Poll a batch until it finishes and return it.
+    """
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in FINISHED_STATUSES:
+            return batch
+
+        counts = batch.request_counts
+        progress = f" ({counts.completed + counts.failed}/{counts.total} requests)" if counts else ""
+        print(f"Batch {batch_id} is {batch.status}{progress}, checking again in {poll_interval}s")
+        time.sleep(poll_interval)
+
+
+def download_batch_output(client, batch):
+    """
+    Download the output of a finished batch. Expired batches may hold partial output.
+    """
+    if not batch.output_file_id:
+        return ""
+    return client.files.content(batch.output_file_id).text
@@ -0,0 +1,204 @@
+import asyncio
+import random
+import re
+import time
+from functools import lru_cache
+from utils.config_loader import settings
+from utils.metrics import increment, metrics, timed
+
+
+# Completion settings shared by every evaluation mode
+MODEL = "gpt-4o-mini"
+MAX_TOKENS = 1000
+TEMPERATURE = 0.3
+
+# Rough characters per token, used to budget prompts before sending them
+CHARS_PER_TOKEN = 4
+
+RESET_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+RESET_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset_duration(value):
+    """
+    Parse an OpenAI rate-limit reset duration such as '1s', '6m0s' or '20ms' into seconds.
+    """
+    if not value:
+        return 0.0
+    return sum(float(amount) * RESET_DURATION_UNITS[unit] for amount, unit in RESET_DURATION_PATTERN.findall(value))
+
+
+@lru_cache(maxsize=1)
+def get_token_encoding():
+    """
+    Get the tiktoken encoding of the model, or None when tiktoken is not installed or cannot load it.
+    tiktoken is imported here rather than at module load since it is slow to import.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(MODEL)
+    except Exception as ex:
+        print(f"Falling back to estimated token counts: {ex}")
+        return None
+
+
+def count_tokens(text):
+    """
+    Count the tokens of a text, exactly with tiktoken when it is installed and estimated from its length otherwise.
+    """
+    encoding = get_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_tokens(prompt, max_tokens=MAX_TOKENS):
+    """
+    Estimate the tokens consumed by a prompt and its completion.
+    """
+    return count_tokens(prompt) + max_tokens
+
+
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """
+    Get the OpenAI client shared by a run, importing openai and reading OPENAI_API_KEY on first use.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+def create_async_openai_client():
+    """
+    Create an async OpenAI client, to be closed by the caller.
+    """
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+def build_completion_options(prompt, max_tokens=MAX_TOKENS, response_format=None):
+    """
+    Build the chat completion arguments shared by the sync and async clients.
+    """
+    options = {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": TEMPERATURE,
+    }
+    if response_format is not None:
+        options["response_format"] = response_format
+    return options
+
+
+class RateLimitBudget:
+    """
+    Track the request and token budget reported by OpenAI rate-limit response headers.
+    Callers wait before sending whenever the remaining budget cannot cover their request.
+    """
+
+    def __init__(self, min_remaining_requests=1):
+        self.min_remaining_requests = min_remaining_requests
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.paused_until = 0.0
+
+    def update(self, headers):
+        """
+        Update the budget from the x-ratelimit-* headers of a response.
+        """
+        now = time.monotonic()
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+
+        if remaining_requests is not None:
+            self.remaining_requests = int(remaining_requests)
+            self.requests_reset_at = now + parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+        if remaining_tokens is not None:
+            self.remaining_tokens = int(remaining_tokens)
+            self.tokens_reset_at = now + parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+
+    def pause(self, seconds):
+        """
+        Hold every caller back for the given number of seconds, e.g. after a 429.
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def delay_for(self, estimated_tokens):
+        """
+        Seconds to wait before a request of the estimated size fits in the budget.
+        """
+        now = time.monotonic()
+        delay = self.paused_until - now
+
+        if self.remaining_requests is not None and self.remaining_requests <= self.min_remaining_requests:
+            delay = max(delay, self.requests_reset_at - now)
+        if self.remaining_tokens is not None and self.remaining_tokens < estimated_tokens:
+            delay = max(delay, self.tokens_reset_at - now)
+
+        return max(delay, 0.0)
+
+    async def acquire(self, estimated_tokens):
+        """
+        Wait until the budget can cover the request, then reserve it.
+        """
+        delay = self.delay_for(estimated_tokens)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.delay_for(estimated_tokens)
+
+        if self.remaining_requests is not None:
+            self.remaining_requests -= 1
+        if self.remaining_tokens is not None:
+            self.remaining_tokens -= estimated_tokens
+
+
+def record_usage(response):
+    """
+    Count the requests and tokens of a completion in the run metrics.
+    """
+    if metrics.enabled:
+        metrics.increment("openai.requests")
+        if response.usage is not None:
+            metrics.increment("openai.prompt_tokens", response.usage.prompt_tokens)
+            metrics.increment("openai.completion_tokens", response.usage.completion_tokens)
+
+
+@timed("openai.call_openai_api_async")
+async def call_openai_api_async(async_client, prompt, budget, retries=3, max_tokens=MAX_TOKENS, response_format=None):
+    """
+    Call the OpenAI API asynchronously within the rate-limit budget, retrying with jittered backoff.
+    """
+    from openai import RateLimitError
+
+    estimated_tokens = estimate_tokens(prompt, max_tokens)
+    for i in range(retries):
+        await budget.acquire(estimated_tokens)
+        try:
+            raw_response = await async_client.chat.completions.with_raw_response.create(
+                **build_completion_options(prompt, max_tokens, response_format)
+            )
+            budget.update(raw_response.headers)
+            response = raw_response.parse()
+            record_usage(response)
+            return response.choices[0].message.content
+
+        except RateLimitError as ex:
+            print(f"OpenAI API rate limited: {ex}")
+            increment("openai.rate_limited")
+            budget.update(ex.response.headers)
+            retry_after = ex.response.headers.get("retry-after")
+            budget.pause(float(retry_after) if retry_after else 2 ** i)
+
+        except Exception as ex:
+            print(f"OpenAI API error: {ex}")
+            increment("openai.errors")
+
+        await asyncio.sleep(random.uniform(0, 2 ** i))
+
+    return None
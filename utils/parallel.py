@@ -0,0 +1,74 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from utils.metrics import metrics
+from utils.streaming import iter_chunks
+
+
+# Items per task, large enough to amortize sending records to and from the workers
+DEFAULT_CHUNK_SIZE = 500
+
+# Chunks queued per worker, keeping workers busy while bounding the records in flight
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+def get_process_context():
+    """
+    Get the start method of worker processes. Forked workers copy the locks held by the parent's threads,
+    such as the --stream fetcher or the metrics lock, and can deadlock on them, so workers are started from a
+    fork server where available and spawned otherwise.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def init_worker(collect_metrics, initializer, initargs):
+    """
+    Enable metrics in a worker when the parent records them, then run the caller's initializer.
+    """
+    metrics.enabled = collect_metrics
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def run_chunk(function, chunk):
+    """
+    Apply function to a chunk in a worker and return its result with the timers and counters recorded meanwhile.
+    """
+    result = function(chunk)
+    return result, metrics.drain() if metrics.enabled else None
+
+
+def collect_chunk(chunk, future):
+    """
+    Wait for the result of a chunk, merging the metrics its worker recorded.
+    """
+    result, worker_metrics = future.result()
+    if worker_metrics is not None:
+        metrics.merge(worker_metrics)
+    return chunk, result
+
+
+def map_chunks_in_processes(function, items, workers, chunk_size=DEFAULT_CHUNK_SIZE, initializer=None, initargs=()):
+    """
+    Apply function to chunks of items in a pool of worker processes and yield (chunk, result) in submission order,
+    so merged results are the same whatever the number of workers.
+    Items are consumed lazily with a few chunks per worker in flight. initializer runs once in each worker,
+    so read-only state passed through initargs is sent once per worker instead of with every chunk.
+    Timers and counters recorded by the workers are merged into the metrics of the run.
+    """
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_process_context(),
+        initializer=init_worker,
+        initargs=(metrics.enabled, initializer, initargs)
+    ) as executor:
+        pending = deque()
+        for chunk in iter_chunks(items, chunk_size):
+            pending.append((chunk, executor.submit(run_chunk, function, chunk)))
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                yield collect_chunk(*pending.popleft())
+
+        while pending:
+            yield collect_chunk(*pending.popleft())
+
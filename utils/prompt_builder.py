@@ -0,0 +1,119 @@
+from utils.experience import summarize_experience
+from utils.models import decode_json, encode_json
+from utils.openai_operations import count_tokens
+from utils.rule_engine import RuleEngine
+
+
+# Shortlist rules, read for the Tier-1 companies counted in the experience summary
+RULE_ENGINE = RuleEngine()
+
+
+# Upper bounds on prompt size, so one oversized profile cannot blow up token spend
+MAX_PROFILE_TOKENS = 1500
+MAX_PROMPT_TOKENS = 6000
+
+# Completion tokens reserved per applicant in a batched prompt
+BATCH_MAX_TOKENS_PER_APPLICANT = 350
+
+SINGLE_INSTRUCTIONS = """Evaluate this applicant profile as a recruiting analyst. Reply in JSON with a summary of max 75 words,
+a score from 1-10 (higher is better), the data gaps or inconsistencies as issues (empty if none)
+and up to 3 follow_ups questions clarifying the gaps.
+Profile:"""
+
+# Re-asks only send back the unparseable answer, not the profile, and need few completion tokens
+REASK_INSTRUCTIONS = """Rewrite this applicant evaluation as JSON with summary, score (integer 1-10), issues and follow_ups,
+keeping its content:"""
+REASK_MAX_TOKENS = 400
+MAX_REASK_CHARS = 4000
+
+BATCH_INSTRUCTIONS = """Evaluate each applicant profile below as a recruiting analyst.
+For every applicant return its applicant_id, a summary of max 75 words, a score from 1-10 (higher is better),
+the data gaps or inconsistencies as issues (empty if none) and up to 3 follow_ups questions clarifying the gaps.
+Applicants, one per line as the applicant_id, a tab and the profile JSON:"""
+
+
+def drop_empty(value):
+    """
+    Recursively drop empty strings, lists, dicts and None values, which only cost tokens.
+    """
+    if isinstance(value, dict):
+        value = {key: drop_empty(item) for key, item in value.items()}
+        return {key: item for key, item in value.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [drop_empty(item) for item in value if item not in (None, "", [], {})]
+    return value
+
+
+def add_experience_summary(profile):
+    """
+    Add the total and Tier-1 years of experience, with overlapping roles counted once, so the model does not add up dates.
+    Uses the same cached aggregation as shortlisting.
+    """
+    experiences = profile.get("experience")
+    if not experiences:
+        return
+    experience_summary = summarize_experience(experiences, RULE_ENGINE.get_rules()["tier_1_companies"])
+    profile["total_years"] = round(experience_summary["total_years"], 1)
+    profile["tier_1_years"] = round(experience_summary["tier_1_years"], 1)
+
+
+def render_profile(compressed_json, max_tokens=MAX_PROFILE_TOKENS):
+    """
+    Render a compressed JSON profile as minified JSON for a prompt, with the years of experience summarized.
+    Experiences beyond the token cap are dropped from the end and counted in "more_experience".
+    """
+    profile = drop_empty(decode_json(compressed_json))
+    if isinstance(profile, dict):
+        add_experience_summary(profile)
+    rendered = encode_json(profile)
+    experiences = profile.get("experience", []) if isinstance(profile, dict) else []
+    omitted = 0
+    while count_tokens(rendered) > max_tokens and experiences:
+        experiences.pop()
+        omitted += 1
+        profile["more_experience"] = omitted
+        rendered = encode_json(profile)
+    return rendered
+
+
+def build_single_prompt(rendered_profile):
+    """
+    Build the prompt evaluating one applicant from its rendered profile, answered with structured JSON output.
+    """
+    return f"{SINGLE_INSTRUCTIONS}\n{rendered_profile}"
+
+
+def build_batch_prompt(applicants):
+    """
+    Build one prompt evaluating several (applicant_id, rendered_profile) pairs with structured JSON output.
+    """
+    lines = [f"{applicant_id}\t{rendered_profile}" for applicant_id, rendered_profile in applicants]
+    return BATCH_INSTRUCTIONS + "\n" + "\n".join(lines)
+
+
+def iter_prompt_batches(pending_applicants, batch_size, max_prompt_tokens=MAX_PROMPT_TOKENS):
+    """
+    Group pending applicant tuples (applicant_id, compressed_json, ...) into batches of at most batch_size
+    whose batched prompt stays within max_prompt_tokens. Each batch is a list of (rendered_profile, applicant) pairs,
+    and the rendered profile is reused for the single prompt of an applicant evaluated alone.
+    """
+    batch = []
+    batch_tokens = count_tokens(BATCH_INSTRUCTIONS)
+    for applicant in pending_applicants:
+        rendered_profile = render_profile(applicant[1])
+        tokens = count_tokens(f"{applicant[0]}\t{rendered_profile}\n")
+        if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_prompt_tokens):
+            yield batch
+            batch = []
+            batch_tokens = count_tokens(BATCH_INSTRUCTIONS)
+        batch.append((rendered_profile, applicant))
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def build_reask_prompt(response):
+    """
+    Build a cheap follow-up prompt asking to reformat an unparseable answer as JSON.
+    """
+    return f"{REASK_INSTRUCTIONS}\n{response[:MAX_REASK_CHARS]}"
@@ -0,0 +1,41 @@
+def index_child_records(child_records, unique=True):
+    """
+    Index linked child records by Applicant ID in a single pass.
+    Unique tables keep the first record per applicant and report the rest as duplicates.
+    Records without an applicant link or Applicant ID are reported as unlinked.
+    """
+    index = {}
+    duplicates = []
+    unlinked = []
+
+    for child_record in child_records:
+        fields = child_record.get("fields", {})
+        applicant_id = fields.get("Applicant ID")
+        if fields.get("Applicant") is None or not applicant_id:
+            unlinked.append(child_record["id"])
+            continue
+
+        if unique:
+            if applicant_id in index:
+                duplicates.append(child_record["id"])
+            else:
+                index[applicant_id] = child_record
+        else:
+            index.setdefault(applicant_id, []).append(child_record)
+
+    return index, {"duplicates": duplicates, "unlinked": unlinked}
+
+
+def find_orphaned_records(index, applicant_ids):
+    """
+    Find record IDs in an index whose Applicant ID matches no applicant.
+    """
+    orphaned = []
+    for applicant_id, indexed in index.items():
+        if applicant_id in applicant_ids:
+            continue
+        if isinstance(indexed, list):
+            orphaned.extend(child_record["id"] for child_record in indexed)
+        else:
+            orphaned.append(indexed["id"])
+    return orphaned
@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+from array import array
+from datetime import date
+from itertools import compress
+from utils.experience import get_span, merge_span_columns, summarize_experience
+
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shortlist_rules.json")
+
+
+def compile_rules(config):
+    """
+    Compile a shortlist rules config into a fact extractor and named predicate closures.
+    Lookup structures are derived once here instead of on every applicant.
+    Each predicate takes the facts of an applicant and returns (passed, explanation).
+    The column variants take the facts of a whole population as columns and return a pass mask and explanations.
+    """
+    min_years = float(config["experience"]["min_years"])
+    tier_1_companies = frozenset(company.casefold() for company in config["experience"]["tier_1_companies"])
+    max_rate_usd = float(config["compensation"]["max_rate_usd"])
+    min_availability = int(config["compensation"]["min_availability"])
+    usd_exchange_rates = {currency.upper(): rate for currency, rate in config["compensation"]["usd_exchange_rates"].items()}
+    allowed_locations = frozenset(location.casefold() for location in config["location"]["allowed_locations"])
+
+    def extract_facts(compressed_json):
+        """
+        Extract the facts rules are evaluated on, or None if required sections are missing.
+        """
+        work_experiences = compressed_json.get("experience", [])
+        salary_preferences = compressed_json.get("salary", {})
+        personal_details = compressed_json.get("personal", {})
+        if not work_experiences or not salary_preferences or not personal_details:
+            return None
+
+        experience_summary = summarize_experience(work_experiences, tier_1_companies)
+
+        # Default to USD if currency is not recognized
+        currency = salary_preferences.get("currency", "")
+        rate_in_usd = round(salary_preferences["rate"] * usd_exchange_rates.get(currency.upper(), 1), 2)
+
+        return {
+            "total_years": experience_summary["total_years"],
+            "tier_1_years": experience_summary["tier_1_years"],
+            "tier_1_companies": experience_summary["tier_1_companies"],
+            "rate_in_usd": rate_in_usd,
+            "availability": salary_preferences.get("availability", 0),
+            "location": personal_details.get("location", ""),
+        }
+
+    def explain_experience(tier_1_companies, tier_1_years, total_years):
+        if tier_1_companies:
+            return (
+                f"Worked at Tier-1 company ({', '.join(tier_1_companies)}) for {tier_1_years:.1f} years "
+                f"with total experience of {total_years:.1f} years"
+            )
+        return f"Total experience of {total_years:.1f} years against minimum of {min_years:g} years without Tier-1 company"
+
+    def explain_compensation(rate_in_usd, availability):
+        return (
+            f"Expects {rate_in_usd} USD against maximum of {max_rate_usd:g} USD "
+            f"with availability of {availability} hours per week against minimum of {min_availability}"
+        )
+
+    def explain_location(location, passed):
+        return f"Currently in {location}, {'an allowed' if passed else 'not an allowed'} location"
+
+    def experience_rule(facts):
+        passed = bool(facts["tier_1_companies"]) or facts["total_years"] >= min_years
+        return passed, explain_experience(facts["tier_1_companies"], facts["tier_1_years"], facts["total_years"])
+
+    def compensation_rule(facts):
+        passed = int(facts["rate_in_usd"]) <= max_rate_usd and int(facts["availability"]) >= min_availability
+        return passed, explain_compensation(facts["rate_in_usd"], facts["availability"])
+
+    def location_rule(facts):
+        passed = facts["location"].casefold() in allowed_locations
+        return passed, explain_location(facts["location"], passed)
+
+    def extract_columns(compressed_jsons, today=None):
+        """
+        Load the facts of the complete profiles among compressed_jsons into columns, one row per complete profile.
+        Experience rows become span columns of ordinals, and companies, currencies and locations are coded once per
+        distinct value, so the rules below only compare numbers. "indices" maps every row to its position in compressed_jsons.
+        """
+        today = today or date.today()
+        indices = array("l")
+        span_owners, span_starts, span_ends, span_is_tier_1 = array("l"), array("l"), array("l"), array("b")
+        tier_1_matches = []
+        rates, currency_codes, availabilities = [], array("l"), []
+        locations, location_codes = [], array("l")
+        company_codes, company_is_tier_1 = {}, array("b")
+        currency_codes_by_name, currency_usd_rates = {}, []
+        location_codes_by_name, location_is_allowed = {}, array("b")
+
+        for index, compressed_json in enumerate(compressed_jsons):
+            work_experiences = compressed_json.get("experience", [])
+            salary_preferences = compressed_json.get("salary", {})
+            personal_details = compressed_json.get("personal", {})
+            if not work_experiences or not salary_preferences or not personal_details:
+                continue
+            row = len(indices)
+            indices.append(index)
+
+            matched_tier_1_companies = []
+            for experience in work_experiences:
+                company = experience.get("company") or ""
+                company_code = company_codes.get(company)
+                if company_code is None:
+                    company_code = company_codes[company] = len(company_is_tier_1)
+                    company_is_tier_1.append(company.casefold() in tier_1_companies)
+                is_tier_1 = company_is_tier_1[company_code]
+                if is_tier_1:
+                    matched_tier_1_companies.append(company)
+
+                span = get_span(experience.get("start"), experience.get("end"), today)
+                if span is None:
+                    continue
+                start_date, end_date = span
+                span_owners.append(row)
+                span_starts.append(start_date.toordinal())
+                span_ends.append(end_date.toordinal())
+                span_is_tier_1.append(is_tier_1)
+            tier_1_matches.append(tuple(matched_tier_1_companies))
+
+            # Default to USD if currency is not recognized
+            currency = salary_preferences.get("currency", "").upper()
+            currency_code = currency_codes_by_name.get(currency)
+            if currency_code is None:
+                currency_code = currency_codes_by_name[currency] = len(currency_usd_rates)
+                currency_usd_rates.append(usd_exchange_rates.get(currency, 1))
+            rates.append(salary_preferences["rate"])
+            currency_codes.append(currency_code)
+            availabilities.append(salary_preferences.get("availability", 0))
+
+            location = personal_details.get("location", "")
+            location_code = location_codes_by_name.get(location)
+            if location_code is None:
+                location_code = location_codes_by_name[location] = len(location_is_allowed)
+                location_is_allowed.append(location.casefold() in allowed_locations)
+            locations.append(location)
+            location_codes.append(location_code)
+
+        total_days = merge_span_columns(span_owners, span_starts, span_ends, len(indices))
+        tier_1_days = merge_span_columns(
+            compress(span_owners, span_is_tier_1),
+            compress(span_starts, span_is_tier_1),
+            compress(span_ends, span_is_tier_1),
+            len(indices)
+        )
+        # Exchange rates and rates keep their type, so integer rates in USD are explained without decimals as in extract_facts
+        usd_rates = [currency_usd_rates[code] for code in currency_codes]
+        rates_in_usd = [round(rate * usd_rate, 2) for rate, usd_rate in zip(rates, usd_rates)]
+
+        return {
+            "indices": indices,
+            "total_years": array("d", [days / 365.0 for days in total_days]),
+            "tier_1_years": array("d", [days / 365.0 for days in tier_1_days]),
+            "tier_1_companies": tier_1_matches,
+            "rate_in_usd": rates_in_usd,
+            "whole_rate_in_usd": array("l", map(int, rates_in_usd)),
+            "availability": availabilities,
+            "whole_availability": array("l", map(int, availabilities)),
+            "location": locations,
+            "location_is_allowed": array("b", [location_is_allowed[code] for code in location_codes]),
+        }
+
+    def experience_column_rule(columns):
+        mask = array("b", [
+            bool(companies) or total_years >= min_years
+            for companies, total_years in zip(columns["tier_1_companies"], columns["total_years"])
+        ])
+        explanations = list(map(explain_experience, columns["tier_1_companies"], columns["tier_1_years"], columns["total_years"]))
+        return mask, explanations
+
+    def compensation_column_rule(columns):
+        mask = array("b", [
+            rate <= max_rate_usd and availability >= min_availability
+            for rate, availability in zip(columns["whole_rate_in_usd"], columns["whole_availability"])
+        ])
+        explanations = list(map(explain_compensation, columns["rate_in_usd"], columns["availability"]))
+        return mask, explanations
+
+    def location_column_rule(columns):
+        mask = columns["location_is_allowed"]
+        return mask, list(map(explain_location, columns["location"], mask))
+
+    return {
+        "tier_1_companies": tier_1_companies,
+        "extract_facts": extract_facts,
+        "rules": [
+            ("Experience", experience_rule),
+            ("Compensation", compensation_rule),
+            ("Location", location_rule),
+        ],
+        "extract_columns": extract_columns,
+        "column_rules": [
+            ("Experience", experience_column_rule),
+            ("Compensation", compensation_column_rule),
+            ("Location", location_column_rule),
+        ],
+    }
+
+
+def format_rule_results(rule_results):
+    """
+    Format (rule name, passed, explanation) tuples as one line per rule.
+    """
+    return "\n".join(f"{name}: {'PASS' if passed else 'FAIL'} - {explanation}" for name, passed, explanation in rule_results)
+
+
+class RuleEngine:
+    """
+    Loads shortlist rules from a JSON file and recompiles them whenever the file's mtime changes.
+    """
+
+    def __init__(self, path=DEFAULT_RULES_PATH):
+        self.path = path
+        self.mtime = None
+        self.rules = None
+        self.lock = threading.Lock()
+
+    def get_rules(self):
+        """
+        Get the compiled rules, reloading them first if the file changed.
+        """
+        mtime = os.stat(self.path).st_mtime
+        with self.lock:
+            if mtime != self.mtime:
+                with open(self.path) as rules_file:
+                    self.rules = compile_rules(json.load(rules_file))
+                if self.mtime is not None:
+                    print(f"Reloaded shortlist rules from {self.path}")
+                self.mtime = mtime
+            return self.rules
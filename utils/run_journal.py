@@ -0,0 +1,262 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils.batch_writer import get_record_key, print_batch_report, write_records_in_batches
+
+
+DEFAULT_JOURNAL_DIR = os.path.join(".cache", "journals")
+
+# Records buffered per target before they are written to Airtable
+DEFAULT_FLUSH_SIZE = 100
+
+# Writes in flight at once when flushing in the background, bounding the records held in memory
+MAX_PENDING_FLUSHES = 2
+
+
+def get_journal_path(name):
+    """
+    Get the journal file of a script.
+    """
+    return os.path.join(DEFAULT_JOURNAL_DIR, f"{name}.jsonl")
+
+
+class RunJournal:
+    """
+    Append-only write-ahead journal of per-applicant results and of the targets they were flushed to.
+    Lines are flushed as they are written, so a run that dies can skip finished applicants and replay unflushed writes.
+    """
+
+    def __init__(self, path, resume=True):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not resume and os.path.exists(path):
+            os.remove(path)
+
+        self.path = path
+        self.results = {}
+        self.flushed = {}
+        if os.path.exists(path):
+            self.load()
+        self.journal_file = open(path, "a")
+
+    def load(self):
+        """
+        Replay the journal, dropping a last line torn by a crash.
+        """
+        valid_size = 0
+        with open(self.path, "rb") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                valid_size += len(line)
+                if "flushed" in entry:
+                    self.flushed.setdefault(entry["flushed"], set()).update(entry["keys"])
+                else:
+                    self.results[entry["key"]] = entry["records"]
+
+        if valid_size < os.path.getsize(self.path):
+            os.truncate(self.path, valid_size)
+        if self.results:
+            print(f"Resuming from journal {self.path} with {len(self.results)} finished applicants")
+
+    def append(self, entry, sync=False):
+        """
+        Append one entry, forcing it to disk when sync is set.
+        """
+        self.journal_file.write(json.dumps(entry) + "\n")
+        self.journal_file.flush()
+        if sync:
+            os.fsync(self.journal_file.fileno())
+
+    def has_result(self, key):
+        """
+        Check whether an applicant was already processed by a previous attempt of the run.
+        """
+        return key in self.results
+
+    def iter_unfinished(self, records):
+        """
+        Yield the Airtable records not processed by a previous attempt of the run, keyed on their ids.
+        """
+        for record in records:
+            if record["id"] not in self.results:
+                yield record
+
+    def record_result(self, key, records_by_target):
+        """
+        Journal the records an applicant produced, per write target.
+        """
+        self.results[key] = records_by_target
+        self.append({"key": key, "records": records_by_target})
+
+    def record_flushed(self, target, keys):
+        """
+        Journal the applicants whose records were written to a target.
+        """
+        self.flushed.setdefault(target, set()).update(keys)
+        self.append({"flushed": target, "keys": keys}, sync=True)
+
+    def iter_unflushed(self, target):
+        """
+        Yield (key, record) for journaled records not yet written to a target.
+        """
+        flushed_keys = self.flushed.get(target, set())
+        for key, records_by_target in self.results.items():
+            if key not in flushed_keys:
+                for record in records_by_target.get(target, []):
+                    yield key, record
+
+    def close(self):
+        """
+        Close the journal, keeping it for the next run.
+        """
+        self.journal_file.close()
+
+    def complete(self):
+        """
+        Close and remove the journal once every result has been written.
+        """
+        self.close()
+        os.remove(self.path)
+
+
+class JournaledWriter:
+    """
+    Write per-applicant records to Airtable in batches while the run progresses, journaling them first.
+    Targets map a name to the write_records_in_batches arguments of a table (table_id, table_name, use_post, fields_to_merge_on).
+    Unflushed records of a previous attempt are replayed on the first flush of each target.
+    With background, writes run on a separate thread while the caller keeps processing. The journal and
+    on_flushed are still only touched from the calling thread, when a write is collected.
+    """
+
+    def __init__(self, journal, targets, flush_size=DEFAULT_FLUSH_SIZE, on_flushed=None, background=False):
+        self.journal = journal
+        self.targets = targets
+        self.flush_size = flush_size
+        self.on_flushed = on_flushed
+        self.executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self.pending_flushes = deque()
+        self.started_at = time.perf_counter()
+        self.first_written = set()
+        self.buffers = {target: list(journal.iter_unflushed(target)) for target in targets}
+        self.reports = {
+            target: {
+                "table_name": options["table_name"],
+                "total_records": 0,
+                "total_batches": 0,
+                "failed_batches": 0,
+                "upserted_record_ids": [],
+                "failed_record_ids": [],
+            }
+            for target, options in targets.items()
+        }
+
+        replayed_count = sum(len(buffer) for buffer in self.buffers.values())
+        if replayed_count:
+            print(f"Replaying {replayed_count} unflushed records from the journal")
+
+    def add(self, key, records_by_target):
+        """
+        Journal the records of an applicant and flush every target whose buffer is full.
+        """
+        records_by_target = {target: records for target, records in records_by_target.items() if records}
+        self.journal.record_result(key, records_by_target)
+        for target, records in records_by_target.items():
+            self.buffers[target].extend((key, record) for record in records)
+            if len(self.buffers[target]) >= self.flush_size:
+                self.flush(target)
+
+    def append(self, record):
+        """
+        Add a record keyed on its id to the only target, so the writer can stand in for a list of results.
+        """
+        [target] = self.targets
+        self.add(record["id"], {target: [record]})
+
+    def extend(self, records):
+        """
+        Add several records keyed on their ids to the only target.
+        """
+        for record in records:
+            self.append(record)
+
+    def write(self, target, buffer):
+        """
+        Write buffered (key, record) pairs to a target.
+        """
+        return write_records_in_batches(records=[record for _, record in buffer], **self.targets[target])
+
+    def flush(self, target):
+        """
+        Write the buffered records of a target and journal the applicants whose records were all written.
+        In the background, the oldest write is waited for once MAX_PENDING_FLUSHES writes are in flight.
+        """
+        buffer, self.buffers[target] = self.buffers[target], []
+        if not buffer:
+            return
+
+        if self.executor is None:
+            self.collect_flush(target, buffer, self.write(target, buffer))
+            return
+
+        while self.pending_flushes and (self.pending_flushes[0][2].done() or len(self.pending_flushes) >= MAX_PENDING_FLUSHES):
+            self.collect_oldest_flush()
+        self.pending_flushes.append((target, buffer, self.executor.submit(self.write, target, buffer)))
+
+    def collect_oldest_flush(self):
+        """
+        Wait for the oldest background write and record its outcome.
+        """
+        target, buffer, future = self.pending_flushes.popleft()
+        self.collect_flush(target, buffer, future.result())
+
+    def collect_flush(self, target, buffer, report):
+        """
+        Journal the outcome of a write, add it to the target report and pass the written records to on_flushed.
+        """
+        if target not in self.first_written and report["upserted_record_ids"]:
+            self.first_written.add(target)
+            print(f"First records written to {report['table_name']} after {time.perf_counter() - self.started_at:.1f}s")
+
+        failed_record_keys = set(report["failed_record_ids"])
+        failed_keys = {key for key, record in buffer if get_record_key(record) in failed_record_keys}
+        flushed_keys = list(dict.fromkeys(key for key, _ in buffer if key not in failed_keys))
+        self.journal.record_flushed(target, flushed_keys)
+
+        total_report = self.reports[target]
+        for name in ["total_records", "total_batches", "failed_batches"]:
+            total_report[name] += report[name]
+        total_report["upserted_record_ids"].extend(report["upserted_record_ids"])
+        total_report["failed_record_ids"].extend(report["failed_record_ids"])
+
+        if self.on_flushed is not None:
+            self.on_flushed(target, [record for key, record in buffer if key not in failed_keys])
+
+    def close(self):
+        """
+        Flush every target and print their reports.
+        The journal is removed when every write succeeded and kept for the next run otherwise.
+        Returns whether every write succeeded.
+        """
+        for target in self.targets:
+            self.flush(target)
+        while self.pending_flushes:
+            self.collect_oldest_flush()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+        for target in self.targets:
+            print_batch_report(self.reports[target])
+
+        succeeded = all(report["failed_batches"] == 0 for report in self.reports.values())
+        if succeeded:
+            self.journal.complete()
+        else:
+            print(f"Keeping journal {self.journal.path} to replay failed writes on the next run")
+            self.journal.close()
+        return succeeded
@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+from utils.config_loader import TABLES
+from utils.airtable_operations import iter_records_from_table
+from utils.watermarks import build_modified_since_formula, current_timestamp
+
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(".cache", "snapshot.sqlite")
+
+
+class SnapshotStore:
+    """
+    Local SQLite mirror of the Airtable tables, indexed on Applicant ID and the Applicant link.
+    Records are returned in the same {"id", "fields"} shape as the Airtable API.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        # Async evaluation reads applicants and mirrors written results on its single helper thread,
+        # and the main thread only opens and closes the store around it
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                table_key TEXT NOT NULL,
+                record_id TEXT NOT NULL,
+                applicant_id TEXT,
+                applicant_link TEXT,
+                fields TEXT NOT NULL,
+                PRIMARY KEY (table_key, record_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_applicant_id ON records (table_key, applicant_id);
+            CREATE INDEX IF NOT EXISTS idx_records_applicant_link ON records (table_key, applicant_link);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                table_key TEXT PRIMARY KEY,
+                synced_at TEXT NOT NULL
+            );
+            """
+        )
+
+    def store_records(self, table_key, records):
+        """
+        Insert or replace records of a table in the snapshot.
+        """
+        rows = []
+        for record in records:
+            fields = record.get("fields", {})
+            applicant_link = fields.get("Applicant")
+            rows.append((
+                table_key,
+                record["id"],
+                fields.get("Applicant ID"),
+                applicant_link[0] if isinstance(applicant_link, list) and applicant_link else None,
+                json.dumps(fields)
+            ))
+        # Upsert in place so rowids, and thereby the order of cursors still reading the table, stay stable
+        self.connection.executemany(
+            """
+            INSERT INTO records VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (table_key, record_id) DO UPDATE SET
+                applicant_id = excluded.applicant_id,
+                applicant_link = excluded.applicant_link,
+                fields = excluded.fields
+            """,
+            rows
+        )
+
+    def apply_updates(self, table_key, records):
+        """
+        Merge the fields of records written to Airtable into the snapshot so later stages see them.
+        """
+        for record in records:
+            row = self.connection.execute(
+                "SELECT fields FROM records WHERE table_key = ? AND record_id = ?",
+                (table_key, record["id"])
+            ).fetchone()
+            fields = json.loads(row[0]) if row else {}
+            fields.update(record.get("fields", {}))
+            self.store_records(table_key, [{"id": record["id"], "fields": fields}])
+        self.connection.commit()
+
+    def sync_table(self, table_key, full=False):
+        """
+        Mirror a table into the snapshot.
+        Incremental syncs only fetch records modified since the previous sync and cannot see deletions.
+        """
+        synced_at = current_timestamp()
+        row = self.connection.execute("SELECT synced_at FROM sync_state WHERE table_key = ?", (table_key,)).fetchone()
+
+        if full or row is None:
+            self.connection.execute("DELETE FROM records WHERE table_key = ?", (table_key,))
+            records = iter_records_from_table(TABLES[table_key])
+        else:
+            records = iter_records_from_table(TABLES[table_key], filter_by_formula=build_modified_since_formula(row[0]))
+
+        synced_count = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) == 1000:
+                self.store_records(table_key, batch)
+                synced_count += len(batch)
+                batch = []
+        self.store_records(table_key, batch)
+        synced_count += len(batch)
+
+        self.connection.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (table_key, synced_at))
+        self.connection.commit()
+        return synced_count
+
+    def iter_records(self, table_key, fields=None, applicant_ids=None):
+        """
+        Yield snapshot records of a table, optionally projected to the given fields or limited to Applicant IDs.
+        """
+        query = "SELECT record_id, fields FROM records WHERE table_key = ?"
+        parameters = [table_key]
+        if applicant_ids is not None:
+            applicant_ids = list(applicant_ids)
+            query += f" AND applicant_id IN ({', '.join('?' * len(applicant_ids))})"
+            parameters.extend(applicant_ids)
+
+        for record_id, record_fields in self.connection.execute(query + " ORDER BY rowid", parameters):
+            record_fields = json.loads(record_fields)
+            if fields is not None:
+                record_fields = {field: record_fields[field] for field in fields if field in record_fields}
+            yield {"id": record_id, "fields": record_fields}
+
+    def close(self):
+        """
+        Close the snapshot database.
+        """
+        self.connection.close()
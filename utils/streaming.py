@@ -0,0 +1,52 @@
+import queue
+import threading
+from itertools import islice
+
+
+# Records held between the fetcher and the processing stage, about 5 Airtable pages
+DEFAULT_QUEUE_SIZE = 500
+
+# Applicants verified together in one columnar shortlist pass while streaming
+STREAM_CHUNK_SIZE = 100
+
+END_OF_STREAM = object()
+
+
+def stream_in_background(iterable, maxsize=DEFAULT_QUEUE_SIZE):
+    """
+    Iterate over items produced by a background thread through a bounded queue.
+    The producer blocks while the queue is full, so at most maxsize items are held regardless of the table size.
+    Errors raised by the producer are raised again in the consumer.
+    """
+    items = queue.Queue(maxsize=maxsize)
+    errors = []
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put(item)
+        except Exception as ex:
+            errors.append(ex)
+        finally:
+            items.put(END_OF_STREAM)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item = items.get()
+        if item is END_OF_STREAM:
+            break
+        yield item
+
+    if errors:
+        raise errors[0]
+
+
+def iter_chunks(iterable, size):
+    """
+    Yield lists of at most size items, consuming the iterable lazily.
+    """
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
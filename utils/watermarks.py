@@ -0,0 +1,44 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from utils.atomic_io import write_json_atomically
+
+
+DEFAULT_WATERMARKS_PATH = os.path.join(".cache", "compress_watermarks.json")
+
+# Records modified shortly before the previous run started are fetched again to absorb clock skew
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+
+def current_timestamp():
+    """
+    Get the current UTC time as an ISO 8601 timestamp understood by Airtable formulas.
+    """
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def load_watermarks(path=DEFAULT_WATERMARKS_PATH):
+    """
+    Load the last run timestamp per table, or an empty mapping when no run has completed yet.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as watermarks_file:
+        return json.load(watermarks_file)
+
+
+def save_watermarks(watermarks, path=DEFAULT_WATERMARKS_PATH):
+    """
+    Atomically persist the last run timestamp per table.
+    """
+    write_json_atomically(path, watermarks)
+
+
+def build_modified_since_formula(watermark, field_name=None):
+    """
+    Build a formula matching records modified after the watermark, minus the skew overlap.
+    With a field name only modifications of that field are considered.
+    """
+    since = datetime.strptime(watermark, "%Y-%m-%dT%H:%M:%S.000Z") - WATERMARK_OVERLAP
+    last_modified = f"LAST_MODIFIED_TIME({{{field_name}}})" if field_name else "LAST_MODIFIED_TIME()"
+    return f"IS_AFTER({last_modified}, DATETIME_PARSE('{since.strftime('%Y-%m-%dT%H:%M:%S.000Z')}'))"
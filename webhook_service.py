@@ -0,0 +1,337 @@
+import argparse
+import threading
+import time
+from collections import defaultdict
+from utils.config_loader import TABLES
+from utils.airtable_operations import build_match_formula, build_record_id_formula, delete_records, iter_records_from_table
+from utils.airtable_webhooks import (
+    DEFAULT_WEBHOOK_STATE_PATH,
+    create_webhook,
+    fetch_webhook_payloads,
+    iter_changed_records,
+    load_webhook_state,
+    needs_refresh,
+    refresh_webhook,
+    save_webhook_state,
+    start_notification_server,
+)
+from utils.debounce import ChangeDebouncer
+from utils.llm_cache import DEFAULT_CACHE_PATH, LLMCache
+from utils.metrics import add_metrics_arguments, increment, log_event, start_metrics, timed
+from compress_json import CHILD_TABLE_NAMES, MATCH_CHUNK_SIZE
+from run_pipeline import UNPROCESSED_STATUSES, load_applicants, run_compress_stage, run_evaluate_stage, run_shortlist_stage, write_back
+
+
+# Shortlist Status of applicants having a lead
+SHORTLISTED_STATUS = "Processing"
+REJECTED_STATUS = "Rejected"
+
+
+def ensure_webhook(state, notification_url):
+    """
+    Create the webhook when the state has none or it pings another URL, and refresh it before it expires.
+    """
+    if state.get("webhook_id") and state.get("notification_url") == notification_url:
+        if needs_refresh(state["expiration_time"]):
+            state["expiration_time"] = refresh_webhook(state["webhook_id"])
+            print(f"Refreshed webhook {state['webhook_id']} until {state['expiration_time']}")
+        return
+
+    if state.get("webhook_id"):
+        print(f"Notification URL changed, replacing webhook {state['webhook_id']}")
+    webhook = create_webhook(notification_url)
+    state.update({
+        "webhook_id": webhook["id"],
+        "mac_secret": webhook["macSecretBase64"],
+        "expiration_time": webhook["expirationTime"],
+        "notification_url": notification_url,
+        "cursor": 1,
+    })
+    print(f"Created webhook {webhook['id']}")
+
+
+def find_changed_applicant_ids(payloads, record_applicants):
+    """
+    Find the Applicant IDs of applicants created, or having child records created, changed or destroyed, in webhook payloads.
+    record_applicants maps child record ids already seen to their Applicant ID, which is the only way to place destroyed records.
+    """
+    table_keys = {TABLES[table_key]: table_key for table_key in ["applicants", *CHILD_TABLE_NAMES]}
+    applicant_ids = set()
+    record_ids_by_table = defaultdict(set)
+    for payload in payloads:
+        for table_id, change, record_id in iter_changed_records(payload):
+            table_key = table_keys.get(table_id)
+
+            # Stage results written to applicants and leads trigger payloads too, so only new applicants count
+            if table_key is None or (table_key == "applicants" and change != "created"):
+                continue
+
+            if change == "destroyed":
+                record_ids_by_table[table_key].discard(record_id)
+                if record_id in record_applicants:
+                    applicant_ids.add(record_applicants.pop(record_id))
+                else:
+                    print(f"Skipping destroyed {table_key} record {record_id} of an unknown applicant")
+            else:
+                record_ids_by_table[table_key].add(record_id)
+
+    # Child records only carry their Applicant ID once linked, unlinked ones are picked up when linked
+    for table_key, record_ids in record_ids_by_table.items():
+        record_ids = sorted(record_ids)
+        for i in range(0, len(record_ids), MATCH_CHUNK_SIZE):
+            formula = build_record_id_formula(record_ids[i:i + MATCH_CHUNK_SIZE])
+            for record in iter_records_from_table(TABLES[table_key], fields=["Applicant ID"], filter_by_formula=formula):
+                applicant_id = record["fields"].get("Applicant ID")
+                if applicant_id:
+                    applicant_ids.add(applicant_id)
+                    record_applicants[record["id"]] = applicant_id
+
+    return sorted(applicant_ids)
+
+
+def fetch_leads(applicant_ids):
+    """
+    Fetch the Shortlisted Leads of the given applicants.
+    """
+    return list(iter_records_from_table(
+        TABLES["shortlisted"],
+        fields=["Applicant ID"],
+        filter_by_formula=build_match_formula("Applicant ID", applicant_ids)
+    ))
+
+
+def delete_leads(applicant_ids):
+    """
+    Delete the Shortlisted Leads of the given applicants.
+    Returns the Applicant IDs whose leads could not all be deleted.
+    """
+    leads = fetch_leads(applicant_ids)
+    deleted_record_ids = set(delete_records(TABLES["shortlisted"], "Shortlisted Leads", [lead["id"] for lead in leads]))
+    return {lead["fields"].get("Applicant ID") for lead in leads if lead["id"] not in deleted_record_ids}
+
+
+def find_reshortlistable_ids(applicants):
+    """
+    Find the Applicant IDs whose Shortlist Status was set by the scripts, so shortlisting them again may replace it.
+    "Selected" is only set by hand. Shortlisting never leaves a lead to a "Rejected" applicant,
+    so one still having a lead was rejected by hand after review.
+    """
+    reshortlistable_ids = {applicant.applicant_id for applicant in applicants if applicant.shortlist_status == SHORTLISTED_STATUS}
+    rejected_ids = sorted(applicant.applicant_id for applicant in applicants if applicant.shortlist_status == REJECTED_STATUS)
+    if rejected_ids:
+        reviewed_ids = {lead["fields"].get("Applicant ID") for lead in fetch_leads(rejected_ids)}
+        reshortlistable_ids.update(applicant_id for applicant_id in rejected_ids if applicant_id not in reviewed_ids)
+    return reshortlistable_ids
+
+
+@timed("webhook.process_applicants")
+def process_applicants(applicant_ids, cache, args, reshortlist_applicant_ids=frozenset()):
+    """
+    Recompress, shortlist and evaluate the given applicants and write the results back.
+    Applicants whose Compressed JSON changed, or listed in reshortlist_applicant_ids, are shortlisted again
+    unless a reviewer set their status, and the leads of those no longer shortlisted are deleted.
+    Returns the Applicant IDs whose results were not all written, to be processed again with reshortlisting.
+    """
+    match_formula = build_match_formula("Applicant ID", applicant_ids)
+    applicants = load_applicants(filter_by_formula=match_formula)
+    run_compress_stage(applicants, compact=args.compact, filter_by_formula=match_formula)
+
+    reshortlist_applicants = [
+        applicant for applicant in applicants
+        if "Compressed JSON" in applicant.patch.fields or applicant.applicant_id in reshortlist_applicant_ids
+    ]
+    reshortlistable_ids = find_reshortlistable_ids(reshortlist_applicants)
+    previously_shortlisted_ids = set()
+    for applicant in reshortlist_applicants:
+        if applicant.applicant_id in reshortlistable_ids:
+            if applicant.shortlist_status == SHORTLISTED_STATUS:
+                previously_shortlisted_ids.add(applicant.applicant_id)
+            applicant.shortlist_status = UNPROCESSED_STATUSES[0]
+
+    shortlisted_leads = run_shortlist_stage(applicants)
+    run_evaluate_stage(applicants, args.concurrency, cache, args.batch_size)
+
+    # Applicants whose lead is kept stay shortlisted, so deleting it is retried along with the status change
+    failed_applicant_ids = set()
+    rejected_ids = sorted(
+        applicant.applicant_id for applicant in applicants
+        if applicant.applicant_id in previously_shortlisted_ids and applicant.shortlist_status != SHORTLISTED_STATUS
+    )
+    if rejected_ids:
+        failed_applicant_ids = delete_leads(rejected_ids)
+        for applicant in applicants:
+            if applicant.applicant_id in failed_applicant_ids:
+                applicant.patch.fields.pop("Shortlist Status", None)
+
+    failed_record_ids = write_back(applicants, shortlisted_leads)
+    failed_applicant_ids.update(applicant.applicant_id for applicant in applicants if applicant.record_id in failed_record_ids)
+    return sorted(failed_applicant_ids)
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Process applicants as their records change, following an Airtable webhook.")
+    parser.add_argument(
+        "--notification-url",
+        metavar="URL",
+        help="Public URL forwarding to --listen-port, which Airtable pings when new payloads are available. "
+             "Without it payloads are only polled."
+    )
+    parser.add_argument(
+        "--listen-host",
+        default="0.0.0.0",
+        help="Host to listen for notification pings on."
+    )
+    parser.add_argument(
+        "--listen-port",
+        type=int,
+        default=8790,
+        help="Port to listen for notification pings on."
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between payload fetches without a ping, catching up on missed pings."
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=2.0,
+        help="Seconds an applicant must go without changes before it is processed, merging a burst of edits into one job."
+    )
+    parser.add_argument(
+        "--max-delay",
+        type=float,
+        default=30.0,
+        help="Maximum seconds an applicant waits after its first change while edits keep coming."
+    )
+    parser.add_argument(
+        "--state-path",
+        default=DEFAULT_WEBHOOK_STATE_PATH,
+        help="JSON file holding the webhook, its payload cursor and the applicants waiting to be processed."
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write Compressed JSON in the versioned compact format instead of plain JSON."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of concurrent OpenAI requests per job."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Number of applicants evaluated per structured prompt."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the OpenAI API instead of reusing cached evaluations."
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=DEFAULT_CACHE_PATH,
+        help="SQLite file holding cached evaluations."
+    )
+    add_metrics_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """
+    Follow the webhook payloads with a cursor and process every changed applicant once its edits settle.
+    Stop with Ctrl+C; the cursor and applicants still waiting are kept in the state file for the next start.
+    """
+    args = parse_args()
+    start_metrics("webhook_service", args)
+    state = load_webhook_state(args.state_path)
+    ensure_webhook(state, args.notification_url)
+    save_webhook_state(state, args.state_path)
+
+    notified = threading.Event()
+    server = None
+    if args.notification_url:
+        server = start_notification_server(args.listen_host, args.listen_port, state["mac_secret"], notified.set)
+        print(f"Listening for notification pings on {args.listen_host}:{server.server_address[1]}")
+
+    cache = None if args.no_cache else LLMCache(args.cache_path)
+    debouncer = ChangeDebouncer(args.debounce, args.max_delay)
+    debouncer.add(state.get("pending_applicant_ids", []))
+    # Applicants whose results failed to write, shortlisted again on their next job even if unchanged
+    reshortlist_applicant_ids = set(state.get("reshortlist_applicant_ids", []))
+    record_applicants = {}
+    unfinished_applicant_ids = []
+    next_poll_at = 0.0
+
+    print(f"Following webhook {state['webhook_id']} from cursor {state['cursor']}")
+    try:
+        while True:
+            timeout = next_poll_at - time.monotonic()
+            seconds_until_due = debouncer.seconds_until_due()
+            if seconds_until_due is not None:
+                timeout = min(timeout, seconds_until_due)
+            was_notified = notified.wait(max(0.0, timeout))
+            notified.clear()
+
+            if was_notified or time.monotonic() >= next_poll_at:
+                next_poll_at = time.monotonic() + args.poll_interval
+                try:
+                    ensure_webhook(state, args.notification_url)
+                    payloads, cursor = fetch_webhook_payloads(state["webhook_id"], state["cursor"])
+                    if payloads:
+                        increment("webhook.payloads", len(payloads))
+                        changed_applicant_ids = find_changed_applicant_ids(payloads, record_applicants)
+                        debouncer.add(changed_applicant_ids)
+                        print(f"Received {len(payloads)} payloads changing {len(changed_applicant_ids)} applicants")
+                    # Only moved forward once the changes of the payloads are queued
+                    state["cursor"] = cursor
+                except Exception as ex:
+                    print(f"Failed to fetch webhook payloads, retrying at the next poll: {ex}")
+
+            unfinished_applicant_ids = debouncer.pop_due()
+            while unfinished_applicant_ids:
+                applicant_ids = unfinished_applicant_ids[:MATCH_CHUNK_SIZE]
+                print(f"Processing {len(applicant_ids)} changed applicants: {', '.join(applicant_ids)}")
+                started_at = time.perf_counter()
+                try:
+                    failed_applicant_ids = process_applicants(applicant_ids, cache, args, reshortlist_applicant_ids)
+                    log_event("webhook_job", applicants=len(applicant_ids), seconds=round(time.perf_counter() - started_at, 6))
+                    reshortlist_applicant_ids.difference_update(applicant_ids)
+                    if failed_applicant_ids:
+                        print(f"Failed to write {len(failed_applicant_ids)} applicants, retrying later: {', '.join(failed_applicant_ids)}")
+                        reshortlist_applicant_ids.update(failed_applicant_ids)
+                        debouncer.add(failed_applicant_ids)
+                except Exception as ex:
+                    # Retried once the debounce delay has passed again
+                    print(f"Failed to process applicants, retrying later: {ex}")
+                    debouncer.add(applicant_ids)
+                del unfinished_applicant_ids[:MATCH_CHUNK_SIZE]
+
+            # Saved after the jobs, so a crash fetches the payloads of unfinished jobs again
+            state["pending_applicant_ids"] = sorted(debouncer.pending)
+            state["reshortlist_applicant_ids"] = sorted(reshortlist_applicant_ids)
+            save_webhook_state(state, args.state_path)
+
+    except KeyboardInterrupt:
+        print("Stopping webhook service")
+
+    finally:
+        # Applicants received but not processed yet are picked up again on the next start
+        state["pending_applicant_ids"] = sorted(set(debouncer.pending) | set(unfinished_applicant_ids))
+        state["reshortlist_applicant_ids"] = sorted(reshortlist_applicant_ids)
+        save_webhook_state(state, args.state_path)
+        if server is not None:
+            server.shutdown()
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()